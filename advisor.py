@@ -0,0 +1,321 @@
+"""Module proposing indexes for the full table scans of a workload."""
+import os
+import re
+import sqlite3
+import tempfile
+import time
+from querycache import StatementTracker
+from profiler import explain_plan, full_scan
+from transfer import quote_identifier
+
+MAX_INDEX_COLUMNS = 4
+MEASURE_REPEAT = 3
+# a measured speedup below this is within timing noise, so the index is not recommended
+MIN_SPEEDUP = 1.1
+_TOKENS = re.compile(r"""'(?:[^']|'')*'|"((?:[^"]|"")*)"|`([^`]*)`|\[([^\]]*)\]|([A-Za-z_][\w$]*)|--[^\n]*|/\*.*?(?:\*/|\Z)|(<=|>=|<>|!=|==|[=<>.,();])|\S""", re.S)
+_KEYWORDS = {"SELECT", "FROM", "WHERE", "GROUP", "ORDER", "BY", "LIMIT", "OFFSET", "HAVING", "UNION", "EXCEPT", "INTERSECT", "ALL", "JOIN", "ON", "USING", "WINDOW", "RETURNING", "SET", "VALUES", "INNER", "LEFT", "RIGHT", "FULL", "CROSS", "NATURAL", "OUTER", "AS", "AND", "OR", "NOT", "IN", "IS", "NULL", "BETWEEN", "LIKE", "GLOB", "ESCAPE", "CASE", "WHEN", "THEN", "ELSE", "END", "EXISTS", "DISTINCT", "ASC", "DESC", "COLLATE", "UPDATE", "DELETE", "INSERT", "INTO", "WITH", "RECURSIVE", "INDEXED", "TRUE", "FALSE", "CAST", "NULLS", "FIRST", "LAST", "OVER", "PARTITION"}
+_EQUALITY = {"=", "==", "IN", "IS"}
+_RANGE = {"<", ">", "<=", ">=", "BETWEEN", "LIKE", "GLOB"}
+
+
+class IndexProposal:
+    __slots__ = ("table", "columns", "statements", "weight", "rows", "before", "after", "error")
+
+    def __init__(self, table: str, columns: tuple):
+        self.table = table
+        self.columns = columns
+        self.statements = []
+        self.weight = 0
+        self.rows = 0
+        self.before = self.after = None
+        self.error = None
+
+    @property
+    def name(self):
+        return re.sub(r"\W", "_", f"ix_{self.table}_{'_'.join(self.columns)}")
+
+    @property
+    def sql(self):
+        return f"CREATE INDEX IF NOT EXISTS {quote_identifier(self.name)} ON {quote_identifier(self.table)} ({', '.join(map(quote_identifier, self.columns))});"
+
+    @property
+    def score(self):
+        # rows a full scan visits, times how often the workload runs the statements that scan
+        return self.rows * self.weight
+
+    @property
+    def improves(self):
+        # None when not measured, or when the test failed
+        if self.error is not None or self.before is None:
+            return None
+        return self.after is not None and self.after * MIN_SPEEDUP <= self.before
+
+
+def _tokens(sql: str):
+    for match in _TOKENS.finditer(sql):
+        quoted = match.group(1) or match.group(2) or match.group(3)
+        if quoted is not None:
+            yield "name", quoted.replace('""', '"') if match.group(1) else quoted
+        elif match.group(4):
+            word = match.group(4)
+            yield ("keyword", word.upper()) if word.upper() in _KEYWORDS else ("name", word)
+        elif match.group(5):
+            yield "op", match.group(5)
+        elif not match.group(0).startswith(("--", "/*", "'")):
+            yield "other", match.group(0)
+        else:
+            yield "other", ""
+
+def referenced_columns(sql: str):
+    # heuristic scan of FROM/JOIN aliases and of the column references in WHERE, ON, ORDER BY and GROUP BY.
+    # An equality with another column, e.g. a join condition, gets the role "join"
+    tokens = list(_tokens(sql))
+    aliases, refs = {}, []
+    mode, expect_table, table = None, False, None
+    for i, (kind, value) in enumerate(tokens):
+        following = tokens[i + 1] if i + 1 < len(tokens) else ("", "")
+        if kind == "keyword":
+            if value in ("FROM", "JOIN", "UPDATE", "INTO"):
+                mode, expect_table, table = "from", True, None
+            elif value in ("WHERE", "ON", "HAVING"):
+                mode = "where"
+            elif value == "BY" and i and tokens[i - 1][1] in ("ORDER", "GROUP"):
+                mode = "order"
+            elif value in ("SELECT", "SET", "VALUES", "LIMIT", "RETURNING", "USING", "WINDOW"):
+                mode = None
+            continue
+        if mode == "from":
+            if kind == "name":
+                if following == ("op", "."):
+                    continue  # schema qualifier
+                if expect_table:
+                    table, expect_table = value, False
+                    aliases.setdefault(value, value)
+                elif table is not None:
+                    aliases[value] = table
+                    table = None
+            elif value == ",":
+                expect_table = True
+            elif value == "(":
+                expect_table = False
+        elif mode in ("where", "order") and kind == "name" and following != ("op", "(") and following != ("op", "."):
+            qualifier = tokens[i - 2][1] if i >= 2 and tokens[i - 1] == ("op", ".") else None
+            if mode == "order":
+                role = "order"
+            else:
+                previous = tokens[i - 3 if qualifier else i - 1][1] if i >= (3 if qualifier else 1) else ""
+                after = following[1]
+                if after == "NOT":
+                    after = tokens[i + 2][1] if i + 2 < len(tokens) else ""
+                if after in _EQUALITY or previous in ("=", "=="):
+                    # the other operand follows the operator, or precedes it when this column is on the right
+                    j = i + (3 if following[1] == "NOT" else 2) if after in _EQUALITY else i - (4 if qualifier else 2)
+                    other = tokens[j] if 0 <= j < len(tokens) else ("", "")
+                    call = j + 1 < len(tokens) and tokens[j + 1] == ("op", "(")
+                    role = "join" if other[0] == "name" and not call else "eq"
+                elif after in _RANGE or previous in _RANGE:
+                    role = "range"
+                else:
+                    role = None
+            if role is not None:
+                refs.append((qualifier, value, role))
+    return aliases, refs
+
+def table_columns(conn, table: str):
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({quote_identifier(table)})")]
+
+def existing_indexes(conn, table: str):
+    # an INTEGER PRIMARY KEY is the rowid itself, which the table is ordered by
+    keys = [row for row in conn.execute(f"PRAGMA table_info({quote_identifier(table)})") if row[5]]
+    indexes = [(keys[0][1],)] if len(keys) == 1 and keys[0][2].upper() == "INTEGER" else []
+    for row in conn.execute(f"PRAGMA index_list({quote_identifier(table)})"):
+        indexes.append(tuple(info[2] for info in conn.execute(f"PRAGMA index_info({quote_identifier(row[1])})")))
+    return indexes
+
+def estimate_rows(conn, table: str):
+    try:
+        row = conn.execute("SELECT stat FROM sqlite_stat1 WHERE tbl = ? LIMIT 1", (table,)).fetchone()
+        if row is not None:
+            return int(row[0].split()[0])
+    except (sqlite3.Error, ValueError):
+        pass
+    try:
+        return conn.execute(f"SELECT max(rowid) FROM {quote_identifier(table)}").fetchone()[0] or 0
+    except sqlite3.Error:
+        return conn.execute(f"SELECT count(*) FROM {quote_identifier(table)}").fetchone()[0]
+
+def index_columns(refs, table: str, columns: list, aliases: dict, reads: set, inner: bool = True):
+    # equality columns first, then a single range column, else the ORDER BY columns. Join columns help a table
+    # scanned in an inner loop; for the outer table only its own filters count. An outer table without any
+    # still gets its join columns, as that index lets the planner turn the join around and search it inside
+    eq, ranged, order, joined = [], [], [], []
+    lookup = {column.lower(): column for column in columns}
+    for qualifier, name, role in refs:
+        if qualifier is not None and aliases.get(qualifier, qualifier) != table:
+            continue
+        column = lookup.get(name.lower())
+        if column is None or (qualifier is None and (table, column) not in reads):
+            continue
+        target = {"eq": eq, "join": eq if inner else joined, "range": ranged, "order": order}[role]
+        if column not in eq and column not in target:
+            target.append(column)
+    if not eq and not ranged:
+        eq = joined
+    picked = eq + (ranged[:1] if ranged else [column for column in order if column not in eq])
+    return tuple(picked[:MAX_INDEX_COLUMNS])
+
+def scanned_tables(plan):
+    # (table, inner) per full scan. A scan is an inner loop when an earlier loop of the same join drives it,
+    # or when it sits in a correlated subquery, which runs once per outer row
+    nodes, loops, scans = {}, {}, []
+    for node, parent, _, detail in plan:
+        nodes[node] = (parent, detail)
+        if not detail.startswith(("SCAN ", "SEARCH ")):
+            continue
+        inner = loops.get(parent, 0) > 0
+        ancestor = parent
+        while not inner and ancestor in nodes:
+            ancestor, ancestor_detail = nodes[ancestor]
+            inner = ancestor_detail.startswith("CORRELATED ")
+        loops[parent] = loops.get(parent, 0) + 1
+        table = full_scan(detail)
+        if table is not None:
+            scans.append((table, inner))
+    return scans
+
+def analyze(conn, workload, progress=None):
+    # workload is a list of (sql, weight); statements that fail to prepare, e.g. on tables
+    # a notebook creates itself, are skipped
+    tracker = StatementTracker()
+    reads = set()
+
+    def authorizer(action, arg1, arg2, db_name, trigger):
+        if action == sqlite3.SQLITE_READ:
+            reads.add((arg1, arg2))
+        return tracker(action, arg1, arg2, db_name, trigger)
+
+    proposals, rows_cache = {}, {}
+    conn.set_authorizer(authorizer)
+    try:
+        for count, (sql, weight) in enumerate(workload, 1):
+            reads.clear()
+            tracker.reset()
+            try:
+                plan = explain_plan(conn, sql)
+            except sqlite3.Error:
+                plan = []
+            scans = scanned_tables(plan)
+            if scans:
+                aliases, refs = referenced_columns(sql)
+                for scanned, inner in scans:
+                    table = aliases.get(scanned, scanned)
+                    columns = table_columns(conn, table)
+                    if not columns:
+                        continue  # a view, CTE or subquery
+                    picked = index_columns(refs, table, columns, aliases, reads, inner)
+                    if not picked:
+                        continue
+                    proposal = proposals.get((table, picked))
+                    if proposal is None:
+                        proposal = proposals[(table, picked)] = IndexProposal(table, picked)
+                    proposal.weight += weight
+                    if sql not in proposal.statements:
+                        proposal.statements.append(sql)
+            if progress is not None and progress(count) is False:
+                raise InterruptedError("Analysis cancelled.")
+    finally:
+        conn.set_authorizer(None)
+
+    result = []
+    for proposal in sorted(proposals.values(), key=lambda p: -len(p.columns)):
+        # an index on (a, b) also serves lookups on a alone
+        wider = next((p for p in result if p.table == proposal.table and p.columns[:len(proposal.columns)] == proposal.columns), None)
+        if wider is not None:
+            wider.weight += proposal.weight
+            wider.statements.extend(sql for sql in proposal.statements if sql not in wider.statements)
+            continue
+        if any(index[:len(proposal.columns)] == proposal.columns for index in existing_indexes(conn, proposal.table)):
+            continue
+        if proposal.table not in rows_cache:
+            rows_cache[proposal.table] = estimate_rows(conn, proposal.table)
+        proposal.rows = rows_cache[proposal.table]
+        result.append(proposal)
+    return sorted(result, key=lambda p: p.score, reverse=True)
+
+def measure(conn, sql: str, repeat: int = MEASURE_REPEAT):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        conn.execute(sql).fetchall()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+        if elapsed > 2:
+            break  # slow statements are measured once
+    return best
+
+def readonly_statements(conn, statements):
+    tracker = StatementTracker()
+    conn.set_authorizer(tracker)
+    try:
+        result = []
+        for sql in statements:
+            tracker.reset()
+            try:
+                conn.execute(f"EXPLAIN {sql}").fetchall()
+            except sqlite3.Error:
+                continue
+            if tracker.readonly:
+                result.append(sql)
+        return result
+    finally:
+        conn.set_authorizer(None)
+
+def test_proposals(conn, proposals, progress=None, on_scratch=None):
+    # each index is created, measured and dropped again on a scratch copy, so proposals are judged one by one.
+    # Those that measured no faster are moved after the rest, in place
+    fd, path = tempfile.mkstemp(prefix="advisor-", suffix=".db")
+    os.close(fd)
+    scratch = sqlite3.connect(path, check_same_thread=False)
+    try:
+        conn.backup(scratch)
+        if on_scratch is not None:
+            on_scratch(scratch)
+        for count, proposal in enumerate(proposals, 1):
+            try:
+                statements = readonly_statements(scratch, proposal.statements)
+                if statements:
+                    proposal.before = sum(measure(scratch, sql) for sql in statements)
+                    scratch.execute(proposal.sql)
+                    proposal.after = sum(measure(scratch, sql) for sql in statements)
+                    scratch.execute(f"DROP INDEX {quote_identifier(proposal.name)}")
+            except sqlite3.Error as e:
+                proposal.error = str(e)
+            if progress is not None and progress(count) is False:
+                raise InterruptedError("Analysis cancelled.")
+    finally:
+        scratch.close()
+        os.remove(path)
+    proposals.sort(key=lambda p: p.improves is False)
+    return proposals
+
+def format_report(proposals, statements: int):
+    if not proposals:
+        return f"-- index advisor: {statements} statements analyzed, no missing indexes found\n"
+    rejected = [proposal for proposal in proposals if proposal.improves is False]
+    proposals = [proposal for proposal in proposals if proposal.improves is not False]
+    lines = [f"-- index advisor: {statements} statements analyzed, {len(proposals)} proposals ranked by estimated benefit"]
+    for rank, proposal in enumerate(proposals, 1):
+        detail = f"~{proposal.rows:,} rows scanned x {proposal.weight} run{'s' if proposal.weight != 1 else ''}"
+        if proposal.error is not None:
+            detail += f", test failed: {proposal.error}"
+        elif proposal.before is not None:
+            speedup = f"{proposal.before / proposal.after:,.1f}x" if proposal.after else "-"
+            detail += f", measured {proposal.before * 1000:.2f} ms -> {proposal.after * 1000:.2f} ms ({speedup})"
+        lines.append(f"-- {rank}. {detail}; used by {len(proposal.statements)} statement{'s' if len(proposal.statements) != 1 else ''}")
+        lines.append(proposal.sql)
+    if rejected:
+        # kept as comments, so running the report doesn't create them
+        lines.append(f"-- not recommended, measured less than {MIN_SPEEDUP:g}x faster on the test copy:")
+        for proposal in rejected:
+            lines.append(f"-- {proposal.sql}  -- {proposal.before * 1000:.2f} ms -> {proposal.after * 1000:.2f} ms ({proposal.before / proposal.after:,.1f}x)")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,172 @@
+"""Module benchmarking the query engine and the rendering hot paths.
+
+Usage: python benchmark.py [--rows N] [--output report.json] [--compare old.json]
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from tabulate import tabulate
+from pysqlite import __version__, ResultPager, format_row, run_sql_query, TABULATE_FORMATS
+from sqlsplit import iter_statements, split_statements
+from render import NATIVE_FORMATS, render_native
+
+DEFAULT_ROWS = 10000
+DEFAULT_REPEAT = 5
+RENDER_ROWS = 1000
+REGRESSION_THRESHOLD = 1.10
+
+
+def make_database(path: str, rows: int, seed: int = 0):
+    # one wide table with every storage class, a tenth of the values BLOBs, so format_row has work to do
+    rng = random.Random(seed)
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE bench (id INTEGER PRIMARY KEY, name TEXT, score REAL, qty INTEGER, payload BLOB, note TEXT)")
+        conn.executemany("INSERT INTO bench VALUES (?, ?, ?, ?, ?, ?)", ((i, f"name {rng.randrange(rows)}", rng.random() * 1000, rng.randrange(100), rng.randbytes(16) if i % 10 == 0 else None, "x" * rng.randrange(40)) for i in range(rows)))
+        conn.execute("CREATE INDEX bench_qty ON bench (qty)")
+    conn.close()
+
+def make_script(statements: int):
+    # a notebook mixing comments, string literals with semicolons and multi-line statements
+    parts = []
+    for i in range(statements):
+        parts.append(f"-- statement {i}; not a separator\nSELECT id, name, 'a;b' AS s FROM bench\n WHERE qty = {i % 100} /* ; */ LIMIT 5;\n")
+    return "".join(parts)
+
+def measure(fn, repeat: int = DEFAULT_REPEAT):
+    # one untimed warm-up call, then `repeat` timed calls; seconds
+    fn()
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - started)
+    return {"min": min(times), "median": statistics.median(times), "mean": statistics.fmean(times), "runs": repeat}
+
+def bench_engine(database: str, rows: int, repeat: int):
+    results = {}
+    script = make_script(max(rows // 10, 100))
+    results["split/split_statements"] = measure(lambda: split_statements(script), repeat)
+    results["split/iter_statements"] = measure(lambda: sum(1 for _ in iter_statements(script)), repeat)
+
+    conn = sqlite3.connect(database)
+    results["execute/fetchall"] = measure(lambda: conn.execute("SELECT * FROM bench").fetchall(), repeat)
+    results["execute/aggregate"] = measure(lambda: conn.execute("SELECT qty, count(*), avg(score) FROM bench GROUP BY qty").fetchall(), repeat)
+    results["execute/index_lookups"] = measure(lambda: [conn.execute("SELECT count(*) FROM bench WHERE qty = ?", (i,)).fetchone() for i in range(100)], repeat)
+
+    data = conn.execute("SELECT * FROM bench").fetchall()
+    results["format_row"] = measure(lambda: [format_row(row) for row in data], repeat)
+
+    def page():
+        pager = ResultPager(conn.execute("SELECT * FROM bench"), "simple_outline", RENDER_ROWS)
+        pager.next_page()
+        pager.close()
+    results["pager/first_page"] = measure(page, repeat)
+
+    header = [desc[0] for desc in conn.execute("SELECT * FROM bench LIMIT 0").description]
+    sample = [format_row(row) for row in data[:RENDER_ROWS]]
+    for fmt in TABULATE_FORMATS:
+        results[f"render/{fmt}"] = measure(lambda fmt=fmt: tabulate(sample, header, tablefmt=fmt), repeat)
+    for fmt in NATIVE_FORMATS:
+        results[f"render/native/{fmt}"] = measure(lambda fmt=fmt: render_native(sample, header, fmt), repeat)
+    conn.close()
+
+    query = f"SELECT * FROM bench LIMIT {RENDER_ROWS};\nSELECT qty, count(*) FROM bench GROUP BY qty;\nSELECT count(*) FROM bench WHERE name LIKE '%1%';"
+    results["run_sql_query"] = measure(lambda: run_sql_query(query, database, "simple_outline"), repeat)
+    results["run_sql_query/native"] = measure(lambda: run_sql_query(query, database, "simple_outline", native=True), repeat)
+    return results
+
+def bench_output_box(database: str, repeat: int):
+    # inserts a rendered result the way the main window does: in OUTPUT_CHUNK pieces at the end of the box
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PySide6.QtWidgets import QApplication
+    from PySide6.QtGui import QTextCursor
+    from gui import HScrollTextEdit, OUTPUT_CHUNK
+
+    app = QApplication.instance() or QApplication([])
+    text = run_sql_query(f"SELECT * FROM bench LIMIT {RENDER_ROWS * 5}", database, "simple_outline")
+    box = HScrollTextEdit()
+    box.resize(900, 600)
+    box.show()
+
+    def insert():
+        box.clear()
+        for start in range(0, len(text), OUTPUT_CHUNK):
+            box.moveCursor(QTextCursor.MoveOperation.End)
+            box.insertPlainText(text[start:start + OUTPUT_CHUNK])
+            app.processEvents()
+    result = {"output_box/insert": measure(insert, repeat)}
+    box.close()
+    return result
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+def run(rows: int = DEFAULT_ROWS, repeat: int = DEFAULT_REPEAT, gui: bool = True):
+    with tempfile.TemporaryDirectory(prefix="pysqlite-bench-") as directory:
+        database = os.path.join(directory, "bench.db")
+        make_database(database, rows)
+        results = bench_engine(database, rows, repeat)
+        if gui:
+            try:
+                results.update(bench_output_box(database, repeat))
+            except ImportError as e:
+                print(f"skipping the output box benchmark: {e}", file=sys.stderr)
+    return {"version": __version__, "commit": git_commit(), "created": time.strftime("%Y-%m-%dT%H:%M:%S"), "python": platform.python_version(), "sqlite": sqlite3.sqlite_version, "platform": platform.platform(), "rows": rows, "repeat": repeat, "results": results}
+
+def compare(old: dict, new: dict, threshold: float = REGRESSION_THRESHOLD):
+    # compares medians; returns the report lines and the names that got slower than threshold allows
+    lines = [f"{'benchmark':<28} {'old ms':>10} {'new ms':>10} {'ratio':>7}"]
+    regressions = []
+    for name, result in new["results"].items():
+        before = old["results"].get(name)
+        if before is None:
+            lines.append(f"{name:<28} {'-':>10} {result['median'] * 1000:>10.3f} {'new':>7}")
+            continue
+        ratio = result["median"] / before["median"] if before["median"] else float("inf")
+        flag = ""
+        if ratio > threshold:
+            regressions.append(name)
+            flag = "  slower"
+        lines.append(f"{name:<28} {before['median'] * 1000:>10.3f} {result['median'] * 1000:>10.3f} {ratio:>6.2f}x{flag}")
+    if old.get("rows") != new.get("rows"):
+        lines.append(f"-- note: the reports were made with different row counts ({old.get('rows')} vs {new.get('rows')})")
+    return lines, regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark statement splitting, execution, rendering and output insertion.")
+    parser.add_argument("--rows", type=int, default=DEFAULT_ROWS, help=f"rows in the synthetic database (default: {DEFAULT_ROWS})")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help=f"timed runs per benchmark (default: {DEFAULT_REPEAT})")
+    parser.add_argument("--output", metavar="FILE", help="write the JSON report to FILE instead of stdout")
+    parser.add_argument("--compare", metavar="FILE", help="compare against an earlier report; exits with 1 if a benchmark got slower")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD, help=f"median ratio that counts as a regression (default: {REGRESSION_THRESHOLD})")
+    parser.add_argument("--no-gui", action="store_true", help="skip the output box benchmark, which needs PySide6")
+    args = parser.parse_args(argv)
+
+    report = run(args.rows, args.repeat, not args.no_gui)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=4)
+    elif not args.compare:
+        json.dump(report, sys.stdout, indent=4)
+        print()
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            lines, regressions = compare(json.load(f), report, args.threshold)
+        print("\n".join(lines))
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
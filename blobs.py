@@ -0,0 +1,414 @@
+"""Module fetching BLOB columns lazily and reading them through incremental I/O."""
+import json
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+from collections import OrderedDict
+
+PREVIEW_BYTES = 16
+# BLOBs up to this size sit on the table's own pages; their preview is cheaper to take with substr()
+INLINE_BYTES = 2048
+BLOB_CHUNK = 64 * 1024
+PLAN_LIMIT = 256
+CONNECTION_LIMIT = 16
+# a result value starting with MAGIC is a stub made by _blob_stub: MAGIC, JSON metadata, NUL, the first bytes
+MAGIC = b"\x00pysqlite-blob\x00"
+SIGNATURES = ((b"\x89PNG\r\n\x1a\n", "PNG"), (b"\xff\xd8\xff", "JPEG"), (b"GIF87a", "GIF"), (b"GIF89a", "GIF"), (b"%PDF-", "PDF"), (b"PK\x03\x04", "ZIP"), (b"\x1f\x8b", "GZIP"), (b"BZh", "BZIP2"), (b"\xfd7zXZ\x00", "XZ"), (b"\x28\xb5\x2f\xfd", "ZSTD"), (b"7z\xbc\xaf\x27\x1c", "7Z"), (b"SQLite format 3\x00", "SQLite"), (b"BM", "BMP"), (b"II*\x00", "TIFF"), (b"MM\x00*", "TIFF"), (b"OggS", "OGG"), (b"fLaC", "FLAC"), (b"ID3", "MP3"), (b"\x00asm", "WASM"), (b"\x7fELF", "ELF"), (b"PAR1", "Parquet"))
+# signatures by their first byte, so sniffing a preview costs a dict lookup rather than a scan of the list
+_SIGNATURES_BY_BYTE = {}
+for _signature, _kind in SIGNATURES:
+    _SIGNATURES_BY_BYTE.setdefault(_signature[0], []).append((_signature, _kind))
+_SELECT = re.compile(r"SELECT\b(?!\s+(?:DISTINCT|ALL)\b)", re.I)
+_LAZY_START = re.compile(r"(?:SELECT|WITH|VALUES)\b", re.I)
+# ordinals in ORDER BY / GROUP BY would shift when the rowid column is added in front
+_ORDINAL = re.compile(r"\bBY\s+\d", re.I)
+_COMPOUND = re.compile(r"\b(?:UNION|INTERSECT|EXCEPT)\b", re.I)
+_ROWID_NAMES = ("rowid", "_rowid_", "oid")
+_SOURCE = re.compile(r"(?:([^.#\s]+)\.)?([^.#\s]+)\.([^.#\s]+)#(-?\d+)")
+_WHITESPACE = {ord("\t"): " ", ord("\r"): " ", ord("\n"): " "}
+# VDBE opcodes whose P2 is a jump target; Jump jumps to P1, P2 or P3
+_JUMPS = frozenset(("Goto", "Gosub", "InitCoroutine", "Yield", "HaltIfNull", "Once", "If", "IfNot", "IsNull", "IsType", "NotNull", "IfNullRow", "SeekLT", "SeekLE", "SeekGE", "SeekGT", "SeekScan", "IfNotOpen", "IfNoHope", "NoConflict", "NotFound", "Found", "SeekRowid", "NotExists", "Last", "IfSmaller", "SorterSort", "Sort", "Rewind", "SorterNext", "Prev", "Next", "IdxLE", "IdxGT", "IdxLT", "IdxGE", "RowSetRead", "RowSetTest", "Program", "FkIfZero", "IfPos", "IfNotZero", "DecrJumpZero", "IncrVacuum", "VFilter", "VNext", "Filter", "Init", "Eq", "Ne", "Lt", "Le", "Gt", "Ge", "ElseEq", "MustBeInt", "SequenceTest", "IfEmpty", "SorterCompare", "Jump"))
+# opcodes by the operand naming the register they store into; the other known ones store into none
+_WRITES_P1 = frozenset(("Gosub", "InitCoroutine", "Yield", "IfPos", "IfNotZero", "DecrJumpZero", "MustBeInt", "Cast", "AddImm", "AggFinal", "SoftNull", "CollSeq"))
+_WRITES_P2 = frozenset(("Rowid", "IdxRowid", "SCopy", "IntCopy", "Integer", "Int64", "Real", "String8", "String", "Blob", "Variable", "SorterData", "RowData", "Sequence", "NewRowid", "Not", "BitNot", "IsTrue", "ZeroOrNull", "BeginSubrtn", "Count", "ReadCookie", "OffsetLimit"))
+_WRITES_P3 = frozenset(("Column", "VColumn", "Function", "PureFunc", "MakeRecord", "Offset", "Add", "Subtract", "Multiply", "Divide", "Remainder", "Concat", "BitAnd", "BitOr", "ShiftLeft", "ShiftRight", "And", "Or", "AggStep", "AggValue"))
+_INERT = _JUMPS | {"Halt", "Transaction", "TableLock", "OpenRead", "OpenWrite", "OpenEphemeral", "OpenAutoindex", "OpenPseudo", "OpenDup", "ReopenIdx", "SorterOpen", "Close", "NullRow", "Noop", "Explain", "Trace", "Return", "EndCoroutine", "ResultRow", "IdxInsert", "SorterInsert", "Delete", "ResetSorter", "DeferredSeek", "FinishSeek", "RealAffinity", "Affinity", "ColumnsUsed", "CursorHint", "Compare", "Permutation"}
+_plans = OrderedDict()
+_plans_lock = threading.Lock()
+
+
+class BlobRef:
+    # where a BLOB value lives; table is None when the value isn't a stored column, e.g. an expression
+    __slots__ = ("size", "head", "schema", "table", "column", "rowid")
+
+    def __init__(self, size: int, head: bytes, schema: str = None, table: str = None, column: str = None, rowid: int = None):
+        self.size = size
+        self.head = head
+        self.schema = schema
+        self.table = table
+        self.column = column
+        self.rowid = rowid
+
+    @property
+    def source(self):
+        if self.table is None:
+            return None
+        table = self.table if self.schema in (None, "main") else f"{self.schema}.{self.table}"
+        return f"{table}.{self.column}#{self.rowid}"
+
+    def __repr__(self):
+        return f"BlobRef({self.size}, {self.head!r}, {self.source!r})"
+
+
+def sniff(head: bytes):
+    if not head:
+        return None
+    for signature, kind in _SIGNATURES_BY_BYTE.get(head[0], ()):
+        if head.startswith(signature):
+            return kind
+    if head[:4] == b"RIFF" and head[8:12] in (b"WEBP", b"WAVE", b"AVI "):
+        return head[8:12].decode().strip()
+    if head[4:8] == b"ftyp":
+        return "MP4"
+    # the preview may end in the middle of a character
+    text = head.decode("utf-8", "replace").rstrip("\ufffd") if len(head) >= PREVIEW_BYTES else head.decode("utf-8", "replace")
+    if "\ufffd" in text:
+        return None
+    if text and (text.isprintable() or text.translate(_WHITESPACE).isprintable()):
+        stripped = text.lstrip()
+        if stripped[:1] in "{[":
+            return "JSON"
+        if stripped[:1] == "<":
+            return "XML"
+        return "text"
+    return None
+
+def format_size(size: int):
+    for unit in ("B", "kB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+
+def describe(ref: BlobRef, preview: int = 8):
+    # e.g. <BLOB 4.8 MB PNG 89504e470d0a1a0a... img.data#7>; ASCII only, a wide character would send
+    # tabulate down its slow path for the whole table. The source is what Open BLOB... takes
+    parts = ["BLOB", format_size(ref.size)]
+    kind = sniff(ref.head)
+    if kind is not None:
+        parts.append(kind)
+    if ref.size:
+        parts.append(ref.head[:preview].hex() + ("..." if ref.size > preview else ""))
+    if ref.table is not None:
+        parts.append(ref.source)
+    return f"<{' '.join(parts)}>"
+
+def parse_source(text: str):
+    # "[schema.]table.column#rowid" as shown by describe; the size is read when the blob is opened
+    match = _SOURCE.fullmatch(text.strip().strip("<>").split()[-1] if text.strip() else "")
+    if match is None:
+        raise ValueError("Expected table.column#rowid, e.g. img.data#7.")
+    schema, table, column, rowid = match.groups()
+    return BlobRef(None, b"", schema or "main", table, column, int(rowid))
+
+def blob_ref(value):
+    # a BlobRef for a stub or a plain bytes value fetched the eager way; None for anything else
+    if not isinstance(value, (bytes, bytearray)):
+        return None
+    if value.startswith(MAGIC):
+        end = value.index(b"\x00", len(MAGIC))
+        size, schema, table, column, rowid = json.loads(value[len(MAGIC):end])
+        return BlobRef(size, bytes(value[end + 1:]), schema, table, column, rowid)
+    return BlobRef(len(value), bytes(value[:PREVIEW_BYTES]))
+
+def display_value(value):
+    ref = blob_ref(value)
+    return value if ref is None else describe(ref)
+
+def open_blob(conn: sqlite3.Connection, ref: BlobRef):
+    # raises ValueError when the row was changed since the value was fetched; a ref from parse_source
+    # gets its size and preview here
+    if ref.table is None:
+        raise ValueError("The BLOB is not a stored column value and can't be opened.")
+    blob = conn.blobopen(ref.table, ref.column, ref.rowid, readonly=True, name=ref.schema or "main")
+    if ref.size is None:
+        ref.size, ref.head = len(blob), blob.read(PREVIEW_BYTES)
+        blob.seek(0)
+    elif len(blob) != ref.size:
+        blob.close()
+        raise ValueError(f"{ref.source} changed since it was fetched.")
+    return blob
+
+def read_at(conn: sqlite3.Connection, ref: BlobRef, offset: int, size: int):
+    # the blob handle is closed right away so an open viewer never holds a read lock
+    with open_blob(conn, ref) as blob:
+        blob.seek(offset)
+        return blob.read(size)
+
+def save_blob(conn: sqlite3.Connection, ref: BlobRef, path: str, progress=None, chunk: int = BLOB_CHUNK):
+    # streams the blob into a temporary file next to path; progress(bytes written) returns False to cancel
+    fd, tmp_path = tempfile.mkstemp(prefix=".blob-", dir=os.path.dirname(os.path.abspath(path)))
+    try:
+        with os.fdopen(fd, "wb") as f, open_blob(conn, ref) as blob:
+            written = 0
+            while True:
+                data = blob.read(chunk)
+                if not data:
+                    break
+                f.write(data)
+                written += len(data)
+                if progress is not None and not progress(written):
+                    raise InterruptedError("Save cancelled.")
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    return written
+
+
+def _read_head(conn, schema, table, column, rowid, size):
+    # called from inside the query; the value is only used when it is still the row's blob
+    try:
+        with conn.blobopen(table, column, rowid, readonly=True, name=schema) as blob:
+            return blob.read(PREVIEW_BYTES) if len(blob) == size else None
+    except sqlite3.Error:
+        return None
+
+def _stub(size, head, schema, table, column, rowid):
+    if head is None or size is None:
+        return None
+    return MAGIC + json.dumps([size, schema, table, column, rowid]).encode() + b"\x00" + head
+
+def _quote(name: str):
+    return '"' + name.replace('"', '""') + '"'
+
+
+class _Plans:
+    # per connection: the UDFs and the rewritten statements; a probe reused from the statement cache isn't
+    # prepared again, so the authorizer stays silent and the rewrite from its first preparation is used
+    def __init__(self, conn):
+        self.conn = conn
+        self.rewrites = OrderedDict()
+        self.reads = set()
+        conn.create_function("_blob_head", 5, lambda *args: _read_head(conn, *args))
+        conn.create_function("_blob_stub", 6, _stub, deterministic=True)
+
+    def authorize(self, action, arg1, arg2, db_name, trigger):
+        if action == sqlite3.SQLITE_READ and trigger is None and arg2:
+            self.reads.add((db_name, arg1, arg2))
+        return sqlite3.SQLITE_OK
+
+    def rewrite(self, sql: str, authorizer):
+        # the probe and the checks run under our own authorizer, so the caller's never sees them
+        self.reads.clear()
+        self.conn.set_authorizer(self.authorize)
+        try:
+            try:
+                cursor = self.conn.execute(f"SELECT * FROM (\n{sql}\n) LIMIT 0")
+            except sqlite3.Error:
+                return None
+            names = [desc[0] for desc in cursor.description]
+            cursor.close()
+            if not self.reads and sql in self.rewrites:
+                self.rewrites.move_to_end(sql)
+                return self.rewrites[sql]
+            rewritten = self.build(sql, names, set(self.reads))
+        finally:
+            self.conn.set_authorizer(authorizer)
+        self.rewrites[sql] = rewritten
+        while len(self.rewrites) > PLAN_LIMIT:
+            self.rewrites.popitem(last=False)
+        return rewritten
+
+    def rowid_name(self, sql: str, reads):
+        # a name for the rowid when the rows come from one table, so each BLOB can be traced back to its row
+        tables = {(schema, table) for schema, table, _ in reads}
+        if len(tables) != 1 or not _SELECT.match(sql) or _ORDINAL.search(sql) or _COMPOUND.search(sql):
+            return None
+        schema, table = next(iter(tables))
+        try:
+            existing = {row[0].lower() for row in self.conn.execute("SELECT name FROM pragma_table_xinfo(?, ?)", (table, schema))}
+        except sqlite3.Error:
+            return None
+        return next((name for name in _ROWID_NAMES if name not in existing), None)
+
+    def explain(self, sql: str):
+        # for each ResultRow what each value is read from: (cursor, schema, table, column, declared type) with
+        # column and type None for the rowid, or None when it isn't read straight from a table or an index;
+        # None when the statement can't be prepared
+        try:
+            program = self.conn.execute(f"EXPLAIN {sql}").fetchall()
+            schemas = {seq: name for seq, name, _ in self.conn.execute("PRAGMA database_list")}
+            tables = {}
+            for cursor, (database, root, keyed) in _cursors(program).items():
+                if database not in schemas:
+                    continue
+                schema = schemas[database]
+                # a cursor with a KeyInfo reads an index; a WITHOUT ROWID table has one too and is left out
+                row = self.conn.execute(f"SELECT name, tbl_name FROM {_quote(schema)}.sqlite_master WHERE type = ? AND rootpage = ?", ("index" if keyed else "table", root)).fetchone()
+                if row is None:
+                    continue
+                # virtual generated columns aren't stored, so they don't count in the record
+                declared = {name: (name, type) for name, type, hidden in self.conn.execute("SELECT name, type, hidden FROM pragma_table_xinfo(?, ?)", (row[1], schema)) if hidden != 2}
+                if keyed:
+                    # an index record holds its columns, the rowid (cid -1) and no value for an expression (cid -2)
+                    columns = [declared.get(name) if cid >= 0 else (None, None) if cid == -1 else None for cid, name in self.conn.execute("SELECT cid, name FROM pragma_index_xinfo(?, ?) ORDER BY seqno", (row[0], schema))]
+                else:
+                    columns = list(declared.values())
+                tables[cursor] = schema, row[1], columns
+        except sqlite3.Error:
+            return None
+        results = []
+        for reads in _result_reads(program):
+            values = []
+            for read in reads:
+                if read is None or read[0] not in tables:
+                    values.append(None)
+                    continue
+                cursor, column = read
+                schema, table, columns = tables[cursor]
+                entry = (None, None) if column is None else columns[column] if column < len(columns) else None
+                values.append(None if entry is None else (cursor, schema, table) + entry)
+            results.append(values)
+        return results
+
+    def build(self, sql: str, names, reads):
+        # a subquery renames duplicate columns to name:1, name:2...
+        seen = set()
+        for i, name in enumerate(names):
+            base, sep, suffix = name.rpartition(":")
+            if sep and suffix.isdigit() and base in seen:
+                names[i] = base
+            seen.add(names[i])
+        results = self.explain(sql)
+        # only rowids and stored columns without BLOB affinity: there are no BLOBs to expect, it runs as it is
+        if results and all(value is not None and (value[3] is None or not _blob_affinity(value[4])) for values in results for value in values):
+            return None
+        rowid = self.rowid_name(sql, reads)
+        if rowid is not None:
+            rewritten = _SELECT.sub(f"SELECT {rowid}, ", sql, count=1)
+            results = self.explain(rewritten)
+            if results is not None and len(results) == 1 and results[0] and results[0][0] is not None and results[0][0][3] is None:
+                # a value is the row's stored column only when Column reads it from the cursor the rowid comes
+                # from; a matching name and length prove nothing, an expression can be aliased to a column name
+                (cursor, schema, table, _, _), values = results[0][0], results[0][1:]
+                stored = {i: value[3] for i, value in enumerate(values) if value is not None and value[0] == cursor and value[3] is not None}
+                if stored:
+                    return _wrap(rewritten, names, (schema, table, stored))
+        return _wrap(sql, names, None)
+
+
+def _written(op, p1, p2, p3):
+    # the registers an instruction stores into, or None for an opcode that isn't known
+    if op == "Copy":
+        return range(p2, p2 + p3 + 1)
+    if op == "Move":
+        return range(p2, p2 + p3)
+    if op == "Null":
+        return range(p2, max(p2, p3) + 1)
+    if op in _WRITES_P1:
+        return (p1,)
+    if op in _WRITES_P2:
+        return (p2,)
+    if op in _WRITES_P3:
+        return (p3,)
+    return () if op in _INERT else None
+
+def _origin(program, targets, register, end):
+    # the address of the instruction that stored the value register holds at end, followed back through
+    # copies; None when another path could reach end on the way or an instruction on it isn't known
+    for addr in range(end - 1, -1, -1):
+        if addr + 1 in targets:
+            return None
+        _, op, p1, p2, p3 = program[addr][:5]
+        written = _written(op, p1, p2, p3)
+        if written is None:
+            return None
+        if register in written:
+            if op in ("Copy", "SCopy", "IntCopy", "Move"):
+                return _origin(program, targets, p1 + register - p2, addr)
+            return addr
+    return None
+
+def _read(program, targets, register, end):
+    # (cursor, record column) the value comes from, column None for the rowid; rows of a sorter or an
+    # ephemeral table are followed back to the one record inserted into it
+    addr = _origin(program, targets, register, end)
+    if addr is None:
+        return None
+    _, op, p1, p2, p3 = program[addr][:5]
+    if op in ("Rowid", "IdxRowid"):
+        # an index cursor's rowid is that of the table row a DeferredSeek moves the table cursor to
+        return next((row[4] for row in program if row[1] == "DeferredSeek" and row[2] == p1), p1), None
+    if op != "Column":
+        return None
+    # a pseudo cursor reads the rows of a sorter
+    cursor = next((row[2] for row in program if row[1] == "SorterData" and row[4] == p1), p1)
+    if not any(row[1] in ("SorterOpen", "OpenEphemeral") and row[2] == cursor for row in program):
+        return p1, p2
+    inserts = [row for row in program if row[1] in ("SorterInsert", "IdxInsert") and row[2] == cursor]
+    if len(inserts) != 1:
+        return None
+    record = _origin(program, targets, inserts[0][3], inserts[0][0])
+    if record is None or program[record][1] != "MakeRecord" or p2 >= program[record][3]:
+        return None
+    return _read(program, targets, program[record][2] + p2, record)
+
+def _result_reads(program):
+    # for each ResultRow what each of its values is read from, see _read, or None for a computed value
+    targets = set()
+    for _, op, p1, p2, p3 in (row[:5] for row in program):
+        if op == "Jump":
+            targets.update((p1, p2, p3))
+        elif op in _JUMPS:
+            targets.add(p2)
+    return [[_read(program, targets, register, addr) for register in range(p1, p1 + p2)] for addr, op, p1, p2 in (row[:4] for row in program) if op == "ResultRow"]
+
+def _cursors(program):
+    # (database index, root page, has a KeyInfo) of each cursor opened on a b-tree of the database file
+    return {p1: (p3, p2, str(p4).startswith("k(")) for _, op, p1, p2, p3, p4 in (row[:6] for row in program) if op in ("OpenRead", "OpenWrite")}
+
+def _blob_affinity(declared: str):
+    # SQLite's column affinity rules: no type, or BLOB without INT, CHAR, CLOB or TEXT
+    declared = (declared or "").upper()
+    return not any(key in declared for key in ("INT", "CHAR", "CLOB", "TEXT")) and ("BLOB" in declared or not declared.strip())
+
+def _wrap(sql: str, names, source):
+    # the values pass through a CTE; typeof() and length() don't load a BLOB's content, and with a source
+    # the preview is read through incremental I/O, so only the first bytes of each BLOB are ever loaded;
+    # source is (schema, table, stored column name by result index)
+    columns = [f"c{i}" for i in range(len(names))]
+    outer = []
+    for i, (column, name) in enumerate(zip(columns, names)):
+        head = f"substr({column}, 1, {PREVIEW_BYTES})"
+        args = "NULL, NULL, NULL, NULL"
+        if source is not None and i in source[2]:
+            schema, table, stored = source
+            args = f"{_literal(schema)}, {_literal(table)}, {_literal(stored[i])}, _lazy_rowid"
+            head = f"CASE WHEN length({column}) > {INLINE_BYTES} THEN coalesce(_blob_head({args}, length({column})), {head}) ELSE {head} END"
+        outer.append(f"CASE WHEN typeof({column}) = 'blob' THEN _blob_stub(length({column}), {head}, {args}) ELSE {column} END AS {_quote(name)}")
+    if source is not None:
+        columns.insert(0, "_lazy_rowid")
+    return f"WITH _lazy({', '.join(columns)}) AS (\n{sql}\n)\nSELECT {', '.join(outer)} FROM _lazy"
+
+def _literal(value: str):
+    return "'" + value.replace("'", "''") + "'"
+
+def lazy_sql(conn: sqlite3.Connection, sql: str, authorizer=None):
+    # the statement rewritten so BLOB values come back as stubs instead of their content, or None when it
+    # can't be rewritten and should run as it is; authorizer is the one to reinstall after probing
+    if not _LAZY_START.match(sql):
+        return None
+    with _plans_lock:
+        # reader threads rewrite on their own connections at the same time
+        entry = _plans.get(id(conn))
+        if entry is None or entry.conn is not conn:
+            entry = _plans[id(conn)] = _Plans(conn)
+            while len(_plans) > CONNECTION_LIMIT:
+                _plans.popitem(last=False)
+        _plans.move_to_end(id(conn))
+    return entry.rewrite(sql, authorizer)
@@ -0,0 +1,221 @@
+"""Module reading database schemas, attached ones included, lazily for the schema browser and completion."""
+import sqlite3
+from bisect import bisect_left, insort
+from collections import Counter
+from connections import connect_readonly
+from transfer import quote_identifier
+from sqlsplit import KEYWORDS, FUNCTIONS
+
+OBJECT_KINDS = ("table", "view", "index", "trigger")
+COMPLETION_LIMIT = 50
+
+
+class PrefixIndex:
+    # case-insensitive sorted word list; a lookup is one bisect plus a walk over the matches
+    def __init__(self, words=()):
+        self._counts = Counter(words)
+        self._keys = sorted((word.lower(), word) for word in self._counts)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def add(self, words):
+        for word in words:
+            self._counts[word] += 1
+            if self._counts[word] == 1:
+                insort(self._keys, (word.lower(), word))
+
+    def discard(self, words):
+        # words are reference counted, so a column name shared by several tables stays until the last one goes
+        for word in words:
+            if self._counts[word] > 1:
+                self._counts[word] -= 1
+            elif word in self._counts:
+                del self._counts[word]
+                key = (word.lower(), word)
+                index = bisect_left(self._keys, key)
+                if index < len(self._keys) and self._keys[index] == key:
+                    del self._keys[index]
+
+    def complete(self, prefix: str, limit: int = COMPLETION_LIMIT):
+        prefix = prefix.lower()
+        index = bisect_left(self._keys, (prefix,))
+        matches = []
+        while index < len(self._keys) and len(matches) < limit and self._keys[index][0].startswith(prefix):
+            matches.append(self._keys[index][1])
+            index += 1
+        return matches
+
+
+class SchemaCatalog:
+    # owns a read-only connection; names are read up front, columns and row estimates on first use.
+    # When PRAGMA schema_version moves, only the tables whose CREATE statement changed are dropped.
+    # Objects of an attached database are listed as "alias.name"
+    def __init__(self, database: str, attachments: dict = None):
+        self.database = database
+        self.attachments = dict(attachments or {})
+        self.version = None
+        self.objects = {kind: [] for kind in OBJECT_KINDS}
+        self._conn = None
+        self._parts = {}
+        self._sql = {}
+        self._columns = {}
+        self._rows = {}
+        self._stats = None
+        self._names = None
+        self._words = {}
+
+    @property
+    def conn(self):
+        if self._conn is None:
+            self._conn = connect_readonly(self.database, self.attachments)
+        return self._conn
+
+    @property
+    def schemas(self):
+        return ["main"] + list(self.attachments)
+
+    def refresh(self):
+        version = tuple(self.conn.execute(f"PRAGMA {quote_identifier(schema)}.schema_version").fetchone()[0] for schema in self.schemas)
+        if version == self.version:
+            return False
+        objects, sqls, parts = {kind: [] for kind in OBJECT_KINDS}, {}, {}
+        for schema in self.schemas:
+            prefix = "" if schema == "main" else schema + "."
+            for kind, name, table, sql in self.conn.execute(f"SELECT type, name, tbl_name, sql FROM {quote_identifier(schema)}.sqlite_schema WHERE name NOT LIKE 'sqlite_%' ORDER BY name COLLATE NOCASE"):
+                if kind in objects:
+                    if prefix:
+                        parts[prefix + name] = (schema, name)
+                        name, table = prefix + name, prefix + table
+                    objects[kind].append((name, table))
+                    # a view's columns follow the tables it reads, so views are always re-read
+                    sqls[(kind, name)] = None if kind == "view" else sql
+        changed = [key for key, sql in sqls.items() if sql is None or self._sql.get(key) != sql]
+        removed = [key for key in self._sql if key not in sqls]
+        for kind, name in changed + removed:
+            self._columns.pop(name, None)
+            self._rows.pop(name, None)
+            if self._names is not None and (kind, name) in self._words:
+                self._names.discard(self._words.pop((kind, name)))
+        self.objects, self._sql, self._parts, self.version = objects, sqls, parts, version
+        self._stats = None
+        if self._names is not None:
+            for key in changed:
+                self._index(*key)
+        return True
+
+    def _index(self, kind, name):
+        # an attached object is completed by its own name, after the alias
+        words = [self._parts.get(name, (None, name))[1]]
+        if kind in ("table", "view"):
+            try:
+                words += [column[0] for column in self.columns(name)]
+            except sqlite3.Error:
+                pass  # e.g. a view over a dropped table
+        self._words[(kind, name)] = words
+        self._names.add(words)
+
+    def names(self):
+        # built on the first completion and then kept up to date incrementally by refresh()
+        if self._names is None:
+            self._names = PrefixIndex(self.attachments)
+            for kind, name in self._sql:
+                self._index(kind, name)
+        return self._names
+
+    def schema_objects(self, schema: str):
+        # the tables and views of one schema by their own names, for completion after "alias."
+        return [self._parts.get(name, (None, name))[1] for kind in ("table", "view") for name, _ in self.objects[kind] if self._parts.get(name, ("main",))[0] == schema]
+
+    def resolve(self, table: str):
+        # an unqualified name missing from main is looked up in the attached databases, as SQLite does
+        if table in self._parts or any(name == table for kind in ("table", "view") for name, _ in self.objects[kind]):
+            return table
+        for schema in self.attachments:
+            if schema + "." + table in self._parts:
+                return schema + "." + table
+        return table
+
+    def sql_name(self, name: str):
+        # the name as it is written in SQL, quoted where needed and qualified by its alias
+        schema, name = self._parts.get(name, (None, name))
+        name = name if name.isidentifier() else quote_identifier(name)
+        return name if schema is None else f"{schema}.{name}"
+
+    def column_names(self, table: str):
+        try:
+            return [column[0] for column in self.columns(table)]
+        except sqlite3.Error:
+            return []
+
+    def columns(self, table: str):
+        columns = self._columns.get(table)
+        if columns is None:
+            # table_xinfo also lists generated columns
+            schema, name = self._parts.get(table, ("main", table))
+            columns = self._columns[table] = [(name, kind, notnull, pk) for _, name, kind, notnull, _, pk, *_ in self.conn.execute(f"PRAGMA {quote_identifier(schema)}.table_xinfo({quote_identifier(name)})")]
+        return columns
+
+    def row_estimate(self, table: str):
+        # rows from sqlite_stat1 when ANALYZE has run, otherwise max(rowid) as an estimate; None if neither works
+        if table not in self._rows:
+            if self._stats is None:
+                self._stats = {}
+                for schema in self.schemas:
+                    prefix = "" if schema == "main" else schema + "."
+                    try:
+                        for tbl, stat in self.conn.execute(f"SELECT tbl, stat FROM {quote_identifier(schema)}.sqlite_stat1"):
+                            self._stats.setdefault(prefix + tbl, int(stat.split()[0]))
+                    except (sqlite3.Error, ValueError):
+                        pass
+            rows = self._stats.get(table)
+            if rows is None:
+                schema, name = self._parts.get(table, ("main", table))
+                try:
+                    rows = self.conn.execute(f"SELECT max(rowid) FROM {quote_identifier(schema)}.{quote_identifier(name)}").fetchone()[0] or 0
+                except sqlite3.Error:
+                    rows = None
+            self._rows[table] = rows
+        return self._rows[table]
+
+    def indexes(self, table: str):
+        return [name for name, tbl in self.objects["index"] if tbl == table]
+
+    def triggers(self, table: str):
+        return [name for name, tbl in self.objects["trigger"] if tbl == table]
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+        self.version = None
+        self._sql = {}
+        self._parts = {}
+        self._columns.clear()
+        self._names = None
+        self._words = {}
+
+
+SQL_WORDS = PrefixIndex(KEYWORDS + FUNCTIONS)
+
+def complete(catalog: SchemaCatalog, prefix: str, qualifier: str = None, limit: int = COMPLETION_LIMIT):
+    # after "name." only the columns of that table, after an attached database's alias its tables and views;
+    # a table alias falls back to every schema name
+    words = []
+    if catalog is not None:
+        try:
+            catalog.refresh()
+            if qualifier:
+                folded = prefix.lower()
+                schema = next((schema for schema in catalog.schemas if schema.lower() == qualifier.lower()), None)
+                if schema is not None:
+                    return [name for name in catalog.schema_objects(schema) if name.lower().startswith(folded)][:limit]
+                columns = [column for column in catalog.column_names(catalog.resolve(qualifier)) if column.lower().startswith(folded)]
+                if columns:
+                    return columns[:limit]
+            words = catalog.names().complete(prefix, limit)
+        except sqlite3.Error:
+            pass
+    if qualifier:
+        return words
+    return (SQL_WORDS.complete(prefix, limit) + words)[:limit]
@@ -0,0 +1,158 @@
+"""Module keeping warm SQLite connections per database path, with the databases attached to each."""
+import pathlib
+import re
+import sqlite3
+import threading
+import time
+
+DEFAULT_PRAGMAS = {"cache_size": -65536, "mmap_size": 268435456, "temp_store": "MEMORY", "journal_mode": None}
+_PRAGMA_VALUE = re.compile(r"-?\w+")
+_ALIAS = re.compile(r"[A-Za-z_]\w*")
+
+
+def apply_pragmas(conn: sqlite3.Connection, pragmas: dict):
+    for name, value in pragmas.items():
+        if value is None or value == "":
+            continue
+        if not name.isidentifier() or not _PRAGMA_VALUE.fullmatch(str(value)):
+            raise ValueError(f"Invalid pragma: {name} = {value}")
+        conn.execute(f"PRAGMA {name} = {value}").fetchall()
+
+def connect_readonly(database: str, attachments: dict = None, **kwargs):
+    if database == ":memory:" or not database:
+        raise ValueError("A read-only connection needs a database file.")
+    conn = sqlite3.connect(_readonly_uri(database), uri=True, autocommit=True, **kwargs)
+    if attachments:
+        try:
+            attach_databases(conn, attachments, readonly=True)
+        except Exception:
+            conn.close()
+            raise
+    return conn
+
+def attach_databases(conn: sqlite3.Connection, attachments: dict, readonly: bool = False):
+    # attachments maps alias -> path; a read-only connection attaches them read-only as well
+    for alias, path in attachments.items():
+        conn.execute("ATTACH DATABASE ? AS ?", (_readonly_uri(path) if readonly and path != ":memory:" else path, alias))
+
+def _readonly_uri(database: str):
+    return pathlib.Path(database).resolve().as_uri() + "?mode=ro"
+
+def parse_pragmas(text: str):
+    pragmas = {}
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        name, sep, value = line.partition("=")
+        name, value = name.strip(), value.strip()
+        if not sep or not name.isidentifier() or (value and not _PRAGMA_VALUE.fullmatch(value)):
+            raise ValueError(f"Invalid pragma line: {line.strip()}")
+        pragmas[name] = int(value) if value.lstrip("-").isdigit() else (value or None)
+    return pragmas
+
+def parse_attachments(text: str):
+    # one "alias = path" per line, in the order they are attached
+    attachments = {}
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        alias, sep, path = line.partition("=")
+        alias, path = alias.strip(), path.strip()
+        if not sep or not path or not _ALIAS.fullmatch(alias) or alias.lower() in ("main", "temp") or alias.lower() in map(str.lower, attachments):
+            raise ValueError(f"Invalid attachment line: {line.strip()}")
+        attachments[alias] = path
+    return attachments
+
+
+class _Entry:
+    def __init__(self, conn):
+        self.conn = conn
+        self.users = 0
+        self.last_used = time.monotonic()
+        self.retired = False
+
+
+class ConnectionPool:
+    def __init__(self, pragmas=None, idle_timeout=300, attachments=None):
+        self.pragmas = dict(DEFAULT_PRAGMAS, **(pragmas or {}))
+        self.idle_timeout = idle_timeout
+        # database -> {alias: path}, attached to every connection of that database
+        self.attachments = {database: dict(aliases) for database, aliases in (attachments or {}).items() if aliases}
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._leased = {}
+
+    def connect(self, database: str):
+        conn = sqlite3.connect(database, autocommit=True, check_same_thread=False, cached_statements=256)
+        try:
+            # attached first, so a journal_mode pragma applies to the attached databases too
+            attach_databases(conn, self.attachments.get(database, {}))
+            apply_pragmas(conn, self.pragmas)
+        except Exception:
+            conn.close()
+            raise
+        return conn
+
+    def acquire(self, database: str):
+        with self._lock:
+            entry = self._entries.get(database)
+            if entry is None:
+                entry = _Entry(self.connect(database))
+                self._entries[database] = entry
+                self._leased[id(entry.conn)] = entry
+            entry.users += 1
+            entry.last_used = time.monotonic()
+            return entry.conn
+
+    def release(self, conn: sqlite3.Connection):
+        with self._lock:
+            entry = self._leased.get(id(conn))
+            if entry is None:
+                return
+            entry.users -= 1
+            entry.last_used = time.monotonic()
+            if entry.retired and entry.users <= 0:
+                self._discard(entry)
+
+    def close(self, database: str):
+        # connections still leased to a worker or an open result are closed on their last release
+        with self._lock:
+            entry = self._entries.pop(database, None)
+            if entry is not None:
+                self._retire(entry)
+
+    def close_all(self):
+        with self._lock:
+            for entry in self._entries.values():
+                self._retire(entry)
+            self._entries.clear()
+
+    def prune(self):
+        now = time.monotonic()
+        with self._lock:
+            for database, entry in list(self._entries.items()):
+                if entry.users <= 0 and now - entry.last_used > self.idle_timeout:
+                    del self._entries[database]
+                    self._retire(entry)
+
+    def set_pragmas(self, pragmas: dict):
+        self.pragmas = dict(pragmas)
+        self.close_all()
+
+    def set_attachments(self, database: str, attachments: dict):
+        # the next acquire connects afresh; a connection still leased keeps its databases until released.
+        # The mapping is replaced rather than changed, like the pragmas, so the stored settings that share the old one see the difference
+        attached = {name: aliases for name, aliases in self.attachments.items() if name != database}
+        if attachments:
+            attached[database] = dict(attachments)
+        self.attachments = attached
+        self.close(database)
+
+    def _retire(self, entry):
+        entry.retired = True
+        if entry.users <= 0:
+            self._discard(entry)
+
+    def _discard(self, entry):
+        self._leased.pop(id(entry.conn), None)
+        entry.conn.close()
@@ -0,0 +1,1709 @@
+"""Module with the Qt windows of the app; imported only when the GUI starts."""
+from PySide6.QtWidgets import QApplication, QMainWindow, QMenu, QMenuBar, QWidget, QHBoxLayout, QVBoxLayout, QPushButton, QLabel, QLineEdit, QFileDialog, QMessageBox, QPlainTextEdit, QSplitter, QInputDialog, QTabWidget, QProgressDialog, QDialog, QDockWidget
+from PySide6.QtGui import QIcon, QFont, QAction, QTextCursor, QActionGroup, QDesktopServices
+from PySide6.QtCore import Qt, QThread, QTimer, QElapsedTimer, Signal, QUrl, QSortFilterProxyModel, QStandardPaths
+from pysqlite import iter_sql_query, iter_parallel_query, has_transaction_control, run_script, format_throughput, TABULATE_FORMATS
+from session import SessionStore, SESSION_FILE
+from sqlsplit import iter_statements, split_statements
+from querycache import ResultCache
+from connections import ConnectionPool, parse_attachments, parse_pragmas, connect_readonly
+from transfer import export_cursor, import_file
+from profiler import Profiler
+from parallel import ReaderPool
+from catalog import SchemaCatalog, complete
+from notebook import read_chunks, write_atomic, BACKGROUND_BYTES
+from widgets import CursorTableModel, ResultGrid, ImportDialog, MaintenanceDialog, ProfileModel, SchemaDock, SqlCompleter, SqlHighlighter, BlobInspector, GRID_BATCH
+from blobs import open_blob, parse_source, save_blob
+from maintenance import database_stats, format_report, run_task, TASKS, FILE_TASKS, WRITE_TASKS
+from theme import palette, MENU_QSS_DARK, MENU_QSS_LIGHT
+import os
+import sys
+import tempfile
+import threading
+from collections import deque, Counter
+import sqlite3
+import time
+
+OUTPUT_CHUNK = 64 * 1024
+SPILL_PREVIEW_LINES = 40
+# spilled results are kept across restarts; at start-up those older than this, and the oldest beyond the size limit, are removed
+SPILL_MAX_AGE = 7 * 24 * 3600
+SPILL_MAX_BYTES = 512 * 1024 * 1024
+NOTEPAD_AUTOSAVE_MS = 2000
+
+
+def session_path():
+    # e.g. ~/.config/KCoder-programming/sqlite-gui-pyside/session.db; the names are set in main()
+    return os.path.join(QStandardPaths.writableLocation(QStandardPaths.StandardLocation.AppConfigLocation), SESSION_FILE)
+
+def spill_path():
+    # e.g. ~/.cache/KCoder-programming/sqlite-gui-pyside/spills
+    return os.path.join(QStandardPaths.writableLocation(QStandardPaths.StandardLocation.CacheLocation), "spills")
+
+def prune_spills(directory, max_age=SPILL_MAX_AGE, max_bytes=SPILL_MAX_BYTES):
+    # returns the spill files kept, oldest first
+    try:
+        entries = sorted((entry.stat().st_mtime, entry.stat().st_size, entry.path) for entry in os.scandir(directory) if entry.is_file() and entry.name.endswith(".txt"))
+    except FileNotFoundError:
+        return []
+    now, total, kept = time.time(), sum(size for _, size, _ in entries), []
+    for mtime, size, path in entries:
+        if now - mtime > max_age or total > max_bytes:
+            try:
+                os.remove(path)
+                total -= size
+                continue
+            except OSError:
+                pass
+        kept.append(path)
+    return kept
+
+def current_statement(editor):
+    # the selection if there is one, otherwise the statement the text cursor is in
+    cursor = editor.textCursor()
+    if cursor.hasSelection():
+        statements = split_statements(cursor.selectedText().replace("\u2029", "\n"))
+        return statements[0] if statements else None
+    text = editor.toPlainText()
+    position = len(text.encode("utf-16-le")[:cursor.position() * 2].decode("utf-16-le", "ignore"))
+    found = None
+    for stmt in iter_statements(text):
+        if found is not None and stmt.start > position:
+            break
+        found = stmt
+    return found
+
+class HScrollTextEdit(QPlainTextEdit):
+    def wheelEvent(self, event):
+        dx_angle = event.angleDelta().x()
+        dy_angle = event.angleDelta().y()
+
+        scroll_bar = self.horizontalScrollBar()
+
+        if dx_angle != 0:  # Traditional horizontal scroll
+            scroll_bar.setValue(scroll_bar.value() - dx_angle)
+        elif event.modifiers() & Qt.KeyboardModifier.ShiftModifier:
+            scroll_bar.setValue(scroll_bar.value() - dy_angle)
+        else:
+            super().wheelEvent(event)
+
+class SqlWorker(QThread):
+    failed = Signal(str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.conn = None
+        self.cancelled = False
+
+    def cancel(self):
+        # interrupt() is safe to call from the GUI thread while the worker is inside sqlite
+        self.cancelled = True
+        conn = self.conn
+        if conn is not None:
+            try:
+                conn.interrupt()
+            except sqlite3.ProgrammingError:
+                pass
+
+class QueryWorker(SqlWorker):
+    statement_done = Signal(str)
+    result_ready = Signal(object, list)
+    profiled = Signal(object)
+    exit_requested = Signal()
+
+    def __init__(self, query_text, database, fmt, pool, page_size=0, pager=None, grid=False, cache=None, transaction=False, fast=False, profiler=None, explain=False, parallel=False, native=False, parent=None):
+        super().__init__(parent)
+        self.native = native
+        self.profiler = profiler
+        self.parallel = parallel and not (transaction or fast or explain or grid) and database != ":memory:"
+        self.readers = None
+        self.explain = explain
+        self.transaction = transaction
+        self.fast = fast
+        self.executed = 0
+        self.cache = cache
+        self.cache_hits = 0
+        self.query_text = query_text
+        self.current = None
+        self.started = deque()
+        self.first_error = None
+        self.database = database
+        self.pool = pool
+        self.fmt = fmt
+        self.page_size = page_size
+        self.pager = pager
+        self.grid = grid
+        self.open_conn = None
+
+    def run(self):
+        if self.pager is not None:
+            self.fetch_page()
+            return
+
+        try:
+            self.conn = self.pool.acquire(self.database)
+        except Exception as e:
+            self.failed.emit(str(e))
+            return
+
+        hits = self.cache.hits if self.cache is not None else 0
+        changes, started = self.conn.total_changes, time.perf_counter()
+        if self.profiler is not None:
+            self.profiler.attach(self.conn)
+        try:
+            if self.fast and not self.explain and has_transaction_control(self.query_text):
+                # a script that manages its own transactions can't be wrapped in one, so it runs statement by statement
+                self.fast = self.transaction = False
+                self.statement_done.emit(">>> -- the script has its own transaction statements, so it runs statement by statement\n\n")
+            if self.fast and not self.explain:
+                self.run_fast()
+            elif self.parallel:
+                self.readers = ReaderPool(self.database, pragmas=self.pool.pragmas, attachments=self.pool.attachments.get(self.database))
+                self.run_statements(iter_parallel_query(self.statements(), self.conn, self.readers, self.fmt, self.page_size, self.cache, self.database, self.profiler, self.native))
+            else:
+                self.run_statements()
+            if (self.transaction or self.fast) and self.executed and not self.explain:
+                # changes of a rolled back transaction still count towards total_changes
+                changes = 0 if self.first_error is not None else self.conn.total_changes - changes
+                self.statement_done.emit(format_throughput(self.executed, time.perf_counter() - started, changes))
+        except Exception as e:
+            self.failed.emit(str(e))
+        finally:
+            if self.readers is not None:
+                self.readers.close()
+            if self.profiler is not None:
+                self.profiler.detach(self.conn)
+            if self.cache is not None:
+                self.cache_hits = self.cache.hits - hits
+            conn, self.conn = self.conn, None
+            if self.pager is not None:
+                self.open_conn = conn
+            if self.open_conn is None:
+                self.pool.release(conn)
+        if self.current is None and not self.cancelled and not self.fast:
+            self.statement_done.emit(">>>\n\n")
+
+    def run_statements(self, results=None):
+        if results is None:
+            results = iter_sql_query(self.statements(), self.conn, self.fmt, self.page_size, self.grid, self.cache, self.database, self.transaction and not self.explain, self.profiler, self.explain, self.native)
+        for output, result in results:
+            done = self.started.popleft() if self.started else None
+            self.executed += 1
+            if self.profiler is not None:
+                self.profiled.emit(self.profiler.last)
+            if isinstance(result, sqlite3.Cursor):
+                # the first batch is read here so the grid appears without blocking the GUI thread
+                try:
+                    self.result_ready.emit(result, result.fetchmany(GRID_BATCH))
+                    self.open_conn = self.conn
+                except Exception as e:
+                    output = f"{output}{e}\n\n"
+            else:
+                # only the most recent unfinished result stays open for "fetch more"
+                if self.pager is not None:
+                    self.pager.close()
+                self.pager = result
+            if done is not None and done.error is not None and self.first_error is None:
+                self.first_error = done
+            self.statement_done.emit(output)
+            if self.cancelled:
+                self.statement_done.emit("Query cancelled.\n\n")
+                break
+
+    def run_fast(self):
+        try:
+            self.executed = run_script(self.query_text, self.conn)
+            self.statement_done.emit(f">>> -- script run as one transaction\nCommitted {self.executed} statements\n\n")
+        except Exception as e:
+            self.statement_done.emit(f">>> -- script run as one transaction\n{e}\nTransaction rolled back.\n\n")
+            if self.cancelled:
+                self.statement_done.emit("Query cancelled.\n\n")
+        finally:
+            if self.cache is not None:
+                self.cache.invalidate(self.database)
+
+    def statements(self):
+        # the script is split lazily, so execution starts before a large script has been fully scanned
+        for stmt in iter_statements(self.query_text):
+            if stmt.sql in ('exit', 'exit()'):
+                self.exit_requested.emit()
+                return
+            self.current = stmt
+            # the parallel runner reads ahead, so outputs are matched to statements through this queue
+            self.started.append(stmt)
+            yield stmt
+
+    def cancel(self):
+        super().cancel()
+        readers = self.readers
+        if readers is not None:
+            readers.interrupt()
+
+    def fetch_page(self):
+        self.conn = self.pager.cursor.connection
+        try:
+            self.statement_done.emit(f">>> -- next page\n{self.pager.next_page()}\n\n")
+        except Exception as e:
+            self.pager.close()
+            self.statement_done.emit(f">>> -- next page\n{e}\n\n")
+        finally:
+            self.conn = None
+            if self.pager.exhausted:
+                self.pager = None
+
+class JobWorker(SqlWorker):
+    progress = Signal(int)
+    done = Signal(int)
+
+    def report(self, rows):
+        self.progress.emit(rows)
+        return not self.cancelled
+
+class ExportWorker(JobWorker):
+    def __init__(self, sql, database, path, attachments=None, parent=None):
+        super().__init__(parent)
+        self.sql = sql
+        self.database = database
+        self.path = path
+        self.attachments = attachments
+
+    def run(self):
+        # a separate read-only connection keeps the export off the connection used by the query runs
+        try:
+            self.conn = connect_readonly(self.database, self.attachments, check_same_thread=False)
+            try:
+                cursor = self.conn.execute(self.sql)
+                if cursor.description is None:
+                    raise ValueError("The statement returns no rows to export.")
+                rows = export_cursor(cursor, self.path, progress=self.report)
+            finally:
+                conn, self.conn = self.conn, None
+                conn.close()
+            self.done.emit(rows)
+        except Exception as e:
+            self.failed.emit("Export cancelled." if self.cancelled else str(e))
+
+class ImportWorker(JobWorker):
+    def __init__(self, database, path, table, options, parent=None):
+        super().__init__(parent)
+        self.database = database
+        self.path = path
+        self.table = table
+        self.options = options
+
+    def run(self):
+        # the load gets its own connection so its bulk pragmas never leak into the pooled ones
+        try:
+            self.conn = sqlite3.connect(self.database, autocommit=True, check_same_thread=False)
+            try:
+                rows = import_file(self.conn, self.path, self.table, progress=self.report, **self.options)
+            finally:
+                conn, self.conn = self.conn, None
+                conn.close()
+            self.done.emit(rows)
+        except Exception as e:
+            self.failed.emit("Import cancelled." if self.cancelled else str(e))
+
+class BlobSaveWorker(JobWorker):
+    def __init__(self, conn, ref, path, parent=None):
+        super().__init__(parent)
+        self.source = conn
+        self.ref = ref
+        self.path = path
+
+    def run(self):
+        # the blob is copied in BLOB_CHUNK pieces, so it never has to fit in memory
+        try:
+            self.conn = self.source
+            try:
+                size = save_blob(self.conn, self.ref, self.path, progress=self.report)
+            finally:
+                self.conn = None
+            self.done.emit(size)
+        except Exception as e:
+            self.failed.emit("Save cancelled." if self.cancelled else str(e))
+
+class MaintenanceWorker(JobWorker):
+    report_ready = Signal(str)
+
+    def __init__(self, database, task, target=None, parent=None):
+        super().__init__(parent)
+        self.database = database
+        self.task = task
+        self.target = target
+
+    def run(self):
+        # ANALYZE, optimize and VACUUM get their own writable connection, like an import; the rest only read
+        try:
+            if self.task in WRITE_TASKS:
+                self.conn = sqlite3.connect(self.database, autocommit=True, check_same_thread=False)
+            else:
+                self.conn = connect_readonly(self.database, check_same_thread=False)
+            try:
+                before, after, lines = run_task(self.conn, self.task, self.target, self.report)
+            finally:
+                conn, self.conn = self.conn, None
+                conn.close()
+            self.done.emit(before.page_count)
+            self.report_ready.emit(format_report(self.task, before, after, lines, self.target) + "\n")
+        except Exception as e:
+            self.failed.emit(f"{TASKS[self.task]} cancelled." if self.cancelled else str(e))
+
+class AdvisorWorker(JobWorker):
+    report_ready = Signal(str)
+
+    def __init__(self, database, workload, test=False, parent=None):
+        super().__init__(parent)
+        self.database = database
+        self.workload = workload
+        self.test = test
+
+    def run(self):
+        from advisor import analyze, test_proposals, format_report
+        try:
+            source = self.conn = connect_readonly(self.database, check_same_thread=False)
+            try:
+                proposals = analyze(source, self.workload, self.report)
+                if self.test and proposals:
+                    test_proposals(source, proposals, lambda n: self.report(len(self.workload) + n), self.watch)
+            finally:
+                self.conn = None
+                source.close()
+            self.done.emit(len(self.workload))
+            self.report_ready.emit(format_report(proposals, len(self.workload)) + "\n")
+        except Exception as e:
+            self.failed.emit("Analysis cancelled." if self.cancelled else str(e))
+
+    def watch(self, scratch):
+        # cancel interrupts the measurements on the scratch copy
+        self.conn = scratch
+
+class NotebookLoader(QThread):
+    chunk = Signal(str, int)
+    failed = Signal(str)
+
+    def __init__(self, path, parent=None):
+        super().__init__(parent)
+        self.path = path
+        self.cancelled = False
+        # at most two chunks wait in the GUI queue, so a huge file is never held twice in memory
+        self.slots = threading.Semaphore(2)
+
+    def run(self):
+        try:
+            for text, position in read_chunks(self.path):
+                while not self.slots.acquire(timeout=0.1):
+                    if self.cancelled:
+                        return
+                if self.cancelled:
+                    return
+                self.chunk.emit(text, position)
+        except Exception as e:
+            self.failed.emit(str(e))
+
+    def cancel(self):
+        self.cancelled = True
+
+class NotebookSaver(QThread):
+    failed = Signal(str)
+
+    def __init__(self, path, text, parent=None):
+        super().__init__(parent)
+        self.path = path
+        self.text = text
+
+    def run(self):
+        try:
+            write_atomic(self.path, self.text)
+        except Exception as e:
+            self.failed.emit(str(e))
+        self.text = None
+
+class NotepadWindow(QMainWindow):
+    def __init__(self, file_path=None, parent=None, session_id=None, database=None):
+        super().__init__()
+        self.file_path = file_path
+        self.parent_window = parent
+        # the database this notepad runs on; None follows the main window's
+        self.database = database
+        self.session_id = session_id if session_id is not None else parent.session.new_notepad_id()
+        self.setPalette(parent.palette())
+        self.setWindowTitle("Untitled - Notepad" if not file_path else f"{file_path} - Notepad")
+        self.setWindowIcon(QIcon(r"files\icon1.ico"))
+        if parent:
+            self.resize(parent.width()-40, parent.height()-30)
+        else:
+            self.resize(600, 400)
+
+        self.editor = QPlainTextEdit()
+        self.editor.setFont(QFont("Consolas", 13))
+        self.setCentralWidget(self.editor)
+        self.editor.textChanged.connect(self._mark_modified)
+        self.is_modified = False
+        self.loader = None
+        self.saver = None
+        # unsaved text goes to the session a moment after typing stops, so a crash loses at most that moment
+        self.autosave_timer = QTimer(self, singleShot=True, interval=NOTEPAD_AUTOSAVE_MS)
+        self.autosave_timer.timeout.connect(self.persist)
+        self.editor.wheelEvent = self.wheelEvent_textinput.__get__(self)
+        self.highlighter = SqlHighlighter(self.editor)
+        if parent:
+            self.completer = SqlCompleter(self.editor, lambda prefix, qualifier: parent.completions(prefix, qualifier, self.db_path()))
+
+        menu_bar = self.menuBar()
+
+        file_menu = menu_bar.addMenu("&File")
+        file_menu.addAction(QAction("New", self, shortcut="Ctrl+N", triggered=self.new_file))
+        file_menu.addAction(QAction("Open...", self, shortcut="Ctrl+O", triggered=self.open_file))
+        file_menu.addSeparator()
+        file_menu.addAction(QAction("Save", self, shortcut="Ctrl+S", triggered=self.save_file))
+        file_menu.addAction(QAction("Save As...", self, shortcut="Ctrl+Shift+S", triggered=self.save_file_as))
+        file_menu.addSeparator()
+        file_menu.addAction(QAction("Quit", self, shortcut="Escape", triggered=self.close))
+
+        edit_menu = menu_bar.addMenu("&Edit")
+        edit_menu.addAction(QAction("Undo", self, shortcut="Ctrl+Z", triggered=self.editor.undo))
+        edit_menu.addAction(QAction("Redo", self, shortcut="Ctrl+Y", triggered=self.editor.redo))
+        edit_menu.addSeparator()
+        edit_menu.addAction(QAction("Cut", self, shortcut="Ctrl+X", triggered=self.editor.cut))
+        edit_menu.addAction(QAction("Copy", self, shortcut="Ctrl+C", triggered=self.editor.copy))
+        edit_menu.addAction(QAction("Paste", self, shortcut="Ctrl+V", triggered=self.editor.paste))
+        edit_menu.addSeparator()
+        edit_menu.addAction(QAction("Select All", self, shortcut="Ctrl+A", triggered=self.editor.selectAll))
+        edit_menu.addSeparator()
+        edit_menu.addAction(QAction(text="Inc Size", parent=self, shortcut="Ctrl++", triggered=lambda: self.editor.zoomIn(1)))
+        edit_menu.addAction(QAction(text="Dec Size", parent=self, shortcut="Ctrl+-", triggered=lambda: self.editor.zoomOut(1)))
+        edit_menu.addAction(QAction(text="Reset Zoom", parent=self, shortcut="Ctrl+=", triggered=lambda: self.editor.setFont(QFont("Consolas", 13))))
+
+        database_menu = menu_bar.addMenu("&Database")
+        self.follow_action = QAction("Follow Main Window", self, checkable=True, triggered=self.follow_main)
+        database_menu.addAction(self.follow_action)
+        database_menu.addAction(QAction("Use Database File...", self, triggered=self.choose_database))
+        database_menu.addSeparator()
+        database_menu.addAction(QAction("Attach Database...", self, triggered=lambda: self.parent_window.attach_database(self.db_path(), self)))
+        database_menu.addAction(QAction("Attached Databases...", self, triggered=lambda: self.parent_window.edit_attachments(self.db_path(), self)))
+        database_menu.addSeparator()
+        database_menu.addAction(QAction("Export Result...", self, triggered=lambda: self.parent_window.export_result(self)))
+        database_menu.addAction(QAction("Index Advisor...", self, triggered=lambda: self.parent_window.index_advisor(self)))
+        database_menu.addAction(QAction("Database Maintenance...", self, triggered=lambda: self.parent_window.maintenance(self)))
+        self.database_label = QLabel()
+        self.statusBar().addPermanentWidget(self.database_label)
+        self.update_binding()
+
+        menu_bar.addAction(QAction(text="Run", parent=self, shortcut="F5", triggered=self.run))
+        menu_bar.addAction(QAction(text="Explain", parent=self, shortcut="Ctrl+E", triggered=self.explain))
+        menu_bar.addAction(QAction(text="Cancel", parent=self, shortcut="Shift+F5", triggered=self.parent_window.cancel_query))
+        menu_bar.addAction(QAction(text="More", parent=self, shortcut="F6", triggered=self.parent_window.fetch_more))
+        menu_bar.setStyleSheet(parent.styleSheet())
+
+        if self.file_path:
+            self.load_file(self.file_path)
+        else:
+            self.persist()
+
+    def _mark_modified(self):
+        # textChanged also fires while the highlighter restyles blocks, which does not set the document's own flag
+        document = self.editor.document()
+        if self.loader is None and document.isModified():
+            self.is_modified = True
+            document.setModified(False)
+            self.autosave_timer.start()
+
+    def persist(self):
+        # the session keeps the file and, while it differs from the file, the text itself
+        if self.loader is None:
+            self.autosave_timer.stop()
+            self.parent_window.session.save_notepad(self.session_id, self.file_path, self.editor.toPlainText() if self.is_modified else None, self.database)
+
+    def restore(self, file_path, text):
+        # text that wasn't saved when the app last ended
+        self.highlighter.set_text(text)
+        self.file_path = file_path
+        if file_path:
+            self.setWindowTitle(f"{file_path} - Notepad")
+        self.editor.document().setModified(False)
+        self.is_modified = True
+        # the constructor's persist() wrote an empty notepad over the recovered row, so it is written again
+        self.persist()
+
+    def leave_session(self, discarded=False):
+        # closed along with the app, the notepad is reopened next time; closed on its own, it is forgotten
+        if self.parent_window.closing and not (discarded and not self.file_path):
+            self.persist()
+        else:
+            self.autosave_timer.stop()
+            self.parent_window.session.remove_notepad(self.session_id)
+
+    def load_file(self, file_path):
+        try:
+            if os.path.getsize(file_path) < BACKGROUND_BYTES:
+                with open(file_path, "r", encoding="utf-8") as f:
+                    self.highlighter.set_text(f.read())
+                self.file_loaded(file_path)
+                return
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Could not open file:\n{e}")
+            return
+
+        # large notebooks are read on a thread and appended chunk by chunk, without undo history or highlighting
+        self.editor.clear()
+        self.editor.setReadOnly(True)
+        self.editor.setUndoRedoEnabled(False)
+        self.highlighter.suspend()
+        self.loader = NotebookLoader(file_path, self)
+        size = max(os.path.getsize(file_path), 1)
+        dialog = QProgressDialog(f"Loading {os.path.basename(file_path)}...", "Cancel", 0, 1000, self)
+        dialog.setWindowTitle("Open File")
+        dialog.setMinimumDuration(300)
+        dialog.canceled.connect(self.loader.cancel)
+        cursor = QTextCursor(self.editor.document())
+
+        def append(text, position):
+            if self.loader is None or self.loader.cancelled:
+                return
+            cursor.movePosition(QTextCursor.MoveOperation.End)
+            cursor.insertText(text)
+            dialog.setValue(min(position * 1000 // size, 999))
+            self.loader.slots.release()
+
+        def failed(message):
+            QMessageBox.critical(self, "Error", f"Could not open file:\n{message}")
+            self.loader.cancel()
+
+        def finished():
+            loader, self.loader = self.loader, None
+            dialog.reset()
+            dialog.deleteLater()
+            loader.deleteLater()
+            self.editor.setReadOnly(False)
+            self.editor.setUndoRedoEnabled(True)
+            if loader.cancelled:
+                # a partial notebook must never be saved over the file, so nothing of it is kept
+                self.highlighter.suspend()
+                self.editor.clear()
+                self.highlighter.resume()
+                self.file_path = None
+                self.setWindowTitle("Untitled - Notepad")
+                self.is_modified = False
+                self.persist()
+            else:
+                self.highlighter.resume()
+                self.file_loaded(file_path)
+
+        self.loader.chunk.connect(append)
+        self.loader.failed.connect(failed)
+        self.loader.finished.connect(finished)
+        self.loader.start()
+
+    def file_loaded(self, file_path):
+        self.file_path = file_path
+        self.setWindowTitle(f"{file_path} - Notepad")
+        self.is_modified = False
+        self.editor.document().setModified(False)
+        self.persist()
+
+    def closeEvent(self, event):
+        if self.loader is not None:
+            self.loader.cancel()
+            self.loader.wait()
+        if self.saver is not None:
+            self.saver.wait()
+        if self.is_modified:
+            reply = QMessageBox.question(self, "Save Changes?", "Do you want to save changes before closing?", QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No | QMessageBox.StandardButton.Cancel, QMessageBox.StandardButton.Yes)
+
+            if reply == QMessageBox.StandardButton.Yes:
+                result = self.save_file(wait=True)
+                if result:
+                    if self.parent_window and self in self.parent_window.open_notepads:
+                        self.parent_window.open_notepads.remove(self)
+                    self.leave_session()
+                    event.accept()
+            elif reply == QMessageBox.StandardButton.No:
+                if self.parent_window and self in self.parent_window.open_notepads:
+                    self.parent_window.open_notepads.remove(self)
+                self.is_modified = False
+                self.leave_session(discarded=True)
+                event.accept()
+            else:
+                event.ignore()
+        else:
+            if self.parent_window and self in self.parent_window.open_notepads:
+                self.parent_window.open_notepads.remove(self)
+            self.leave_session()
+            event.accept()
+
+    # File actions
+    def new_file(self):
+        reply = QMessageBox.question(self, "Confirm Action", "Do you want to save changes before closing?", QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No | QMessageBox.StandardButton.Cancel, QMessageBox.StandardButton.Yes)
+        if reply == QMessageBox.StandardButton.Yes:
+            result = self.save_file()
+        elif reply == QMessageBox.StandardButton.No:
+            result = True
+        elif reply == QMessageBox.StandardButton.Cancel:
+            result = False
+        if result:
+            self.editor.clear()
+            self.setWindowTitle("Untitled - Notepad")
+            self.file_path = None
+            self.is_modified = False
+            self.persist()
+
+    def open_file(self):
+        reply = QMessageBox.question(self, "Confirm Action", "Do you want to save changes before closing?", QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No | QMessageBox.StandardButton.Cancel, QMessageBox.StandardButton.Yes)
+        if reply == QMessageBox.StandardButton.Yes:
+            result = self.save_file()
+        elif reply == QMessageBox.StandardButton.No:
+            result = True
+        elif reply == QMessageBox.StandardButton.Cancel:
+            result = False
+        
+        if result:
+            file_path, _ = QFileDialog.getOpenFileName(self, "Open File", "", "SQL notebook (*.nbdb)")
+            try:
+                if file_path and file_path.endswith('.nbdb'):
+                    self.load_file(file_path)
+                elif file_path and not file_path.endswith('.nbdb'):
+                    raise Exception("Different file format")
+
+            except Exception as e:
+                QMessageBox.critical(self, "Error", f"Could not open file:\n{e}")
+
+    def save_file(self, wait=False):
+        if self.file_path:
+            if not self.file_path.endswith('.nbdb') or self.loader is not None:
+                return False
+            if self.saver is not None:
+                self.saver.wait()
+            if wait:
+                try:
+                    write_atomic(self.file_path, self.editor.toPlainText())
+                    self.is_modified = False
+                    self.persist()
+                    return True
+                except Exception as e:
+                    QMessageBox.critical(self, "Error", f"Could not save file:\n{e}")
+                    return False
+            # the text is copied here; writing it out happens on a thread, into a temp file renamed over the old one
+            self.saver = NotebookSaver(self.file_path, self.editor.toPlainText(), self)
+            self.is_modified = False
+
+            def failed(message):
+                self.is_modified = True
+                QMessageBox.critical(self, "Error", f"Could not save file:\n{message}")
+
+            def finished():
+                self.saver.deleteLater()
+                self.saver = None
+                self.persist()
+                self.statusBar().showMessage("Saved.", 2000)
+
+            self.saver.failed.connect(failed)
+            self.saver.finished.connect(finished)
+            self.saver.start()
+            return True
+        else:
+            return self.save_file_as()
+
+    def save_file_as(self):
+        file_path, _ = QFileDialog.getSaveFileName(self, "Save File As", "", "SQL notebook (*.nbdb)")
+        if file_path and file_path.endswith('.nbdb'):
+            self.file_path = file_path
+            self.save_file()
+            self.setWindowTitle(f"{file_path} - Notepad")
+            self.is_modified = False
+            return True
+        elif file_path and not file_path.endswith('.nbdb'):
+            QMessageBox.critical(self, "Error", "Unable to save.")
+            return False
+        else:
+            return False
+
+    def run(self):
+        self.parent_window.start_query(self.editor.toPlainText(), self.db_path(), self.editor)
+
+    def explain(self):
+        self.parent_window.explain_query(self.editor, self.db_path())
+
+    def db_path(self):
+        return self.database or self.parent_window.db_entry.text().strip()
+
+    def bind(self, database):
+        self.database = database or None
+        self.update_binding()
+        self.persist()
+
+    def follow_main(self, checked):
+        if checked:
+            self.bind(None)
+        else:
+            # unchecking means choosing a database of its own; it stays checked if none is chosen
+            self.follow_action.setChecked(True)
+            self.choose_database()
+
+    def choose_database(self):
+        file, _ = QFileDialog.getOpenFileName(self, "Use Database", "", "SQLite DB (*.db *.sqlite3);;All files (*)")
+        if file:
+            self.bind(file)
+
+    def update_binding(self):
+        # called again whenever the main window's database or the attachments change
+        database = self.db_path()
+        attached = len(self.parent_window.pool.attachments.get(database, {}))
+        self.follow_action.setChecked(self.database is None)
+        self.database_label.setText(f"{os.path.basename(database) or 'No database'}{f' + {attached} attached' if attached else ''}{' (main window)' if self.database is None else ''}")
+        self.database_label.setToolTip(database)
+
+    def wheelEvent_textinput(self, event):
+        if event.modifiers() & Qt.KeyboardModifier.ControlModifier:
+            if event.angleDelta().y() > 0:
+                self.editor.zoomIn(1)
+            else:
+                self.editor.zoomOut(1)
+        else:
+            QPlainTextEdit.wheelEvent(self.editor, event)
+
+class StartupProfile:
+    # --profile-startup: the time of every start-up stage; the window prints the report and closes once it is fully initialized
+    def __init__(self, timings=()):
+        self.timings = list(timings)
+        self.last = time.perf_counter()
+
+    def mark(self, stage):
+        now = time.perf_counter()
+        self.timings.append((stage, now - self.last))
+        self.last = now
+
+    def report(self):
+        lines = [f"{'start-up stage':<32} {'ms':>8}"]
+        for stage, seconds in self.timings:
+            lines.append(f"{stage:<32} {seconds * 1000:>8.1f}")
+        lines.append(f"{'total':<32} {sum(seconds for _, seconds in self.timings) * 1000:>8.1f}")
+        return "\n".join(lines)
+
+class Mainwindow(QMainWindow):
+    def __init__(self, appo: QApplication, profile=None):
+        super().__init__()
+        self.profile = profile
+        self.painted = False
+        self.open_notepads = []
+        self.worker = None
+        self.job = None
+        self.pager = None
+        self.result_conn = None
+        self.result_database = None
+        self.query_editor = None
+        self.grids = []
+        self.closing = False
+        self.setWindowTitle("SQLite")
+        self.setWindowIcon(QIcon(r"files\icon1.ico"))
+        #self.resize(950, 600)
+        self.setContentsMargins(10,0,10,10)
+        self.session = SessionStore(session_path())
+        self.data = self.session.settings()
+        self.mark("window: session")
+        self.appo = appo
+        self.pool = ConnectionPool(self.data.get("pragmas"), self.data.get("idle_timeout", 300), self.data.get("attachments"))
+        self.pool_timer = QTimer(self)
+        self.pool_timer.timeout.connect(self.pool.prune)
+        self.result_cache = ResultCache(self.data.get("result_cache_mb", 32) * 1024 * 1024)
+
+        # the history view is added to its dock in finish_startup
+        self.history_model = ProfileModel(parent=self)
+        self.history_dock = QDockWidget("Statement History", self)
+        self.history_dock.setObjectName("history_dock")
+        self.addDockWidget(Qt.DockWidgetArea.BottomDockWidgetArea, self.history_dock)
+        self.history_dock.hide()
+        self.catalogs = {}
+        self.schema_dock = SchemaDock(self)
+        self.schema_dock.name_activated.connect(lambda name: self.text_input.insertPlainText(name))
+        self.addDockWidget(Qt.DockWidgetArea.LeftDockWidgetArea, self.schema_dock)
+        self.schema_dock.hide()
+
+        #menu bar setup
+        menu_bar = QMenuBar(self)
+        file_menu = QMenu("&File", self)
+        file_menu.addAction(QAction(text="New Database", parent=self, shortcut="Ctrl+N", triggered=self.new_database))
+        file_menu.addAction(QAction(text="Open Database", parent=self, shortcut="Ctrl+O", triggered=self.open_database))
+        file_menu.addSeparator()
+        file_menu.addAction(QAction(text="New File", parent=self, shortcut="Ctrl+Shift+N", triggered=self.new_file))
+        file_menu.addAction(QAction(text="Open File", parent=self, shortcut="Ctrl+Shift+O", triggered=self.open_file))
+        file_menu.addSeparator()
+        file_menu.addAction(QAction(text="Import Data...", parent=self, shortcut="Ctrl+Shift+I", triggered=self.import_data))
+        file_menu.addAction(QAction(text="Export Result...", parent=self, shortcut="Ctrl+Shift+E", triggered=self.export_result))
+        file_menu.addAction(QAction(text="Open BLOB...", parent=self, shortcut="Ctrl+Shift+B", triggered=self.open_blob_source))
+        file_menu.addSeparator()
+        file_menu.addAction(QAction(text="Quit", parent=self, shortcut="Ctrl+Q", triggered=self.close))
+
+        edit_menu = QMenu("&Edit", self)
+        self.clear_input = QAction(text="Clear Input", parent=self, shortcut="Ctrl+I", triggered=self.handle_check)
+        self.clear_input.setCheckable(True)
+        edit_menu.addAction(self.clear_input)
+        edit_menu.addAction(QAction(text="Clear Output", parent=self, shortcut="Ctrl+K", triggered=self.clear_outp))
+        self.cache_results = QAction(text="Cache Results", parent=self, checkable=True, triggered=lambda checked: self.result_cache.invalidate())
+        self.cache_results.setChecked(self.data.get("result_cache", True))
+        edit_menu.addAction(self.cache_results)
+        edit_menu.addAction(QAction(text="Connection Pragmas...", parent=self, triggered=self.edit_pragmas))
+        edit_menu.addAction(QAction(text="Attach Database...", parent=self, triggered=lambda: self.attach_database(self.db_entry.text().strip())))
+        edit_menu.addAction(QAction(text="Attached Databases...", parent=self, triggered=lambda: self.edit_attachments(self.db_entry.text().strip())))
+        edit_menu.addSeparator()
+        self.run_transaction = QAction(text="Run as Transaction", parent=self, shortcut="Ctrl+T", checkable=True)
+        self.run_transaction.setChecked(self.data.get("run_transaction", False))
+        edit_menu.addAction(self.run_transaction)
+        self.fast_script = QAction(text="Fast Script Mode (no output)", parent=self, checkable=True)
+        self.fast_script.setChecked(self.data.get("fast_script", False))
+        edit_menu.addAction(self.fast_script)
+        self.parallel_reads = QAction(text="Parallel Read-Only Statements", parent=self, checkable=True)
+        self.parallel_reads.setChecked(self.data.get("parallel_reads", False))
+        edit_menu.addAction(self.parallel_reads)
+        edit_menu.addSeparator()
+        self.show_timings = QAction(text="Show Statement Timings", parent=self, checkable=True)
+        self.show_timings.setChecked(self.data.get("show_timings", False))
+        edit_menu.addAction(self.show_timings)
+        self.count_steps = QAction(text="Count VM Steps", parent=self, checkable=True)
+        self.count_steps.setChecked(self.data.get("count_vm_steps", False))
+        edit_menu.addAction(self.count_steps)
+        schema_action = self.schema_dock.toggleViewAction()
+        schema_action.setShortcut("Ctrl+B")
+        edit_menu.addAction(schema_action)
+        history_action = self.history_dock.toggleViewAction()
+        history_action.setShortcut("Ctrl+Shift+P")
+        edit_menu.addAction(history_action)
+        edit_menu.addAction(QAction(text="Clear Statement History", parent=self, triggered=self.clear_history))
+        edit_menu.addAction(QAction(text="Index Advisor...", parent=self, triggered=self.index_advisor))
+        edit_menu.addAction(QAction(text="Database Maintenance...", parent=self, triggered=self.maintenance))
+        edit_menu.addSeparator()
+        edit_label1 = QAction(text="Input Box", parent=self)
+        edit_label1.setEnabled(False)
+        edit_menu.addAction(edit_label1)
+        edit_menu.addAction(QAction(text="  Inc Size", parent=self, triggered=lambda: self.text_input.zoomIn(1)))
+        edit_menu.addAction(QAction(text="  Dec Size", parent=self, triggered=lambda: self.text_input.zoomOut(1)))
+        edit_menu.addAction(QAction(text="  Reset Zoom", parent=self, triggered=lambda: self.text_input.setFont(QFont("Consolas", 13))))
+        edit_menu.addSeparator()
+        edit_label2 = QAction(text="Output Box", parent=self)
+        edit_label2.setEnabled(False)
+        edit_menu.addAction(edit_label2)
+        edit_menu.addAction(QAction(text="  Inc Size", parent=self, triggered=lambda: self.output_box.zoomIn(1)))
+        edit_menu.addAction(QAction(text="  Dec Size", parent=self, triggered=lambda: self.output_box.zoomOut(1)))
+        edit_menu.addAction(QAction("  Reset Zoom", self, triggered=lambda: self.output_box.setFont(QFont("Consolas", 13))))
+        edit_menu.addAction(QAction(text="  Line Limit...", parent=self, triggered=self.set_output_limit))
+        edit_menu.addAction(QAction(text="  Spill to File", parent=self, triggered=self.spill_output_box))
+        self.spilled_menu = QMenu("  Spilled Results", self)
+        self.spilled_menu.setEnabled(False)
+        edit_menu.addMenu(self.spilled_menu)
+
+        # the format actions are created the first time the menu opens, see add_table_formats
+        self.style_menu = QMenu("Table", self)
+        style_menu = self.style_menu
+        self.format_group = None
+        fmt = self.data.get("table_format", "simple_outline")
+        self.current_table_format = fmt if fmt in TABULATE_FORMATS else "simple_outline"
+        style_menu.aboutToShow.connect(self.add_table_formats)
+
+        self.page_size = self.data.get("page_size", 1000)
+        self.formats_end = style_menu.addSeparator()
+        self.native_render = QAction(text="Native Renderer", parent=self, checkable=True)
+        self.native_render.setToolTip("Render simple_outline, psql, grid, github and plain without tabulate; the output is the same")
+        self.native_render.setChecked(self.data.get("native_render", True))
+        style_menu.addAction(self.native_render)
+        style_menu.addAction(QAction(text="Page Size...", parent=self, triggered=self.set_page_size))
+        self.grid_view = QAction(text="Grid View", parent=self, shortcut="Ctrl+G", checkable=True)
+        self.grid_view.setChecked(self.data.get("grid_view", False))
+        style_menu.addAction(self.grid_view)
+
+        theme_menu = QMenu("Theme", self)
+        theme_group = QActionGroup(self)
+        theme_group.setExclusive(True)
+        action1 = QAction("Light", self, checkable=True)
+        action2 = QAction("Dark", self, checkable=True)
+        action3 = QAction("System Default", self, checkable=True)
+        if self.data.get("theme", "sys") == "dark":
+            action2.setChecked(True)
+            self.theme_dark()
+        elif self.data.get("theme", "sys") == "light":
+            action1.setChecked(True)
+            self.theme_light()
+        else:
+            action3.setChecked(True)
+            self.theme_sys()
+        theme_group.addAction(action3)
+        theme_group.addAction(action1)
+        theme_group.addAction(action2)
+        action1.triggered.connect(lambda checked: self.theme_light())
+        action2.triggered.connect(lambda checked: self.theme_dark())
+        action3.triggered.connect(lambda checked: self.theme_sys())
+        theme_menu.addActions([action3, action1, action2])
+
+        style = QMenu("&Style", self)
+        style.addMenu(style_menu)
+        style.addMenu(theme_menu)
+
+        help_menu = QMenu("&Help", self)
+        help_menu.addAction(QAction(text="Help", parent=self, shortcut="Ctrl+H", triggered=lambda: self.open_help(r"files\help2.html")))
+        help_menu.addAction(QAction(text="SQLite", parent=self, shortcut="Ctrl+Shift+H", triggered=lambda: self.open_help(r"files\help1.html")))
+        help_menu.addAction("About", self.show_about)
+        help_menu.addAction("License", self.show_license)
+
+        menu_bar.addMenu(file_menu)
+        menu_bar.addMenu(edit_menu)
+        menu_bar.addMenu(style)
+        menu_bar.addMenu(help_menu)
+        menu_bar.addAction(QAction(text="Run", parent=self, shortcut="F5", triggered=self.run_queries, toolTip="F5"))
+        menu_bar.addAction(QAction(text="Explain", parent=self, shortcut="Ctrl+E", triggered=self.explain_query, toolTip="Ctrl+E: query plan of the statement under the cursor"))
+        self.cancel_action = QAction(text="Cancel", parent=self, shortcut="Shift+F5", triggered=self.cancel_query, toolTip="Shift+F5")
+        self.cancel_action.setEnabled(False)
+        menu_bar.addAction(self.cancel_action)
+        self.more_action = QAction(text="More", parent=self, shortcut="F6", triggered=self.fetch_more, toolTip="F6: fetch the next page of the last result")
+        self.more_action.setEnabled(False)
+        menu_bar.addAction(self.more_action)
+        self.setMenuBar(menu_bar)
+        self.mark("window: menus")
+
+        top_bar = QHBoxLayout()
+        label1 = QLabel("SQLite")
+        label1.setFont(QFont('Halveta', 16, QFont.Weight.Bold))
+        top_bar.addWidget(label1)
+        top_bar.addStretch()
+        label2 = QLabel("\tDatabase: ")
+        label2.setFont(QFont('Consolas', 13, QFont.Weight.Bold))
+        top_bar.addWidget(label2)
+        self.db_entry = QLineEdit("database.db", self)
+        self.db_entry.setMinimumWidth(300)
+        self.db_entry.setFont(QFont('Consolas', 13))
+        run_button = QPushButton("Run")
+        run_button.clicked.connect(self.run_queries)
+        run_button.setFont(QFont("Consolas", 13))
+        self.cancel_button = QPushButton("Cancel")
+        self.cancel_button.clicked.connect(self.cancel_query)
+        self.cancel_button.setFont(QFont("Consolas", 13))
+        self.cancel_button.setEnabled(False)
+        top_bar.addWidget(self.db_entry)
+        top_bar.addWidget(run_button)
+        top_bar.addWidget(self.cancel_button)
+
+        self.text_input = QPlainTextEdit()
+        self.text_input.setPlaceholderText("Write your SQL commands here...")
+        self.text_input.setFont(QFont("Consolas", 13))
+        self.text_input.wheelEvent = self.wheelEvent_textinput.__get__(self)
+
+        self.output_box = HScrollTextEdit()
+        self.output_box.setReadOnly(True)
+        self.output_box.setFont(QFont("Consolas", 13))
+        self.output_box.setLineWrapMode(QPlainTextEdit.LineWrapMode.NoWrap)
+        self.max_output_lines = self.data.get("max_output_lines", 20000)
+        self.output_box.setMaximumBlockCount(self.max_output_lines)
+        self.output_queue = deque()
+        self.output_timer = QTimer(self)
+        self.output_timer.setInterval(0)
+        self.output_timer.timeout.connect(self.drain_output)
+        self.spill_dir = None
+        
+        self.output_box.setMinimumHeight(200)
+
+        self.result_tabs = QTabWidget()
+        self.result_tabs.addTab(self.output_box, "Output")
+
+        splitter = QSplitter(Qt.Vertical)
+        splitter.addWidget(self.text_input)
+        splitter.addWidget(self.result_tabs)
+        splitter.setSizes([120, 400])
+        
+        layout = QVBoxLayout()
+        layout.addLayout(top_bar)
+        layout.addWidget(splitter)
+
+        container = QWidget()
+        container.setLayout(layout)
+        self.setCentralWidget(container)
+
+        self.status_label = QLabel()
+        self.statusBar().addPermanentWidget(self.status_label)
+        self.elapsed = QElapsedTimer()
+        self.elapsed_timer = QTimer(self)
+        self.elapsed_timer.setInterval(100)
+        self.elapsed_timer.timeout.connect(self.update_elapsed)
+
+        self.db_entry.setText(self.data.get("last_db", "database.db"))
+        self.active_db = self.db_entry.text().strip()
+        self.db_entry.editingFinished.connect(self.db_changed)
+        self.clear_input.setChecked(self.data.get("clear_input", False))
+        # settings are stored as soon as an action changes one, not only on exit; comparing them is cheap.
+        # Every action that holds a setting is created with the window as its parent
+        for action in self.findChildren(QAction, options=Qt.FindChildOption.FindDirectChildrenOnly):
+            action.triggered.connect(self.store_settings)
+        self.mark("window: widgets")
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if not self.painted:
+            # what finish_startup sets up is not needed for the first paint, so it waits until the window is on screen
+            self.painted = True
+            QTimer.singleShot(0, self.finish_startup)
+
+    def mark(self, stage):
+        if self.profile is not None:
+            self.profile.mark(stage)
+
+    def finish_startup(self):
+        if self.closing:
+            return
+        self.mark("first paint")
+        history_proxy = QSortFilterProxyModel(self)
+        history_proxy.setSourceModel(self.history_model)
+        history_proxy.setSortRole(Qt.ItemDataRole.UserRole)
+        history_view = ResultGrid(history_proxy)
+        history_view.setSortingEnabled(True)
+        history_view.sortByColumn(0, Qt.SortOrder.AscendingOrder)
+        self.history_dock.setWidget(history_view)
+        self.schema_dock.set_catalog(self.catalog())
+        self.completer = SqlCompleter(self.text_input, self.completions)
+        self.highlighter = SqlHighlighter(self.text_input)
+        self.pool_timer.start(30_000)
+        self.restore_session()
+        self.restore_spills()
+        self.mark("deferred init")
+        if self.profile is not None:
+            print(self.profile.report(), flush=True)
+            QTimer.singleShot(0, self.close)
+
+    def add_table_formats(self):
+        if self.format_group is not None:
+            return
+        self.format_group = QActionGroup(self)
+        self.format_group.setExclusive(True)
+        for fmt in sorted(TABULATE_FORMATS):
+            action = QAction(f"{fmt}\t(default)" if fmt == "simple_outline" else fmt, self, checkable=True)
+            action.setChecked(fmt == self.current_table_format)
+            action.triggered.connect(lambda checked, f=fmt: self.set_table_format(f))
+            action.triggered.connect(self.store_settings)
+            self.format_group.addAction(action)
+            self.style_menu.insertAction(self.formats_end, action)
+
+    def restore_session(self):
+        self.history_model.prepend(self.session.history())
+        for notepad_id, path, text, database in self.session.notepads():
+            if text is None and not (path and os.path.exists(path)):
+                self.session.remove_notepad(notepad_id)
+                continue
+            notepad = NotepadWindow(path if text is None else None, parent=self, session_id=notepad_id, database=database)
+            if text is not None:
+                notepad.restore(path, text)
+            self.open_notepads.append(notepad)
+            notepad.show()
+
+    def settings(self):
+        return {"last_db": self.db_entry.text().strip(), "table_format": self.current_table_format, "clear_input": self.clear_input.isChecked(), "theme": self.current_theme, "page_size": self.page_size, "grid_view": self.grid_view.isChecked(), "pragmas": self.pool.pragmas, "idle_timeout": self.pool.idle_timeout, "result_cache": self.cache_results.isChecked(), "result_cache_mb": self.result_cache.max_bytes // (1024 * 1024), "run_transaction": self.run_transaction.isChecked(), "fast_script": self.fast_script.isChecked(), "max_output_lines": self.max_output_lines, "show_timings": self.show_timings.isChecked(), "count_vm_steps": self.count_steps.isChecked(), "parallel_reads": self.parallel_reads.isChecked(), "native_render": self.native_render.isChecked(), "attachments": self.pool.attachments}
+
+    def store_settings(self, *args):
+        self.session.set_settings(self.settings())
+
+    def clear_history(self):
+        self.history_model.clear()
+        self.session.clear_history()
+
+    def run_queries(self):
+        if self.start_query(self.text_input.toPlainText(), self.db_entry.text().strip(), self.text_input):
+            if self.clear_input.isChecked():
+                self.handle_check(True)
+
+    def explain_query(self, editor=None, database=None):
+        editor = editor or self.text_input
+        stmt = current_statement(editor)
+        if stmt is None:
+            self.statusBar().showMessage("Write the statement to explain first.", 3000)
+            return
+        self.start_query(stmt.sql, database or self.db_entry.text().strip(), explain=True)
+
+    def start_query(self, query_text, db_path, editor=None, explain=False):
+        if self.worker is not None:
+            self.statusBar().showMessage("A query is already running.", 3000)
+            return False
+        if not db_path:
+            self.append_output("Error: No database selected.\n\n")
+            return False
+        if not query_text.strip():
+            self.append_output(">>>\n\n")
+            return True
+
+        self.release_results()
+        self.db_changed()
+        self.result_database = db_path
+        self.query_editor = editor
+        profiler = None if explain else Profiler(db_path, self.count_steps.isChecked(), self.show_timings.isChecked())
+        self.launch_worker(QueryWorker(query_text, db_path, self.current_table_format, self.pool, self.page_size, grid=self.grid_view.isChecked(), cache=self.result_cache if self.cache_results.isChecked() else None, transaction=self.run_transaction.isChecked(), fast=self.fast_script.isChecked(), profiler=profiler, explain=explain, parallel=self.parallel_reads.isChecked(), native=self.native_render.isChecked(), parent=self))
+        return True
+
+    def fetch_more(self):
+        if self.worker is not None:
+            self.statusBar().showMessage("A query is already running.", 3000)
+        elif self.pager is None:
+            self.statusBar().showMessage("No more rows to fetch.", 3000)
+        else:
+            pager, self.pager = self.pager, None
+            self.query_editor = None
+            self.launch_worker(QueryWorker("", None, pager.fmt, self.pool, pager.page_size, pager=pager, parent=self))
+
+    def launch_worker(self, worker):
+        self.worker = worker
+        self.worker.statement_done.connect(self.append_output)
+        self.worker.result_ready.connect(self.show_grid)
+        self.worker.profiled.connect(self.history_model.add)
+        self.worker.profiled.connect(self.session.add_profile)
+        self.worker.exit_requested.connect(self.close)
+        self.worker.failed.connect(lambda msg: QMessageBox.critical(self, "Error", msg))
+        self.worker.finished.connect(self.query_finished)
+        self.cancel_action.setEnabled(True)
+        self.cancel_button.setEnabled(True)
+        self.elapsed.start()
+        self.elapsed_timer.start()
+        self.more_action.setEnabled(False)
+        self.update_elapsed()
+        self.worker.start()
+
+    def cancel_query(self):
+        if self.worker is not None:
+            self.worker.cancel()
+            self.update_elapsed()
+
+    def show_grid(self, cursor, rows):
+        grid = ResultGrid(CursorTableModel(cursor, rows))
+        grid.blob_activated.connect(self.inspect_blob)
+        self.grids.append(grid)
+        self.result_tabs.addTab(grid, f"Result {len(self.grids)}")
+        self.result_tabs.setCurrentWidget(grid)
+
+    def release_results(self):
+        if self.pager is not None:
+            self.pager.close()
+            self.pager = None
+        self.more_action.setEnabled(False)
+        for grid in self.grids:
+            grid.model().close()
+            self.result_tabs.removeTab(self.result_tabs.indexOf(grid))
+            grid.deleteLater()
+        self.grids = []
+        if self.result_conn is not None:
+            self.pool.release(self.result_conn)
+            self.result_conn = None
+
+    def query_finished(self):
+        if self.worker is None:
+            return
+        cancelled = self.worker.cancelled
+        cached = f" ({self.worker.cache_hits} cached)" if self.worker.cache_hits else ""
+        self.result_conn = self.worker.open_conn or self.result_conn
+        if self.worker.first_error is not None and self.query_editor is not None:
+            try:
+                self.select_statement(self.query_editor, self.worker.first_error)
+            except RuntimeError:
+                pass  # the notepad that started the run has been closed
+        self.pager = self.worker.pager
+        self.more_action.setEnabled(self.pager is not None)
+        self.worker.deleteLater()
+        self.worker = None
+        self.elapsed_timer.stop()
+        self.cancel_action.setEnabled(False)
+        self.cancel_button.setEnabled(False)
+        seconds = self.elapsed.elapsed() / 1000
+        self.status_label.setText(f"Cancelled after {seconds:.2f} s" if cancelled else f"Finished in {seconds:.2f} s{cached}")
+        if self.schema_dock.isVisible():
+            self.schema_dock.refresh()
+
+    def select_statement(self, editor, stmt):
+        # statement offsets are code points; QTextCursor positions count UTF-16 units
+        text = editor.toPlainText()
+        def position(index):
+            return min(len(text[:index].encode("utf-16-le")) // 2, editor.document().characterCount() - 1)
+        cursor = editor.textCursor()
+        cursor.setPosition(position(stmt.start))
+        cursor.setPosition(position(stmt.end), QTextCursor.MoveMode.KeepAnchor)
+        editor.setTextCursor(cursor)
+        editor.ensureCursorVisible()
+
+    def update_elapsed(self):
+        state = "Cancelling" if self.worker is not None and self.worker.cancelled else "Running"
+        self.status_label.setText(f"{state}... {self.elapsed.elapsed() / 1000:.1f} s")
+
+    def append_output(self, text):
+        lines = text.count("\n")
+        if self.max_output_lines and lines > self.max_output_lines // 4:
+            text = self.spill(text, lines)
+        self.output_queue.append(text)
+        if not self.output_timer.isActive():
+            self.output_timer.start()
+
+    def drain_output(self):
+        # insert at most one chunk per event loop pass so painting and input keep up with large outputs
+        budget, parts = OUTPUT_CHUNK, []
+        while self.output_queue and budget > 0:
+            text = self.output_queue.popleft()
+            if len(text) > budget:
+                cut = text.rfind("\n", 0, budget) + 1 or budget
+                self.output_queue.appendleft(text[cut:])
+                text = text[:cut]
+            parts.append(text)
+            budget -= len(text)
+        if not self.output_queue:
+            self.output_timer.stop()
+        self.output_box.moveCursor(QTextCursor.MoveOperation.End)
+        self.output_box.insertPlainText("".join(parts))
+        self.output_box.moveCursor(QTextCursor.MoveOperation.End)
+
+    def spill(self, text, lines):
+        path = self.write_spill_file(text)
+        head = "".join(text.splitlines(keepends=True)[:SPILL_PREVIEW_LINES])
+        return f"{head}-- {lines} lines, full result spilled to {path} (Edit > Spilled Results)\n\n"
+
+    def write_spill_file(self, text):
+        if self.spill_dir is None:
+            self.spill_dir = spill_path()
+            os.makedirs(self.spill_dir, exist_ok=True)
+        with tempfile.NamedTemporaryFile("w", encoding="utf-8", prefix=time.strftime("%Y%m%d-%H%M%S-"), suffix=".txt", dir=self.spill_dir, delete=False) as f:
+            f.write(text)
+        self.add_spilled(f.name, text.split("\n", 1)[0])
+        return f.name
+
+    def add_spilled(self, path, title):
+        self.spilled_menu.addAction(QAction(text=f"{os.path.basename(path)}  {title[:60]}", parent=self, triggered=lambda checked=False: QDesktopServices.openUrl(QUrl.fromLocalFile(path))))
+        self.spilled_menu.setEnabled(True)
+
+    def restore_spills(self):
+        # the spills of earlier runs stay reachable from the menu, so outputs that name them don't point nowhere
+        for path in prune_spills(spill_path()):
+            try:
+                with open(path, "r", encoding="utf-8", errors="replace") as f:
+                    self.add_spilled(path, f.readline().rstrip("\n"))
+            except OSError:
+                pass
+
+    def spill_output_box(self):
+        self.drain_output()
+        text = self.output_box.toPlainText()
+        if text.strip():
+            path = self.write_spill_file(text)
+            self.output_box.setPlainText(f"-- previous output spilled to {path} (Edit > Spilled Results)\n\n")
+            self.output_box.moveCursor(QTextCursor.MoveOperation.End)
+
+    def set_output_limit(self):
+        lines, ok = QInputDialog.getInt(self, "Output Line Limit", "Oldest lines are dropped beyond this many lines (0 = unlimited):", self.max_output_lines, 0, 100_000_000, 1000)
+        if ok:
+            self.max_output_lines = lines
+            self.output_box.setMaximumBlockCount(lines)
+
+    def closeEvent(self, event):
+        # the notepads go first: one whose save prompt is cancelled keeps the app open, with the pool and session untouched
+        self.closing = True
+        closed = []
+        for window in self.open_notepads[:]:
+            if not window.close():
+                # the notepads closed meanwhile were closed on their own after all, so they aren't reopened next time
+                self.closing = False
+                for notepad in closed:
+                    self.session.remove_notepad(notepad.session_id)
+                event.ignore()
+                return
+            closed.append(window)
+        if self.job is not None:
+            self.job.cancel()
+            self.job.wait()
+        if self.worker is not None:
+            self.worker.cancel()
+            self.worker.wait()
+            self.query_finished()
+        self.release_results()
+        self.pool.close_all()
+        for catalog in self.catalogs.values():
+            catalog.close()
+        self.store_settings()
+        self.session.close()
+        super().closeEvent(event)
+
+    def action_source(self, window=None):
+        # (database, editor) an action works on: those of the notepad it was started from, which may be bound to
+        # a database of its own, otherwise the main window's. Menu actions pass their checked state as window
+        if not isinstance(window, NotepadWindow):
+            window = QApplication.activeWindow()
+        if isinstance(window, NotepadWindow) and window in self.open_notepads:
+            return window.db_path(), window.editor
+        return self.db_entry.text().strip(), self.text_input
+
+    def export_result(self, window=None):
+        if self.job is not None:
+            self.statusBar().showMessage("Another background job is running.", 3000)
+            return
+        db_path, editor = self.action_source(window)
+        stmt = current_statement(editor)
+        if stmt is None:
+            self.statusBar().showMessage("Write the query to export in the editor first.", 3000)
+            return
+        path, selected = QFileDialog.getSaveFileName(self, "Export Result", "", "CSV (*.csv);;JSON Lines (*.jsonl);;Parquet (*.parquet)")
+        if not path:
+            return
+        if not os.path.splitext(path)[1]:
+            path += selected[selected.index("(*") + 2:-1]
+
+        self.start_job(ExportWorker(stmt.sql, db_path, path, self.pool.attachments.get(db_path), self), "Export Result", f"Exporting to {os.path.basename(path)}...", "Exported", f"export to {path}", "rows written")
+
+    def blob_connection(self, ref):
+        # (conn, release); a read-only connection of its own, except where only the pooled one sees the table.
+        # The BLOB belongs to the database the results came from, which may be a notepad's
+        db_path = self.result_database or self.db_entry.text().strip()
+        if db_path == ":memory:" or (ref.schema or "main") != "main":
+            conn = self.pool.acquire(db_path)
+            return conn, lambda: self.pool.release(conn)
+        conn = connect_readonly(db_path, check_same_thread=False)
+        return conn, conn.close
+
+    def open_blob_source(self):
+        selected = self.output_box.textCursor().selectedText().strip()
+        text, ok = QInputDialog.getText(self, "Open BLOB", "BLOB to open (table.column#rowid):", text=selected if "#" in selected else "")
+        if not ok or not text.strip():
+            return
+        try:
+            ref = parse_source(text)
+        except ValueError as e:
+            QMessageBox.warning(self, "Open BLOB", str(e))
+            return
+        self.inspect_blob(ref)
+
+    def inspect_blob(self, ref):
+        if ref.table is None:
+            self.statusBar().showMessage("The value is computed by the query, not a stored BLOB, so it can't be opened.", 5000)
+            return
+        try:
+            conn, release = self.blob_connection(ref)
+        except Exception as e:
+            QMessageBox.critical(self, "Open BLOB", str(e))
+            return
+        try:
+            # checks the row still holds the same blob, and fills in the size of a typed-in one
+            open_blob(conn, ref).close()
+        except Exception as e:
+            release()
+            QMessageBox.critical(self, "Open BLOB", str(e))
+            return
+        inspector = BlobInspector(conn, ref, release, self)
+        inspector.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose)
+        inspector.save_requested.connect(self.save_blob)
+        inspector.show()
+
+    def save_blob(self, ref):
+        if self.job is not None:
+            self.statusBar().showMessage("Another background job is running.", 3000)
+            return
+        path, _ = QFileDialog.getSaveFileName(self, "Save BLOB", f"{ref.table}-{ref.column}-{ref.rowid}", "All Files (*)")
+        if not path:
+            return
+        try:
+            conn, release = self.blob_connection(ref)
+        except Exception as e:
+            QMessageBox.critical(self, "Save BLOB", str(e))
+            return
+        worker = BlobSaveWorker(conn, ref, path, self)
+        worker.finished.connect(release)
+        self.start_job(worker, "Save BLOB", f"Saving {ref.source}...", "Saved", f"save of {ref.source} to {path}", "bytes written", "bytes")
+
+    def index_advisor(self, window=None):
+        if self.job is not None:
+            self.statusBar().showMessage("Another background job is running.", 3000)
+            return
+        db_path, editor = self.action_source(window)
+        # a notepad's workload is analyzed on the database that notepad runs on
+        sources, current = {"Input box": (lambda: self.text_input.toPlainText(), self.db_entry.text().strip())}, 0
+        for notepad in self.open_notepads:
+            if notepad.editor is editor:
+                current = len(sources)
+            sources[f"Notepad {notepad.session_id}: {notepad.windowTitle()}"] = (lambda editor=notepad.editor: editor.toPlainText(), notepad.db_path())
+        sources["Notebook file..."] = (self.read_notebook, db_path)
+        sources["Statement history"] = (None, db_path)
+        source, ok = QInputDialog.getItem(self, "Index Advisor", "Workload to analyze:", list(sources), current, False)
+        if not ok:
+            return
+        read, db_path = sources[source]
+        if read is None:
+            workload = Counter(profile.sql for profile in self.history_model.profiles if profile.error is None)
+        else:
+            text = read()
+            if text is None:
+                return
+            workload = Counter(stmt.sql for stmt in iter_statements(text) if stmt.sql not in ("exit", "exit()"))
+        if not workload:
+            self.statusBar().showMessage("The workload has no statements to analyze.", 3000)
+            return
+        test = QMessageBox.question(self, "Index Advisor", "Measure each proposed index on a scratch copy of the database?\nThis copies the whole database to a temporary file.") == QMessageBox.StandardButton.Yes
+        worker = AdvisorWorker(db_path, list(workload.items()), test, self)
+        worker.report_ready.connect(self.append_output)
+        self.start_job(worker, "Index Advisor", "Analyzing the workload...", "Analyzed", f"index advisor on {source}", "statements analyzed", "steps")
+
+    def maintenance(self, window=None):
+        if self.job is not None:
+            self.statusBar().showMessage("Another background job is running.", 3000)
+            return
+        db_path, _ = self.action_source(window)
+        if not db_path or db_path == ":memory:" or not os.path.exists(db_path):
+            QMessageBox.warning(self, "Database Maintenance", "Open a database file first.")
+            return
+        try:
+            conn = connect_readonly(db_path)
+            try:
+                stats = database_stats(conn, layout=False)
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            QMessageBox.critical(self, "Database Maintenance", str(e))
+            return
+        dialog = MaintenanceDialog(stats, self)
+        if dialog.exec() != QDialog.DialogCode.Accepted:
+            return
+        task, target = dialog.task_name(), dialog.path()
+        if task in WRITE_TASKS:
+            # an open result cursor would hold a read lock and block ANALYZE or VACUUM
+            self.release_results()
+        verb, noun = ("Copied", "pages") if task in FILE_TASKS else ("Executed", "VM steps")
+        worker = MaintenanceWorker(db_path, task, target, self)
+        worker.report_ready.connect(self.append_output)
+        self.start_job(worker, "Database Maintenance", f"{TASKS[task]}...", verb, f"{TASKS[task]} on {db_path}", "pages", noun)
+
+    def read_notebook(self):
+        file_path, _ = QFileDialog.getOpenFileName(self, "Index Advisor", "", "SQL notebook (*.nbdb)")
+        if not file_path:
+            return None
+        try:
+            with open(file_path, "r", encoding="utf-8") as f:
+                return f.read()
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Could not open file:\n{e}")
+            return None
+
+    def import_data(self):
+        if self.job is not None:
+            self.statusBar().showMessage("Another background job is running.", 3000)
+            return
+        db_path = self.db_entry.text().strip()
+        if not db_path or db_path == ":memory:":
+            QMessageBox.warning(self, "Import Data", "Choose a database file to import into first.")
+            return
+        dialog = ImportDialog(self)
+        if dialog.exec() != QDialog.DialogCode.Accepted:
+            return
+        # an open result cursor would hold a read lock and block the import's commit
+        self.release_results()
+        worker = ImportWorker(db_path, dialog.path(), dialog.table(), dialog.options(), self)
+        self.start_job(worker, "Import Data", f"Importing {os.path.basename(dialog.path())}...", "Imported", f"import of {dialog.path()} into {dialog.table()}", "rows inserted")
+
+    def start_job(self, worker, title, text, verb, summary, unit, noun="rows"):
+        self.job = worker
+        dialog = QProgressDialog(text, "Cancel", 0, 0, self)
+        dialog.setWindowTitle(title)
+        dialog.setMinimumDuration(0)
+        dialog.canceled.connect(worker.cancel)
+        timer = QElapsedTimer()
+        timer.start()
+
+        def progress(rows):
+            rate = rows / max(timer.elapsed(), 1) * 1000
+            dialog.setLabelText(f"{verb} {rows:,} {noun} ({rate:,.0f} {noun}/s)")
+
+        def done(rows):
+            self.append_output(f">>> -- {summary}\n{rows:,} {unit} in {timer.elapsed() / 1000:.2f} s\n\n")
+
+        def finished():
+            dialog.reset()
+            dialog.deleteLater()
+            worker.deleteLater()
+            self.job = None
+
+        worker.progress.connect(progress)
+        worker.done.connect(done)
+        worker.failed.connect(lambda msg: QMessageBox.critical(self, title, msg))
+        worker.finished.connect(finished)
+        worker.start()
+        dialog.show()
+
+    def db_changed(self):
+        db_path = self.db_entry.text().strip()
+        if db_path != self.active_db:
+            self.pool.close(self.active_db)
+            self.active_db = db_path
+            self.schema_dock.set_catalog(self.catalog())
+            self.store_settings()
+            for notepad in self.open_notepads:
+                notepad.update_binding()
+
+    def catalog(self, database=None):
+        # catalogs stay cached per database, so switching back to a database costs one schema_version check
+        database = database or self.active_db
+        if not database or database == ":memory:":
+            return None
+        catalog = self.catalogs.get(database)
+        if catalog is None:
+            catalog = self.catalogs[database] = SchemaCatalog(database, self.pool.attachments.get(database))
+        return catalog
+
+    def completions(self, prefix, qualifier, database=None):
+        return complete(self.catalog(database), prefix, qualifier)
+
+    def attach_database(self, database, window=None):
+        window = window or self
+        if not database:
+            QMessageBox.warning(window, "Attach Database", "Choose the database to attach to first.")
+            return
+        file, _ = QFileDialog.getOpenFileName(window, "Attach Database", "", "SQLite DB (*.db *.sqlite3);;All files (*)")
+        if not file:
+            return
+        stem = "".join(c if c.isalnum() else "_" for c in os.path.splitext(os.path.basename(file))[0])
+        alias, ok = QInputDialog.getText(window, "Attach Database", f"Alias for {os.path.basename(file)} in {os.path.basename(database)}:", text=stem if stem[:1].isalpha() else f"db_{stem}")
+        if not ok:
+            return
+        attachments = self.pool.attachments.get(database, {})
+        text = "\n".join(f"{name} = {path}" for name, path in attachments.items())
+        try:
+            self.set_attachments(database, parse_attachments(f"{text}\n{alias.strip()} = {file}"), window)
+        except ValueError as e:
+            QMessageBox.critical(window, "Error", str(e))
+
+    def edit_attachments(self, database, window=None):
+        window = window or self
+        if not database:
+            QMessageBox.warning(window, "Attached Databases", "Choose the database to attach to first.")
+            return
+        current = "\n".join(f"{alias} = {path}" for alias, path in self.pool.attachments.get(database, {}).items())
+        text, ok = QInputDialog.getMultiLineText(window, "Attached Databases", f"Attached to every connection of {os.path.basename(database)}, one \"alias = path\" per line:", current)
+        if ok:
+            try:
+                self.set_attachments(database, parse_attachments(text), window)
+            except ValueError as e:
+                QMessageBox.critical(window, "Error", str(e))
+
+    def set_attachments(self, database, attachments, window=None):
+        # ATTACH would create a missing file, so a typo doesn't silently attach an empty database
+        missing = [path for path in attachments.values() if path != ":memory:" and not os.path.exists(path)]
+        if missing:
+            QMessageBox.critical(window or self, "Error", f"Database file not found:\n{missing[0]}")
+            return
+        self.pool.set_attachments(database, attachments)
+        catalog = self.catalogs.pop(database, None)
+        if catalog is not None:
+            catalog.close()
+        if database == self.active_db:
+            self.schema_dock.set_catalog(self.catalog())
+        self.result_cache.invalidate(database)
+        self.store_settings()
+        for notepad in self.open_notepads:
+            notepad.update_binding()
+
+    def edit_pragmas(self):
+        current = "\n".join(f"{name} = {'' if value is None else value}" for name, value in self.pool.pragmas.items())
+        text, ok = QInputDialog.getMultiLineText(self, "Connection Pragmas", "Applied once to every new connection (empty value = leave unchanged):", current)
+        if ok:
+            try:
+                self.pool.set_pragmas(parse_pragmas(text))
+            except ValueError as e:
+                QMessageBox.critical(self, "Error", str(e))
+
+    def set_table_format(self, fmt):
+        self.current_table_format = fmt
+
+    def set_page_size(self):
+        size, ok = QInputDialog.getInt(self, "Page Size", "Rows fetched per page (0 = fetch all rows):", self.page_size, 0, 10_000_000, 100)
+        if ok:
+            self.page_size = size
+
+    def theme_sys(self):
+        self.current_theme = "sys"
+        self.setPalette(self.appo.palette())
+        self.menuBar().setStyleSheet(self.appo.styleSheet())
+
+    def theme_light(self):
+        self.current_theme = "light"
+        self.setPalette(palette("light"))
+        self.menuBar().setStyleSheet(MENU_QSS_LIGHT)
+
+    def theme_dark(self):
+        self.current_theme = "dark"
+        self.setPalette(palette("dark"))
+        self.menuBar().setStyleSheet(MENU_QSS_DARK)
+    
+    def handle_check(self, checked):
+        if checked:
+            self.text_input.clear()
+
+    def clear_outp(self):
+        self.output_queue.clear()
+        self.output_box.clear()
+        
+    def new_database(self):
+        file, _ = QFileDialog.getSaveFileName(self, "Create Database", "", "SQLite DB (*.db *.sqlite3)")
+        if file:
+            self.db_entry.setText(file)
+            self.db_changed()
+
+    def open_database(self):
+        file, _ = QFileDialog.getOpenFileName(self, "Select Database", "", "SQLite DB (*.db *.sqlite3)")
+        if file:
+            self.db_entry.setText(file)
+            self.db_changed()
+
+    def new_file(self):
+        notepad = NotepadWindow(parent=self)
+        self.open_notepads.append(notepad)
+        notepad.show()
+
+    def open_file(self):
+        file_path, _ = QFileDialog.getOpenFileName(self, "Open File", "", "SQL notebook (*.nbdb)")
+        try:
+            if file_path and file_path.endswith('.nbdb'):
+                notepad = NotepadWindow(file_path=file_path, parent=self)
+                self.open_notepads.append(notepad)
+                notepad.show()
+            elif file_path and not file_path.endswith('.nbdb'):
+                raise Exception("Different file format")
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Could not open file:\n{e}")
+
+    def open_help(self, path):
+        from webbrowser import open_new_tab
+        open_new_tab(path)
+
+    def show_about(self):
+        QMessageBox.about(self, "About", "SQLite GUI App\n© 2025 KCoder-programming\nLicensed under CC BY-NC 4.0")
+
+    def show_license(self):
+        QMessageBox.about(self, "License", """Creative Commons Attribution-NonCommercial 4.0 International (CC BY-NC 4.0)
+
+Copyright © 2025 KCoder Programming
+
+You are free to:
+✔ Share — copy and redistribute the material in any medium or format
+✔ Adapt — remix, transform, and build upon the material
+
+Under the following terms:
+❗ Attribution — You must give appropriate credit, provide a link to the license, and indicate if changes were made.
+❗ NonCommercial — You may not use the material for commercial purposes.
+
+No additional restrictions — You may not apply legal terms or technological measures that legally restrict others from doing anything the license permits.
+
+License Link: https://creativecommons.org/licenses/by-nc/4.0/""")
+        
+    def wheelEvent_textinput(self, event):
+        if event.modifiers() & Qt.KeyboardModifier.ControlModifier:
+            if event.angleDelta().y() > 0:
+                self.text_input.zoomIn(1)
+            else:
+                self.text_input.zoomOut(1)
+        else:
+            QPlainTextEdit.wheelEvent(self.text_input, event)
+
+
+def main(timings=None):
+    # timings: the import times measured by pysqlite --profile-startup, which turns the profile on
+    profile = StartupProfile(timings) if timings is not None else None
+    app = QApplication(sys.argv)
+    app.setOrganizationName("KCoder-programming")
+    app.setApplicationName("sqlite-gui-pyside")
+    if profile is not None:
+        profile.mark("QApplication")
+    window = Mainwindow(app, profile)
+    window.show()
+    if profile is not None:
+        profile.mark("show")
+    return app.exec()
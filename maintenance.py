@@ -0,0 +1,170 @@
+"""Module running database maintenance: ANALYZE, optimize, integrity checks, VACUUM and online backups."""
+import os
+import sqlite3
+import tempfile
+from blobs import format_size
+
+# pages copied per backup step; other connections can read and write the database between steps
+BACKUP_PAGES = 256
+# VM instructions between two progress callbacks of the statement tasks
+PROGRESS_STEPS = 100_000
+TASKS = {"analyze": "ANALYZE", "optimize": "PRAGMA optimize", "quick_check": "Quick check", "integrity_check": "Integrity check", "vacuum": "VACUUM", "vacuum_into": "VACUUM INTO", "backup": "Online backup"}
+TASK_HELP = {
+    "analyze": "Gathers the statistics the query planner uses to choose indexes.",
+    "optimize": "Runs ANALYZE only on the tables whose statistics are missing or out of date.",
+    "quick_check": "Checks every page for corruption, without verifying that indexes match their tables.",
+    "integrity_check": "Checks every page for corruption and that every index matches its table.",
+    "vacuum": "Rebuilds the database in place, dropping free pages and defragmenting tables and indexes. Needs the database to itself.",
+    "vacuum_into": "Writes a compacted, defragmented copy to a new file; the database stays usable meanwhile.",
+    "backup": "Copies the database page by page to a file while it stays usable.",
+}
+# the tasks that write to the database and need a writable connection
+WRITE_TASKS = {"analyze", "optimize", "vacuum"}
+# the tasks that write a new file
+FILE_TASKS = {"vacuum_into", "backup"}
+_SQL = {"analyze": "ANALYZE", "optimize": "PRAGMA optimize", "quick_check": "PRAGMA quick_check", "integrity_check": "PRAGMA integrity_check", "vacuum": "VACUUM", "vacuum_into": "VACUUM INTO ?"}
+# leaf pages per table and index in key order; one that doesn't directly follow the previous one costs a seek on a scan
+_LAYOUT = """SELECT sum(leaf), sum(leaf AND prev IS NOT NULL AND pageno <> prev + 1), sum(unused), sum(pgsize)
+FROM (SELECT pagetype = 'leaf' AS leaf, pageno, unused, pgsize, lag(pageno) OVER (PARTITION BY name, pagetype = 'leaf' ORDER BY path) AS prev FROM dbstat)"""
+
+
+class DatabaseStats:
+    __slots__ = ("file_size", "page_size", "page_count", "freelist_count", "leaf_pages", "fragmented_pages", "unused_bytes", "used_bytes")
+
+    @property
+    def fragmentation(self):
+        # share of the leaf pages out of key order; None without the dbstat table
+        if self.leaf_pages is None:
+            return None
+        return self.fragmented_pages / self.leaf_pages if self.leaf_pages else 0.0
+
+    @property
+    def unused(self):
+        # share of the bytes in used pages that hold no data
+        if self.unused_bytes is None:
+            return None
+        return self.unused_bytes / self.used_bytes if self.used_bytes else 0.0
+
+
+def database_stats(conn: sqlite3.Connection, layout: bool = True):
+    # layout reads every page through dbstat; without it only the header counts are read
+    stats = DatabaseStats()
+    stats.page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+    stats.page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+    stats.freelist_count = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    path = conn.execute("PRAGMA database_list").fetchone()[2]
+    stats.file_size = os.path.getsize(path) if path and os.path.exists(path) else stats.page_count * stats.page_size
+    stats.leaf_pages = stats.fragmented_pages = stats.unused_bytes = stats.used_bytes = None
+    if layout:
+        try:
+            leaf, fragmented, unused, used = conn.execute(_LAYOUT).fetchone()
+        except sqlite3.OperationalError as e:
+            # SQLite built without SQLITE_ENABLE_DBSTAT_VTAB; an interrupt is passed on
+            if "dbstat" not in str(e):
+                raise
+        else:
+            stats.leaf_pages, stats.fragmented_pages, stats.unused_bytes, stats.used_bytes = leaf or 0, fragmented or 0, unused or 0, used or 0
+    return stats
+
+def run_task(conn: sqlite3.Connection, task: str, target: str = None, progress=None):
+    # returns (stats before, stats after, result lines); the after stats of vacuum_into and backup are the
+    # new file's, the integrity checks have none. progress(count) returns False to cancel
+    if task not in TASKS:
+        raise ValueError(f"Unknown maintenance task: {task}")
+    if task in FILE_TASKS:
+        if not target:
+            raise ValueError("Choose the file to write first.")
+        source = conn.execute("PRAGMA database_list").fetchone()[2]
+        if source and os.path.exists(target) and os.path.samefile(source, target):
+            raise ValueError("The file to write is the database itself.")
+    before = database_stats(conn)
+    if task == "backup":
+        return before, _write_file(target, lambda path: backup(conn, path, progress)), []
+    if task == "vacuum_into":
+        return before, _write_file(target, lambda path: _execute(conn, _SQL[task], progress, (path,))), []
+    lines = [str(row[0]) for row in _execute(conn, _SQL[task], progress)]
+    if task in ("quick_check", "integrity_check"):
+        return before, None, lines
+    if task == "vacuum":
+        # in WAL mode the rebuilt pages sit in the WAL until a checkpoint; truncating it lets the file shrink now
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+    return before, database_stats(conn), lines
+
+def backup(conn: sqlite3.Connection, path: str, progress=None, pages: int = BACKUP_PAGES):
+    # an online backup: BACKUP_PAGES at a time, so writers on other connections only wait for one step
+    def step(status, remaining, total):
+        if progress is not None and progress(total - remaining) is False:
+            raise InterruptedError("Backup cancelled.")
+
+    target = sqlite3.connect(path)
+    try:
+        conn.backup(target, pages=pages, progress=step)
+    finally:
+        target.close()
+
+def _execute(conn, sql, progress, params=()):
+    # the progress handler reports VM steps, or the pages written so far for VACUUM INTO
+    calls = 0
+    target = params[0] if params else None
+    page_size = conn.execute("PRAGMA page_size").fetchone()[0] if target else None
+
+    def handler():
+        nonlocal calls
+        calls += 1
+        done = os.path.getsize(target) // page_size if target else calls * PROGRESS_STEPS
+        return progress(done) is False
+
+    if progress is not None:
+        conn.set_progress_handler(handler, PROGRESS_STEPS)
+    try:
+        return conn.execute(sql, params).fetchall()
+    except sqlite3.OperationalError as e:
+        if progress is not None and str(e) == "interrupted":
+            raise InterruptedError("Maintenance cancelled.") from e
+        raise
+    finally:
+        if progress is not None:
+            conn.set_progress_handler(None, 0)
+
+def _write_file(path, write):
+    # written to a temporary file next to path, which replaces it only once complete; returns the new file's stats.
+    # They are read through a writable connection, whose close removes the -wal and -shm files a WAL database gets
+    fd, tmp_path = tempfile.mkstemp(prefix=".maintenance-", suffix=".db", dir=os.path.dirname(os.path.abspath(path)))
+    os.close(fd)
+    try:
+        write(tmp_path)
+        conn = sqlite3.connect(tmp_path)
+        try:
+            stats = database_stats(conn)
+        finally:
+            conn.close()
+        os.replace(tmp_path, path)
+        return stats
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+def format_stats(stats: DatabaseStats):
+    parts = [format_size(stats.file_size), f"{stats.page_count:,} pages of {stats.page_size:,} bytes", f"{stats.freelist_count:,} free"]
+    if stats.fragmentation is not None:
+        parts.append(f"{stats.fragmentation:.1%} fragmented")
+        parts.append(f"{stats.unused:.1%} unused space in used pages")
+    return ", ".join(parts)
+
+def format_report(task: str, before: DatabaseStats, after: DatabaseStats = None, lines=(), target: str = None):
+    out = [f"-- {TASKS[task]}: {target}" if target else f"-- {TASKS[task]}"]
+    out.extend(lines)
+    if after is None:
+        out.append(f"-- database: {format_stats(before)}")
+        return "\n".join(out) + "\n"
+    rows = [("file size", format_size(before.file_size), format_size(after.file_size)), ("pages", f"{before.page_count:,}", f"{after.page_count:,}"), ("free pages", f"{before.freelist_count:,}", f"{after.freelist_count:,}")]
+    if before.fragmentation is not None and after.fragmentation is not None:
+        rows.append(("fragmentation", f"{before.fragmentation:.1%}", f"{after.fragmentation:.1%}"))
+        rows.append(("unused space", f"{before.unused:.1%}", f"{after.unused:.1%}"))
+    width = max(len(name) for name, _, _ in rows)
+    out.append(f"-- {'':<{width}}  {'before':>12}  {'after':>12}")
+    out.extend(f"-- {name:<{width}}  {old:>12}  {new:>12}" for name, old, new in rows)
+    return "\n".join(out) + "\n"
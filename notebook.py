@@ -0,0 +1,34 @@
+"""Module reading and writing notebook files."""
+import os
+import tempfile
+
+LOAD_CHUNK = 64 * 1024
+BACKGROUND_BYTES = 2 * 1024 * 1024
+
+
+def read_chunks(path: str, size: int = LOAD_CHUNK):
+    # yields (text, bytes read so far); the byte count is the raw file position, for progress only
+    with open(path, "r", encoding="utf-8") as f:
+        while True:
+            text = f.read(size)
+            if not text:
+                return
+            yield text, f.buffer.tell()
+
+def write_atomic(path: str, text: str):
+    # the old file is only replaced once the new one is completely on disk
+    fd, tmp_path = tempfile.mkstemp(prefix=".save-", suffix=".nbdb", dir=os.path.dirname(os.path.abspath(path)))
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        if os.path.exists(path):
+            os.chmod(tmp_path, os.stat(path).st_mode & 0o7777)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
@@ -0,0 +1,80 @@
+"""Module running read-only statements concurrently on read-only connections."""
+import os
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from connections import apply_pragmas, connect_readonly
+from querycache import StatementTracker
+
+# statements that touch these are kept on the main connection even though they write no table data
+_SESSION_ACTIONS = {sqlite3.SQLITE_PRAGMA, sqlite3.SQLITE_TRANSACTION, sqlite3.SQLITE_SAVEPOINT, sqlite3.SQLITE_ATTACH, sqlite3.SQLITE_DETACH}
+
+
+class ReadTracker(StatementTracker):
+    def __call__(self, action, arg1, arg2, db_name, trigger):
+        result = super().__call__(action, arg1, arg2, db_name, trigger)
+        if action in _SESSION_ACTIONS:
+            self.readonly = False
+        return result
+
+
+class ReaderPool:
+    # one read-only connection per worker thread, opened on first use; sqlite releases the GIL while a
+    # statement steps, so statements on different connections really run at the same time
+    def __init__(self, database: str, workers: int = None, pragmas: dict = None, attachments: dict = None):
+        if database == ":memory:" or not database:
+            raise ValueError("Parallel reads need a database file.")
+        self.database = database
+        self.workers = workers or os.cpu_count() or 1
+        self.attachments = dict(attachments or {})
+        # journal_mode can't be changed on a read-only connection
+        self.pragmas = {name: value for name, value in (pragmas or {}).items() if name != "journal_mode"}
+        self.tracker = ReadTracker()
+        self._classifier = None
+        self._local = threading.local()
+        self._conns = []
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="reader")
+
+    def connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = connect_readonly(self.database, self.attachments, check_same_thread=False)
+            apply_pragmas(conn, self.pragmas)
+            self._local.conn = conn
+            with self._lock:
+                self._conns.append(conn)
+        return conn
+
+    def classify(self, sql: str):
+        # (readonly, cacheable); a statement that doesn't prepare here, e.g. on a table the notebook
+        # hasn't created yet or a temp table of the main connection, is left to the main connection
+        if self._classifier is None:
+            self._classifier = connect_readonly(self.database, self.attachments, check_same_thread=False)
+            self._classifier.set_authorizer(self.tracker)
+        self.tracker.reset()
+        try:
+            self._classifier.execute(f"EXPLAIN {sql}").close()
+        except sqlite3.Error:
+            return False, False
+        return self.tracker.classify(f"EXPLAIN {sql}")
+
+    def submit(self, fn, *args):
+        return self._executor.submit(lambda: fn(self.connection(), *args))
+
+    def interrupt(self):
+        with self._lock:
+            conns = list(self._conns)
+        for conn in conns:
+            try:
+                conn.interrupt()
+            except sqlite3.ProgrammingError:
+                pass
+
+    def close(self):
+        self.interrupt()
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        for conn in self._conns + ([self._classifier] if self._classifier is not None else []):
+            conn.close()
+        self._conns = []
+        self._classifier = None
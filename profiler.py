@@ -0,0 +1,109 @@
+"""Module measuring statement cost and formatting query plans."""
+import re
+import time
+
+STEP_INTERVAL = 1000
+HISTORY_LIMIT = 10000
+# a plain "SCAN table" visits every row; scans through an index or of a constant row are not flagged
+_FULL_SCAN = re.compile(r"SCAN (?:TABLE )?([^\s(]\S*)(?: AS \S+)?$")
+
+
+class StatementProfile:
+    __slots__ = ("sql", "line", "database", "started", "wall", "exec", "fetch", "render", "rows", "changes", "steps", "cached", "error")
+
+    def __init__(self, sql: str, line: int, database: str):
+        self.sql = sql
+        self.line = line
+        self.database = database
+        self.started = time.time()
+        self.wall = self.exec = self.fetch = self.render = 0.0
+        self.rows = None
+        self.changes = 0
+        self.steps = None
+        self.cached = False
+        self.error = None
+
+    @property
+    def status(self):
+        if self.error is not None:
+            return "error"
+        return "cached" if self.cached else "ok"
+
+    def summary(self):
+        parts = [f"exec {self.exec * 1000:.2f} ms"]
+        if self.rows is not None:
+            parts += [f"fetch {self.fetch * 1000:.2f} ms", f"render {self.render * 1000:.2f} ms"]
+        text = f"-- {self.wall * 1000:.2f} ms ({', '.join(parts)})"
+        if self.rows is not None:
+            text += f", {self.rows} rows"
+        text += f", {self.changes} changes"
+        if self.steps is not None:
+            text += f", ~{self.steps:,} VM steps"
+        return text + (" [cached]" if self.cached else "")
+
+
+class Profiler:
+    # one per run; the progress handler counts virtual machine steps in units of STEP_INTERVAL
+    def __init__(self, database: str, count_steps: bool = False, annotate: bool = True):
+        self.database = database
+        self.count_steps = count_steps
+        self.annotate = annotate
+        self.steps = 0
+        self.last = None
+        self._started = 0.0
+        self._changes = 0
+        self._steps = 0
+
+    def attach(self, conn):
+        if self.count_steps:
+            conn.set_progress_handler(self._tick, STEP_INTERVAL)
+
+    def detach(self, conn):
+        if self.count_steps:
+            conn.set_progress_handler(None, 0)
+
+    def _tick(self):
+        self.steps += STEP_INTERVAL
+        return 0
+
+    def start(self, conn, stmt):
+        self.last = StatementProfile(stmt.sql, stmt.line, self.database)
+        self._changes = conn.total_changes
+        self._steps = self.steps
+        self._started = time.perf_counter()
+        return self.last
+
+    def finish(self, conn, profile: StatementProfile):
+        profile.wall = time.perf_counter() - self._started
+        profile.changes = conn.total_changes - self._changes
+        if self.count_steps:
+            profile.steps = self.steps - self._steps
+        return profile
+
+
+def explain_plan(conn, sql: str):
+    return conn.execute(f"EXPLAIN QUERY PLAN {sql}").fetchall()
+
+def full_scan(detail: str):
+    # the table a plan row scans in full, or None
+    match = _FULL_SCAN.match(detail)
+    return match.group(1) if match else None
+
+def full_scans(plan):
+    return [table for *_, detail in plan if (table := full_scan(detail))]
+
+def format_plan(plan):
+    # rows are (id, parent, notused, detail); children are indented under their parent
+    depth = {0: -1}
+    lines = []
+    for node, parent, _, detail in plan:
+        depth[node] = depth.get(parent, -1) + 1
+        line = "   " * depth[node] + "|--" + detail
+        if _FULL_SCAN.match(detail):
+            line += "    <-- full table scan"
+        lines.append(line)
+    if not lines:
+        return "QUERY PLAN\n(no plan)"
+    scans = full_scans(plan)
+    footer = f"\n-- {len(scans)} full table scan{'s' if len(scans) != 1 else ''}: {', '.join(scans)}" if scans else "\n-- no full table scans"
+    return "QUERY PLAN\n" + "\n".join(lines) + footer
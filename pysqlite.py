@@ -9,498 +9,361 @@ You may use, modify, and share this app, but not for commercial purposes.
 More info: https://creativecommons.org/licenses/by-nc/4.0/
 """
 
-from PySide6.QtWidgets import QApplication, QMainWindow, QMenu, QMenuBar, QWidget, QHBoxLayout, QVBoxLayout, QPushButton, QLabel, QLineEdit, QFileDialog, QMessageBox, QPlainTextEdit, QSplitter
-from PySide6.QtGui import QIcon, QFont, QAction, QTextCursor, QActionGroup
-from PySide6.QtCore import Qt
-from theme import LIGHT_PALETTE, DARK_PALETTE, MENU_QSS_DARK, MENU_QSS_LIGHT
+from sqlsplit import iter_statements, split_statements
+from querycache import ResultCache
+from connections import apply_pragmas, attach_databases, parse_attachments, parse_pragmas
+from profiler import Profiler, StatementProfile, explain_plan, format_plan
+from parallel import ReaderPool
+import argparse
+import os
+import re
 import sys
-import json
-from webbrowser import open_new_tab
+from collections import deque
+from concurrent.futures import Future
 import sqlite3
-from tabulate import tabulate
-
-
-def run_sql_query(query: str, database: str, fmt: str):
-    def format_row(row):
-        return ["<BLOB>" if isinstance(col, (bytes, bytearray)) else col for col in row]
-
-    query_list = [i.replace('\n', '') for i in query.split(';') if i.strip()]
-    if not query_list:
-        return ">>>\n\n"
-    elif 'exit' in query_list or 'exit()' in query_list:
-        sys.exit()
-    
-    with sqlite3.connect(database, autocommit=True) as conn:
-        cursor = conn.cursor()
-        return_string = ""
-        for query in query_list:
-            try:
-                cursor.execute(query)
-                data1 = [format_row(row) for row in cursor.fetchall()]
-                header1 = [desc[0] for desc in cursor.description if desc[0]]
-                if data1:
-                    if header1 and len(header1) == len(data1[0]):
-                        return_string = return_string + f">>> {query}\n{tabulate(data1, header1, tablefmt=fmt)}\n\n"
-                    else:
-                        return_string = return_string + f">>> {query}\n{tabulate(data1, tablefmt=fmt)}\n\n"
-                else:
-                    return_string = return_string + f">>> {query}\nEmpty Data[]\nQuery Executed Successfully\n\n"
-                
-            except Exception as e:
-                return_string = return_string + f">>> {query}\n{e}\n\n"
-        
-    return return_string
-
-def save_settings(db_path, table_format, clear_input_checked, theme):
-    data = {"last_db": db_path, "table_format": table_format, "clear_input": clear_input_checked, "theme": theme}
-    with open(r"files\settings.json", "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=4)
-
-def load_settings():
-    try:
-        with open(r"files\settings.json", "r", encoding="utf-8") as f:
-            data = json.load(f)
-        return data
-    except Exception:
-        save_settings("database.db", "simple_outline", False, "sys")
-        return {"last_db": "database.db", "table_format": "simple_outline", "clear_input": False, "theme": "sys"}
-
-class HScrollTextEdit(QPlainTextEdit):
-    def wheelEvent(self, event):
-        dx_angle = event.angleDelta().x()
-        dy_angle = event.angleDelta().y()
-
-        scroll_bar = self.horizontalScrollBar()
-
-        if dx_angle != 0:  # Traditional horizontal scroll
-            scroll_bar.setValue(scroll_bar.value() - dx_angle)
-        elif event.modifiers() & Qt.KeyboardModifier.ShiftModifier:
-            scroll_bar.setValue(scroll_bar.value() - dy_angle)
-        else:
-            super().wheelEvent(event)
-
-class NotepadWindow(QMainWindow):
-    def __init__(self, file_path=None, parent=None):
-        super().__init__()
-        self.file_path = file_path
-        self.parent_window = parent
-        self.setPalette(parent.palette())
-        self.setWindowTitle("Untitled - Notepad" if not file_path else f"{file_path} - Notepad")
-        self.setWindowIcon(QIcon(r"files\icon1.ico"))
-        if parent:
-            self.resize(parent.width()-40, parent.height()-30)
+import time
+from render import render_table
+from blobs import lazy_sql, display_value
+
+# imported one at a time by --profile-startup, so each line shows what that module adds
+STARTUP_MODULES = ("PySide6.QtCore", "PySide6.QtGui", "PySide6.QtWidgets", "theme", "session", "catalog", "widgets", "gui")
+# statements that begin, end or nest a transaction; a script with any of them can't be wrapped in one
+_TRANSACTION_CONTROL = re.compile(r"(?:BEGIN|COMMIT|END|ROLLBACK|SAVEPOINT|RELEASE)\b", re.I)
+TABULATE_FORMATS = ['double_grid', 'double_outline', 'fancy_grid', 'fancy_outline', 'github', 'html', 'latex', 'mediawiki', 'moinmoin', 'orgtbl', 'grid', 'outline', 'pipe', 'plain', 'presto', 'pretty', 'psql', 'rst', 'simple', 'simple_grid', 'simple_outline', 'textile']
+
+
+def format_row(row):
+    return [display_value(col) if isinstance(col, (bytes, bytearray)) else col for col in row]
+
+class ResultPager:
+    def __init__(self, cursor: sqlite3.Cursor, fmt: str, page_size: int = 0, hint: str = "F6 to fetch the next page", native: bool = False):
+        self.cursor = cursor
+        self.fmt = fmt
+        self.native = native
+        self.page_size = page_size
+        self.hint = hint
+        self.header = [desc[0] for desc in cursor.description if desc[0]]
+        self.fetched = 0
+        self.exhausted = False
+        self.fetch_time = self.render_time = 0.0
+        self._lookahead = []
+
+    def next_page(self):
+        started = time.perf_counter()
+        if self.page_size:
+            # one row of lookahead tells us whether another page exists without a second round-trip
+            rows = self._lookahead + self.cursor.fetchmany(self.page_size + 1 - len(self._lookahead))
+            rows, self._lookahead = rows[:self.page_size], rows[self.page_size:]
+            self.exhausted = not self._lookahead
         else:
-            self.resize(600, 400)
-
-        self.editor = QPlainTextEdit()
-        self.editor.setFont(QFont("Consolas", 13))
-        self.setCentralWidget(self.editor)
-        self.editor.textChanged.connect(self._mark_modified)
-        self.is_modified = False
-        self.editor.wheelEvent = self.wheelEvent_textinput.__get__(self)
-
-        if self.file_path:
-            try:
-                with open(self.file_path, "r", encoding="utf-8") as f:
-                    self.editor.setPlainText(f.read())
-            except Exception as e:
-                QMessageBox.critical(self, "Error", f"Could not open file:\n{e}")
-
-        menu_bar = self.menuBar()
-
-        file_menu = menu_bar.addMenu("&File")
-        file_menu.addAction(QAction("New", self, shortcut="Ctrl+N", triggered=self.new_file))
-        file_menu.addAction(QAction("Open...", self, shortcut="Ctrl+O", triggered=self.open_file))
-        file_menu.addSeparator()
-        file_menu.addAction(QAction("Save", self, shortcut="Ctrl+S", triggered=self.save_file))
-        file_menu.addAction(QAction("Save As...", self, shortcut="Ctrl+Shift+S", triggered=self.save_file_as))
-        file_menu.addSeparator()
-        file_menu.addAction(QAction("Quit", self, shortcut="Escape", triggered=self.close))
-
-        edit_menu = menu_bar.addMenu("&Edit")
-        edit_menu.addAction(QAction("Undo", self, shortcut="Ctrl+Z", triggered=self.editor.undo))
-        edit_menu.addAction(QAction("Redo", self, shortcut="Ctrl+Y", triggered=self.editor.redo))
-        edit_menu.addSeparator()
-        edit_menu.addAction(QAction("Cut", self, shortcut="Ctrl+X", triggered=self.editor.cut))
-        edit_menu.addAction(QAction("Copy", self, shortcut="Ctrl+C", triggered=self.editor.copy))
-        edit_menu.addAction(QAction("Paste", self, shortcut="Ctrl+V", triggered=self.editor.paste))
-        edit_menu.addSeparator()
-        edit_menu.addAction(QAction("Select All", self, shortcut="Ctrl+A", triggered=self.editor.selectAll))
-        edit_menu.addSeparator()
-        edit_menu.addAction(QAction(text="Inc Size", parent=self, shortcut="Ctrl++", triggered=lambda: self.editor.zoomIn(1)))
-        edit_menu.addAction(QAction(text="Dec Size", parent=self, shortcut="Ctrl+-", triggered=lambda: self.editor.zoomOut(1)))
-        edit_menu.addAction(QAction(text="Reset Zoom", parent=self, shortcut="Ctrl+=", triggered=lambda: self.editor.setFont(QFont("Consolas", 13))))
-
-        menu_bar.addAction(QAction(text="Run", parent=self, shortcut="F5", triggered=self.run))
-        menu_bar.setStyleSheet(parent.styleSheet())
-
-    def _mark_modified(self):
-        self.is_modified = True
-
-    def closeEvent(self, event):
-        if self.is_modified:
-            reply = QMessageBox.question(self, "Save Changes?", "Do you want to save changes before closing?", QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No | QMessageBox.StandardButton.Cancel, QMessageBox.StandardButton.Yes)
-
-            if reply == QMessageBox.StandardButton.Yes:
-                result = self.save_file()
-                if result:
-                    if self.parent_window and self in self.parent_window.open_notepads:
-                        self.parent_window.open_notepads.remove(self)
-                    event.accept()
-            elif reply == QMessageBox.StandardButton.No:
-                if self.parent_window and self in self.parent_window.open_notepads:
-                    self.parent_window.open_notepads.remove(self)
-                event.accept()
-            else:
-                event.ignore()
+            rows = self.cursor.fetchall()
+            self.exhausted = True
+        if self.exhausted:
+            self.cursor.close()
+
+        first = self.fetched + 1
+        self.fetched += len(rows)
+        rendering = time.perf_counter()
+        self.fetch_time += rendering - started
+        data1 = [format_row(row) for row in rows]
+        del rows
+        if not data1:
+            return "Empty Data[]\nQuery Executed Successfully" if first == 1 else "No more rows."
+
+        if self.header and len(self.header) == len(data1[0]):
+            text = render_table(data1, self.header, self.fmt, self.native)
         else:
-            if self.parent_window and self in self.parent_window.open_notepads:
-                self.parent_window.open_notepads.remove(self)
-            event.accept()
-
-    # File actions
-    def new_file(self):
-        reply = QMessageBox.question(self, "Confirm Action", "Do you want to save changes before closing?", QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No | QMessageBox.StandardButton.Cancel, QMessageBox.StandardButton.Yes)
-        if reply == QMessageBox.StandardButton.Yes:
-            result = self.save_file()
-        elif reply == QMessageBox.StandardButton.No:
-            result = True
-        elif reply == QMessageBox.StandardButton.Cancel:
-            result = False
-        if result:
-            self.editor.clear()
-            self.setWindowTitle("Untitled - Notepad")
-            self.file_path = None
-            self.is_modified = False
-
-    def open_file(self):
-        reply = QMessageBox.question(self, "Confirm Action", "Do you want to save changes before closing?", QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No | QMessageBox.StandardButton.Cancel, QMessageBox.StandardButton.Yes)
-        if reply == QMessageBox.StandardButton.Yes:
-            result = self.save_file()
-        elif reply == QMessageBox.StandardButton.No:
-            result = True
-        elif reply == QMessageBox.StandardButton.Cancel:
-            result = False
-        
-        if result:
-            file_path, _ = QFileDialog.getOpenFileName(self, "Open File", "", "SQL notebook (*.nbdb)")
+            text = render_table(data1, None, self.fmt, self.native)
+        self.render_time += time.perf_counter() - rendering
+        if not self.exhausted:
+            text += f"\n-- rows {first}-{self.fetched} shown, more available ({self.hint})"
+        elif first > 1:
+            text += f"\n-- rows {first}-{self.fetched} of {self.fetched}"
+        return text
+
+    def close(self):
+        self.exhausted = True
+        self._lookahead = []
+        self.cursor.close()
+
+def iter_sql_query(statements, conn: sqlite3.Connection, fmt: str, page_size: int = 0, grid: bool = False, cache: ResultCache = None, database: str = None, transaction: bool = False, profiler: Profiler = None, explain: bool = False, native: bool = False):
+    tracker = cache.tracker(conn) if cache is not None else None
+    if transaction:
+        conn.execute("BEGIN")
+    try:
+        for stmt in statements:
+            query = stmt.display
+            profile = profiler.start(conn, stmt) if profiler is not None else None
+            result = None
             try:
-                if file_path and file_path.endswith('.nbdb'):
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        self.editor.setPlainText(f.read())
-                    self.file_path = file_path
-                    self.setWindowTitle(f"{file_path} - Notepad")
-                    self.is_modified = False
-                elif file_path and not file_path.endswith('.nbdb'):
-                    raise Exception("Different file format")
+                body, key = None, None
+                if explain:
+                    body = format_plan(explain_plan(conn, stmt.sql))
+                elif cache is not None:
+                    # a result read inside an open transaction must not outlive it, so none is looked up or stored meanwhile
+                    if not conn.in_transaction:
+                        key = cache.key(conn, database, stmt.sql, fmt, page_size, grid)
+                        body = cache.get(key)
+                        if profile is not None:
+                            profile.cached = body is not None
+                    tracker.reset()
+
+                if body is None:
+                    started = time.perf_counter()
+                    # BLOBs come back as stubs with a preview, their content stays in the database
+                    cursor = conn.execute(lazy_sql(conn, stmt.sql, tracker) or stmt.sql)
+                    if profile is not None:
+                        profile.exec = time.perf_counter() - started
+                    if tracker is not None:
+                        readonly, cacheable = tracker.classify(stmt.sql)
+                        if not readonly:
+                            cache.invalidate(database)
+                        if not cacheable:
+                            key = None
+
+                    if cursor.description is None:
+                        body = "Empty Data[]\nQuery Executed Successfully"
+                    elif grid:
+                        body, result = "-- result opened in the grid", cursor
+                    else:
+                        pager = ResultPager(cursor, fmt, page_size, native=native)
+                        body = pager.next_page()
+                        if key is not None and pager.exhausted and not conn.in_transaction:
+                            cache.put(key, body)
+                        if not pager.exhausted:
+                            result = pager
+                        if profile is not None:
+                            profile.fetch, profile.render, profile.rows = pager.fetch_time, pager.render_time, pager.fetched
 
             except Exception as e:
-                QMessageBox.critical(self, "Error", f"Could not open file:\n{e}")
-
-    def save_file(self):
-        if self.file_path:
-            if not self.file_path.endswith('.nbdb'):
-                return False
+                stmt.error = str(e)
+                body = f"{e} (line {stmt.line})"
+                if transaction:
+                    body += "\nTransaction rolled back."
+                if profile is not None:
+                    profile.error = stmt.error
+
+            if profile is not None:
+                profiler.finish(conn, profile)
+                if profiler.annotate:
+                    body = f"{body}\n{profile.summary()}"
+            yield f">>> {query}\n{body}\n\n", result
+            if transaction and stmt.error is not None:
+                return
+
+        if transaction:
             try:
-                with open(self.file_path, "w", encoding="utf-8") as f:
-                    f.write(self.editor.toPlainText())
-                self.is_modified = False
-                return True
+                conn.execute("COMMIT")
             except Exception as e:
-                QMessageBox.critical(self, "Error", f"Could not save file:\n{e}")
-                return False
-        else:
-            return self.save_file_as()
-
-    def save_file_as(self):
-        file_path, _ = QFileDialog.getSaveFileName(self, "Save File As", "", "SQL notebook (*.nbdb)")
-        if file_path and file_path.endswith('.nbdb'):
-            self.file_path = file_path
-            self.save_file()
-            self.setWindowTitle(f"{file_path} - Notepad")
-            self.is_modified = False
-            return True
-        elif file_path and not file_path.endswith('.nbdb'):
-            QMessageBox.critical(self, "Error", "Unable to save.")
-            return False
+                yield f">>> COMMIT\n{e}\nTransaction rolled back.\n\n", None
+    finally:
+        # also reached when the caller stops early, e.g. on cancel
+        if transaction and conn.in_transaction:
+            conn.execute("ROLLBACK")
+            if cache is not None:
+                cache.invalidate(database)
+
+def run_readonly(conn: sqlite3.Connection, stmt, fmt: str, page_size: int, database: str, native: bool = False):
+    # runs on a reader thread; rows beyond the first page are dropped, as the reader can't keep its cursor open
+    profile = StatementProfile(stmt.sql, stmt.line, database)
+    started = time.perf_counter()
+    try:
+        cursor = conn.execute(lazy_sql(conn, stmt.sql) or stmt.sql)
+        profile.exec = time.perf_counter() - started
+        if cursor.description is None:
+            body = "Empty Data[]\nQuery Executed Successfully"
         else:
-            return False
-
-    def run(self):
-        db_path = self.parent_window.db_entry.text().strip()
-        if not db_path:
-            self.parent_window.output_box.insertPlainText("Error: No database selected.\n\n")
-            return
-
-        query_text = self.editor.toPlainText().strip()
-        
+            pager = ResultPager(cursor, fmt, page_size, "run it on its own to fetch the rest", native)
+            body = pager.next_page()
+            pager.close()
+            profile.fetch, profile.render, profile.rows = pager.fetch_time, pager.render_time, pager.fetched
+    except Exception as e:
+        stmt.error = profile.error = str(e)
+        body = f"{e} (line {stmt.line})"
+    profile.wall = time.perf_counter() - started
+    return body, profile
+
+def iter_parallel_query(statements, conn: sqlite3.Connection, readers: ReaderPool, fmt: str, page_size: int = 0, cache: ResultCache = None, database: str = None, profiler: Profiler = None, native: bool = False):
+    # runs of consecutive read-only statements are spread over the reader connections; any other statement
+    # first waits for them and then runs on conn, so every statement still sees the writes before it. Inside an
+    # open transaction everything runs on conn, as the readers can't see its uncommitted writes.
+    # Outputs come back in the notebook's order
+    pending = deque()
+
+    def finish(stmt, key, future):
         try:
-            output = run_sql_query(query_text, db_path, self.parent_window.current_table_format)
-            self.parent_window.output_box.insertPlainText(output)
-            self.parent_window.output_box.moveCursor(QTextCursor.MoveOperation.End)
+            body, profile = future.result()
         except Exception as e:
-            QMessageBox.critical(self, "Error", str(e))
+            stmt.error = str(e)
+            body, profile = f"{e} (line {stmt.line})", None
+        if key is not None and stmt.error is None:
+            cache.put(key, body)
+        if profiler is not None and profile is not None:
+            profiler.last = profile
+            if profiler.annotate:
+                body = f"{body}\n{profile.summary()}"
+        return f">>> {stmt.display}\n{body}\n\n", None
 
-    def wheelEvent_textinput(self, event):
-        if event.modifiers() & Qt.KeyboardModifier.ControlModifier:
-            if event.angleDelta().y() > 0:
-                self.editor.zoomIn(1)
+    try:
+        for stmt in statements:
+            readonly, cacheable = readers.classify(stmt.sql)
+            if not readonly or conn.in_transaction:
+                while pending:
+                    yield finish(*pending.popleft())
+                yield from iter_sql_query([stmt], conn, fmt, page_size, cache=cache, database=database, profiler=profiler, native=native)
+                continue
+            key = cache.key(conn, database, stmt.sql, fmt, page_size, False) if cache is not None and cacheable else None
+            body = cache.get(key) if key is not None else None
+            if body is not None:
+                profile = StatementProfile(stmt.sql, stmt.line, database)
+                profile.cached = True
+                future, key = Future(), None
+                future.set_result((body, profile))
             else:
-                self.editor.zoomOut(1)
-        else:
-            QPlainTextEdit.wheelEvent(self.editor, event)
-
-class Mainwindow(QMainWindow):
-    def __init__(self, appo: QApplication):
-        super().__init__()
-        self.open_notepads = []
-        self.setWindowTitle("SQLite")
-        self.setWindowIcon(QIcon(r"files\icon1.ico"))
-        #self.resize(950, 600)
-        self.setContentsMargins(10,0,10,10)
-        self.data = load_settings()
-        self.appo = appo
-
-        #menu bar setup
-        menu_bar = QMenuBar(self)
-        file_menu = QMenu("&File", self)
-        file_menu.addAction(QAction(text="New Database", parent=self, shortcut="Ctrl+N", triggered=self.new_database))
-        file_menu.addAction(QAction(text="Open Database", parent=self, shortcut="Ctrl+O", triggered=self.open_database))
-        file_menu.addSeparator()
-        file_menu.addAction(QAction(text="New File", parent=self, shortcut="Ctrl+Shift+N", triggered=self.new_file))
-        file_menu.addAction(QAction(text="Open File", parent=self, shortcut="Ctrl+Shift+O", triggered=self.open_file))
-        file_menu.addSeparator()
-        file_menu.addAction(QAction(text="Quit", parent=self, shortcut="Ctrl+Q", triggered=self.close))
-
-        edit_menu = QMenu("&Edit", self)
-        self.clear_input = QAction(text="Clear Input", parent=self, shortcut="Ctrl+I", triggered=self.handle_check)
-        self.clear_input.setCheckable(True)
-        edit_menu.addAction(self.clear_input)
-        edit_menu.addAction(QAction(text="Clear Output", parent=self, shortcut="Ctrl+K", triggered=self.clear_outp))
-        edit_menu.addSeparator()
-        edit_label1 = QAction(text="Input Box", parent=self)
-        edit_label1.setEnabled(False)
-        edit_menu.addAction(edit_label1)
-        edit_menu.addAction(QAction(text="  Inc Size", parent=self, triggered=lambda: self.text_input.zoomIn(1)))
-        edit_menu.addAction(QAction(text="  Dec Size", parent=self, triggered=lambda: self.text_input.zoomOut(1)))
-        edit_menu.addAction(QAction(text="  Reset Zoom", parent=self, triggered=lambda: self.text_input.setFont(QFont("Consolas", 13))))
-        edit_menu.addSeparator()
-        edit_label2 = QAction(text="Output Box", parent=self)
-        edit_label2.setEnabled(False)
-        edit_menu.addAction(edit_label2)
-        edit_menu.addAction(QAction(text="  Inc Size", parent=self, triggered=lambda: self.output_box.zoomIn(1)))
-        edit_menu.addAction(QAction(text="  Dec Size", parent=self, triggered=lambda: self.output_box.zoomOut(1)))
-        edit_menu.addAction(QAction("  Reset Zoom", self, triggered=lambda: self.output_box.setFont(QFont("Consolas", 13))))
-
-        style_menu = QMenu("Table", self)
-        tabulate_formats = ['double_grid', 'double_outline', 'fancy_grid', 'fancy_outline', 'github', 'html', 'latex', 'mediawiki', 'moinmoin', 'orgtbl', 'grid', 'outline', 'pipe', 'plain', 'presto', 'pretty', 'psql', 'rst', 'simple', 'simple_grid', 'simple_outline', 'textile']
-        style_group = QActionGroup(self)
-        style_group.setExclusive(True)
-
-        for fmt in sorted(tabulate_formats):
-            action = QAction(fmt, self, checkable=True)
-            if fmt == self.data.get("table_format", "simple_outline"):
-                action.setChecked(True)
-                self.current_table_format = fmt
-            if fmt == "simple_outline":
-                action.setText(f"{fmt}\t(default)")
-            action.triggered.connect(lambda checked, f=fmt: self.set_table_format(f))
-            
-            style_group.addAction(action)
-            style_menu.addAction(action)
-
-        theme_menu = QMenu("Theme", self)
-        theme_group = QActionGroup(self)
-        theme_group.setExclusive(True)
-        action1 = QAction("Light", self, checkable=True)
-        action2 = QAction("Dark", self, checkable=True)
-        action3 = QAction("System Default", self, checkable=True)
-        if self.data.get("theme", "sys") == "dark":
-            action2.setChecked(True)
-            self.theme_dark()
-        elif self.data.get("theme", "sys") == "light":
-            action1.setChecked(True)
-            self.theme_light()
-        else:
-            action3.setChecked(True)
-            self.theme_sys()
-        theme_group.addAction(action3)
-        theme_group.addAction(action1)
-        theme_group.addAction(action2)
-        action1.triggered.connect(lambda checked: self.theme_light())
-        action2.triggered.connect(lambda checked: self.theme_dark())
-        action3.triggered.connect(lambda checked: self.theme_sys())
-        theme_menu.addActions([action3, action1, action2])
-
-        style = QMenu("&Style", self)
-        style.addMenu(style_menu)
-        style.addMenu(theme_menu)
-
-        help_menu = QMenu("&Help", self)
-        help_menu.addAction(QAction(text="Help", parent=self, shortcut="Ctrl+H", triggered=lambda: open_new_tab(r"files\help2.html")))
-        help_menu.addAction(QAction(text="SQLite", parent=self, shortcut="Ctrl+Shift+H", triggered=lambda: open_new_tab(r"files\help1.html")))
-        help_menu.addAction("About", self.show_about)
-        help_menu.addAction("License", self.show_license)
-
-        menu_bar.addMenu(file_menu)
-        menu_bar.addMenu(edit_menu)
-        menu_bar.addMenu(style)
-        menu_bar.addMenu(help_menu)
-        menu_bar.addAction(QAction(text="Run", parent=self, shortcut="F5", triggered=self.run_queries, toolTip="F5"))
-        self.setMenuBar(menu_bar)
-
-        top_bar = QHBoxLayout()
-        label1 = QLabel("SQLite")
-        label1.setFont(QFont('Halveta', 16, QFont.Weight.Bold))
-        top_bar.addWidget(label1)
-        top_bar.addStretch()
-        label2 = QLabel("\tDatabase: ")
-        label2.setFont(QFont('Consolas', 13, QFont.Weight.Bold))
-        top_bar.addWidget(label2)
-        self.db_entry = QLineEdit("database.db", self)
-        self.db_entry.setMinimumWidth(300)
-        self.db_entry.setFont(QFont('Consolas', 13))
-        run_button = QPushButton("Run")
-        run_button.clicked.connect(self.run_queries)
-        run_button.setFont(QFont("Consolas", 13))
-        top_bar.addWidget(self.db_entry)
-        top_bar.addWidget(run_button)
-
-        self.text_input = QPlainTextEdit()
-        self.text_input.setPlaceholderText("Write your SQL commands here...")
-        self.text_input.setFont(QFont("Consolas", 13))
-        self.text_input.wheelEvent = self.wheelEvent_textinput.__get__(self)
-
-        self.output_box = HScrollTextEdit()
-        self.output_box.setReadOnly(True)
-        self.output_box.setFont(QFont("Consolas", 13))
-        self.output_box.setLineWrapMode(QPlainTextEdit.LineWrapMode.NoWrap)
-        
-        self.output_box.setMinimumHeight(200)
-
-        splitter = QSplitter(Qt.Vertical)
-        splitter.addWidget(self.text_input)
-        splitter.addWidget(self.output_box)
-        splitter.setSizes([120, 400])
-        
-        layout = QVBoxLayout()
-        layout.addLayout(top_bar)
-        layout.addWidget(splitter)
-
-        container = QWidget()
-        container.setLayout(layout)
-        self.setCentralWidget(container)
-
-        self.db_entry.setText(self.data.get("last_db", "database.db"))
-        self.clear_input.setChecked(self.data.get("clear_input", False))
-
-    def run_queries(self):
-        db_path = self.db_entry.text().strip()
-        if not db_path:
-            self.output_box.insertPlainText("Error: No database selected.\n\n")
-            return
-
-        query_text = self.text_input.toPlainText().strip()
-        
-        try:
-            output = run_sql_query(query_text, db_path, self.current_table_format)
-            self.output_box.insertPlainText(output)
-            self.output_box.moveCursor(QTextCursor.MoveOperation.End)
-            if self.clear_input.isChecked():
-                self.handle_check(True)
-        except Exception as e:
-            QMessageBox.critical(self, "Error", str(e))
-
-    def closeEvent(self, event):
-        save_settings(db_path=self.db_entry.text().strip(), table_format=self.current_table_format, clear_input_checked=self.clear_input.isChecked(), theme=self.current_theme)
-        for window in self.open_notepads[:]:
-            window.close()
-        super().closeEvent(event)
-
-    def set_table_format(self, fmt):
-        self.current_table_format = fmt
-
-    def theme_sys(self):
-        self.current_theme = "sys"
-        self.setPalette(self.appo.palette())
-        self.menuBar().setStyleSheet(self.appo.styleSheet())
-
-    def theme_light(self):
-        self.current_theme = "light"
-        self.setPalette(LIGHT_PALETTE)
-        self.menuBar().setStyleSheet(MENU_QSS_LIGHT)
-
-    def theme_dark(self):
-        self.current_theme = "dark"
-        self.setPalette(DARK_PALETTE)
-        self.menuBar().setStyleSheet(MENU_QSS_DARK)
+                future = readers.submit(run_readonly, stmt, fmt, page_size, database, native)
+            pending.append((stmt, key, future))
+            while pending and pending[0][2].done():
+                yield finish(*pending.popleft())
+        while pending:
+            yield finish(*pending.popleft())
+    finally:
+        for _, _, future in pending:
+            future.cancel()
+
+def has_transaction_control(script: str):
+    return any(_TRANSACTION_CONTROL.match(stmt.sql) for stmt in iter_statements(script))
+
+def run_script(script: str, conn: sqlite3.Connection):
+    # fast path without per-statement output: the whole script runs inside sqlite in one transaction.
+    # Returns the number of statements
+    statements = split_statements(script)
+    if any(_TRANSACTION_CONTROL.match(stmt.sql) for stmt in statements):
+        raise ValueError("The script has its own transaction statements, so it can't run as one transaction.")
+    try:
+        conn.executescript(f"BEGIN;\n{script}\n;COMMIT;")
+        if conn.in_transaction:
+            # the COMMIT never ran, e.g. it ended up inside an unterminated /* comment
+            raise sqlite3.OperationalError("The script did not reach its end (an unterminated comment?), so nothing was committed.")
+    finally:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+    return len(statements)
+
+def format_throughput(statements: int, seconds: float, changes: int):
+    rate = f"{statements / seconds:,.0f}" if seconds > 0 else "-"
+    return f"-- {statements} statements in {seconds:.3f} s ({rate} statements/s), {changes} rows affected\n\n"
+
+def run_sql_query(query: str, database: str, fmt: str, page_size: int = 0, native: bool = False):
+    query_list = split_statements(query)
+    if not query_list:
+        return ">>>\n\n"
+    elif any(stmt.sql in ('exit', 'exit()') for stmt in query_list):
+        sys.exit()
     
-    def handle_check(self, checked):
-        if checked:
-            self.text_input.clear()
-
-    def clear_outp(self):
-        self.output_box.clear()
-        
-    def new_database(self):
-        file, _ = QFileDialog.getSaveFileName(self, "Create Database", "", "SQLite DB (*.db *.sqlite3)")
-        if file:
-            self.db_entry.setText(file)
-
-    def open_database(self):
-        file, _ = QFileDialog.getOpenFileName(self, "Select Database", "", "SQLite DB (*.db *.sqlite3)")
-        if file:
-            self.db_entry.setText(file)
-
-    def new_file(self):
-        notepad = NotepadWindow(parent=self)
-        self.open_notepads.append(notepad)
-        notepad.show()
-
-    def open_file(self):
-        file_path, _ = QFileDialog.getOpenFileName(self, "Open File", "", "SQL notebook (*.nbdb)")
-        try:
-            if file_path and file_path.endswith('.nbdb'):
-                notepad = NotepadWindow(file_path=file_path, parent=self)
-                self.open_notepads.append(notepad)
-                notepad.show()
-            elif file_path and not file_path.endswith('.nbdb'):
-                raise Exception("Different file format")
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Could not open file:\n{e}")
-
-    def show_about(self):
-        QMessageBox.about(self, "About", "SQLite GUI App\n© 2025 KCoder-programming\nLicensed under CC BY-NC 4.0")
-
-    def show_license(self):
-        QMessageBox.about(self, "License", """Creative Commons Attribution-NonCommercial 4.0 International (CC BY-NC 4.0)
-
-Copyright © 2025 KCoder Programming
-
-You are free to:
-✔ Share — copy and redistribute the material in any medium or format
-✔ Adapt — remix, transform, and build upon the material
-
-Under the following terms:
-❗ Attribution — You must give appropriate credit, provide a link to the license, and indicate if changes were made.
-❗ NonCommercial — You may not use the material for commercial purposes.
-
-No additional restrictions — You may not apply legal terms or technological measures that legally restrict others from doing anything the license permits.
-
-License Link: https://creativecommons.org/licenses/by-nc/4.0/""")
-        
-    def wheelEvent_textinput(self, event):
-        if event.modifiers() & Qt.KeyboardModifier.ControlModifier:
-            if event.angleDelta().y() > 0:
-                self.text_input.zoomIn(1)
-            else:
-                self.text_input.zoomOut(1)
+    with sqlite3.connect(database, autocommit=True) as conn:
+        return "".join(output for output, _ in iter_sql_query(query_list, conn, fmt, page_size, native=native))
+
+def run_notebook(script: str, conn: sqlite3.Connection, fmt: str, out, transaction: bool = False, profiler: Profiler = None, bail: bool = False, readers: ReaderPool = None, native: bool = True):
+    # each statement's output is written and flushed as soon as it has run; returns the number of failures
+    started, outputs, failed = [], 0, 0
+
+    def statements():
+        for stmt in iter_statements(script):
+            if stmt.sql in ('exit', 'exit()'):
+                return
+            started.append(stmt)
+            yield stmt
+
+    if readers is not None and not transaction:
+        results = iter_parallel_query(statements(), conn, readers, fmt, profiler=profiler, database=readers.database, native=native)
+    else:
+        results = iter_sql_query(statements(), conn, fmt, transaction=transaction, profiler=profiler, native=native)
+    try:
+        for output, _ in results:
+            out.write(output)
+            out.flush()
+            outputs += 1
+            # one output per statement; an extra one means the final COMMIT failed
+            if outputs > len(started) or started[outputs - 1].error is not None:
+                failed += 1
+                if bail:
+                    break
+    finally:
+        results.close()
+    return failed
+
+def cli_parser():
+    parser = argparse.ArgumentParser(prog="pysqlite", description="SQLite GUI App. Without a command the GUI starts; add --profile-startup to print a timing breakdown of its start-up and exit.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run = commands.add_parser("run", help="run a notebook without the GUI and write the results to stdout")
+    run.add_argument("notebook", help="the .nbdb file to run, or - to read the statements from stdin")
+    run.add_argument("--db", required=True, help="database file, or :memory:")
+    run.add_argument("--format", default="simple_outline", choices=TABULATE_FORMATS, metavar="FORMAT", help="table format for results (default: simple_outline)")
+    run.add_argument("--tabulate", action="store_true", help="render every table with tabulate instead of the built-in renderer")
+    run.add_argument("--pragma", action="append", default=[], metavar="NAME=VALUE", help="pragma applied to the connection; repeatable")
+    run.add_argument("--attach", action="append", default=[], metavar="ALIAS=PATH", help="database attached to the connection as ALIAS; repeatable")
+    run.add_argument("--transaction", action="store_true", help="run the notebook as one transaction, rolled back on the first error")
+    run.add_argument("--bail", action="store_true", help="stop at the first failing statement")
+    run.add_argument("--timings", action="store_true", help="append the timing of every statement")
+    run.add_argument("--parallel", nargs="?", type=int, const=0, metavar="N", help="run consecutive read-only statements concurrently on N read-only connections (default: one per core)")
+    return parser
+
+def run_cli(argv):
+    # exit codes: 0 all statements succeeded, 1 some failed, 2 bad arguments or unreadable input, 130 interrupted
+    args = cli_parser().parse_args(argv)
+    try:
+        if args.notebook == "-":
+            script = sys.stdin.read()
         else:
-            QPlainTextEdit.wheelEvent(self.text_input, event)
-        
+            with open(args.notebook, "r", encoding="utf-8") as f:
+                script = f.read()
+        pragmas = parse_pragmas("\n".join(args.pragma))
+        attachments = parse_attachments("\n".join(args.attach))
+        conn = sqlite3.connect(args.db, autocommit=True)
+    except (OSError, ValueError, sqlite3.Error) as e:
+        print(f"pysqlite: {e}", file=sys.stderr)
+        return 2
+    readers = None
+    try:
+        attach_databases(conn, attachments)
+        apply_pragmas(conn, pragmas)
+        profiler = Profiler(args.db) if args.timings else None
+        if args.parallel is not None and args.db != ":memory:":
+            readers = ReaderPool(args.db, args.parallel, pragmas, attachments)
+        return 1 if run_notebook(script, conn, args.format, sys.stdout, args.transaction, profiler, args.bail, readers, not args.tabulate) else 0
+    except (ValueError, sqlite3.Error) as e:
+        print(f"pysqlite: {e}", file=sys.stderr)
+        return 2
+    except KeyboardInterrupt:
+        return 130
+    except BrokenPipeError:
+        # e.g. piped into head; stdout is pointed at devnull so the interpreter's final flush stays quiet
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 1
+    finally:
+        if readers is not None:
+            readers.close()
+        conn.close()
+
+def import_timings(modules):
+    # (label, seconds) per module; a module only pays for what the ones before it didn't import yet
+    import importlib
+    timings = []
+    for name in modules:
+        started = time.perf_counter()
+        importlib.import_module(name)
+        timings.append((f"import {name}", time.perf_counter() - started))
+    return timings
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] in ("run", "-h", "--help"):
+        return run_cli(argv)
+    # PySide6 is only imported when the GUI starts, which keeps the headless runner fast
+    timings = import_timings(STARTUP_MODULES) if "--profile-startup" in argv else None
+    from gui import main as gui_main
+    return gui_main(timings)
+
 
 if __name__ == "__main__":
-    app = QApplication(sys.argv)
-    window = Mainwindow(app)
-    window.show()
-    sys.exit(app.exec())
+    sys.exit(main())
@@ -0,0 +1,106 @@
+"""Module caching the rendered output of read-only statements."""
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+from transfer import quote_identifier
+
+_READ_ACTIONS = {sqlite3.SQLITE_SELECT, sqlite3.SQLITE_READ, sqlite3.SQLITE_FUNCTION, sqlite3.SQLITE_RECURSIVE}
+# actions that neither read nor write table data; their statements are never cached. Transaction and savepoint
+# statements count as writes, as a ROLLBACK undoes writes without moving data_version
+_NEUTRAL_ACTIONS = {sqlite3.SQLITE_PRAGMA}
+VOLATILE_FUNCTIONS = {"random", "randomblob", "changes", "total_changes", "last_insert_rowid", "date", "time", "datetime", "julianday", "strftime", "unixepoch", "timediff", "current_date", "current_time", "current_timestamp", "sqlite_offset"}
+_SQL_PARTS = re.compile(r"'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"|`[^`]*`|\[[^\]]*\]|\s+|[^\s'\"`\[]+|.", re.S)
+
+
+def normalize_sql(sql: str):
+    # collapse whitespace, leaving quoted strings and identifiers untouched
+    return "".join(" " if part.isspace() else part for part in _SQL_PARTS.findall(sql.strip()))
+
+
+class StatementTracker:
+    # installed as the connection's authorizer; records whether a statement reads or writes while it is prepared
+    def __init__(self):
+        self.known = {}
+        self.reset()
+
+    def reset(self):
+        self.prepared = False
+        self.readonly = True
+        self.cacheable = True
+
+    def __call__(self, action, arg1, arg2, db_name, trigger):
+        self.prepared = True
+        if action in _READ_ACTIONS:
+            if action == sqlite3.SQLITE_FUNCTION and arg2 and arg2.lower() in VOLATILE_FUNCTIONS:
+                self.cacheable = False
+        elif action in _NEUTRAL_ACTIONS:
+            self.cacheable = False
+        else:
+            self.readonly = self.cacheable = False
+        return sqlite3.SQLITE_OK
+
+    def classify(self, sql: str):
+        # statements reused from the connection's statement cache are not re-prepared, so
+        # the authorizer stays silent and the verdict from their first preparation is used
+        if self.prepared:
+            self.known[sql] = (self.readonly, self.cacheable)
+            return self.readonly, self.cacheable
+        return self.known.get(sql, (False, False))
+
+
+class ResultCache:
+    def __init__(self, max_bytes=32 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self._entries = OrderedDict()
+        self._owners = {}
+        self._trackers = {}
+        self._lock = threading.Lock()
+
+    def tracker(self, conn: sqlite3.Connection):
+        entry = self._trackers.get(id(conn))
+        if entry is None or entry[0] is not conn:
+            entry = (conn, StatementTracker())
+            self._trackers[id(conn)] = entry
+        # installed on every run, as a run without the cache may have replaced it meanwhile
+        conn.set_authorizer(entry[1])
+        return entry[1]
+
+    def key(self, conn: sqlite3.Connection, database: str, sql: str, *options):
+        # data_version is only comparable within one connection, so a recycled connection starts afresh.
+        # It is kept per schema, so attached databases count too; temp only changes through this connection
+        owner = self._owners.get(database)
+        if owner is not conn:
+            self.invalidate(database)
+            if owner is not None and self._trackers.get(id(owner), (None,))[0] is owner:
+                del self._trackers[id(owner)]
+            self._owners[database] = conn
+        data_version = tuple(conn.execute(f"PRAGMA {quote_identifier(name)}.data_version").fetchone()[0] for _, name, _ in conn.execute("PRAGMA database_list").fetchall() if name != "temp")
+        return (database, normalize_sql(sql), data_version) + options
+
+    def get(self, key):
+        with self._lock:
+            text = self._entries.get(key)
+            if text is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            return text
+
+    def put(self, key, text: str):
+        if len(text) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self.size -= len(self._entries.pop(key))
+            self._entries[key] = text
+            self.size += len(text)
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+
+    def invalidate(self, database: str = None):
+        with self._lock:
+            for key in [key for key in self._entries if database is None or key[0] == database]:
+                self.size -= len(self._entries.pop(key))
@@ -0,0 +1,184 @@
+"""Module rendering result tables for the common formats without tabulate."""
+
+# (lineabove, linebelowheader, linebetweenrows, linebelow) as (begin, fill, sep, end); rows as (begin, sep, end); padding
+NATIVE_FORMATS = {
+    "simple_outline": (("┌", "─", "┬", "┐"), ("├", "─", "┼", "┤"), None, ("└", "─", "┴", "┘"), ("│", "│", "│"), 1),
+    "psql": (("+", "-", "+", "+"), ("|", "-", "+", "|"), None, ("+", "-", "+", "+"), ("|", "|", "|"), 1),
+    "grid": (("+", "-", "+", "+"), ("+", "=", "+", "+"), ("+", "-", "+", "+"), ("+", "-", "+", "+"), ("|", "|", "|"), 1),
+    "github": (("|", "-", "|", "|"), ("|", "-", "|", "|"), None, None, ("|", "|", "|"), 1),
+    "plain": (None, None, None, None, ("", "  ", ""), 0),
+}
+# tabulate's column types, from least to most generic
+_NONE, _BOOL, _INT, _FLOAT, _STR = range(5)
+_NUMERIC_STRINGS = ("inf", "-inf", "nan")
+# the tabulate module, once the first table is rendered
+_tabulate = None
+
+
+class Fallback(Exception):
+    # raised for anything the native renderer doesn't reproduce exactly; tabulate then renders the table
+    pass
+
+def _module():
+    # tabulate is slow to import, so it is loaded by the first table rendered rather than at start-up
+    global _tabulate
+    if _tabulate is None:
+        import tabulate
+        _tabulate = tabulate
+    return _tabulate
+
+
+def _string_type(value: str):
+    # tabulate parses numbers out of strings; a column that ends up numeric because of them is left to it
+    if value in ("True", "False"):
+        return _BOOL
+    try:
+        int(value)
+        return _INT
+    except ValueError:
+        pass
+    try:
+        number = float(value)
+    except ValueError:
+        return _STR
+    if number != number or number in (float("inf"), float("-inf")):
+        return _FLOAT if value.lower() in _NUMERIC_STRINGS else _STR
+    return _FLOAT
+
+def _afterpoint(text: str):
+    # digits after the decimal point (or after an exponent's "e"), -1 for integers and nan/inf
+    if not text or text.lower() in _NUMERIC_STRINGS:
+        return -1
+    try:
+        int(text)
+        return -1
+    except ValueError:
+        pass
+    position = text.rfind(".")
+    if position < 0:
+        position = text.lower().rfind("e")
+    return len(text) - position - 1 if position >= 0 else -1
+
+def _width_function(module):
+    if module.wcwidth is not None and module.WIDE_CHARS_MODE:
+        wcswidth = module.wcwidth.wcswidth
+
+        def width(text):
+            if text.isascii():
+                return len(text)
+            result = wcswidth(text)
+            if result < 0:
+                raise Fallback()
+            return result
+        return width
+    return len
+
+def _column(values, width):
+    # one pass to type the column, one to format it; returns (cells, display widths, numeric)
+    kind, strings = _BOOL, False
+    for value in values:
+        if value is None:
+            continue
+        value_type = type(value)
+        if value_type is str:
+            strings = True
+            if kind != _STR:
+                kind = max(kind, _string_type(value))
+        elif value_type is int:
+            kind = max(kind, _INT)
+        elif value_type is float:
+            kind = max(kind, _FLOAT)
+        else:
+            raise Fallback()
+    if kind == _STR:
+        cells = []
+        for value in values:
+            if value is None:
+                cells.append("")
+            else:
+                text = value if type(value) is str else f"{value}"
+                if not text.isprintable():
+                    raise Fallback()
+                cells.append(text.strip())
+        return cells, [width(cell) for cell in cells], False
+    if strings:
+        raise Fallback()
+    if kind == _INT:
+        cells = ["" if value is None else str(value) for value in values]
+    elif kind == _FLOAT:
+        cells = ["" if value is None else format(float(value), "g") for value in values]
+        decimals = [_afterpoint(cell) for cell in cells]
+        most = max(decimals)
+        cells = [cell + " " * (most - places) for cell, places in zip(cells, decimals)]
+    else:
+        # a column of NULLs only is typed bool by tabulate and aligned left
+        return [""] * len(values), [0] * len(values), False
+    return cells, [len(cell) for cell in cells], True
+
+def _line(widths, parts):
+    begin, fill, sep, end = parts
+    return (begin + sep.join(fill * w for w in widths) + end).rstrip()
+
+def render_native(rows, headers, fmt: str):
+    # the same text tabulate(rows, headers, tablefmt=fmt) returns for NATIVE_FORMATS
+    module = _module()
+    if fmt not in NATIVE_FORMATS or not rows or module.PRESERVE_WHITESPACE:
+        raise Fallback()
+    above, below_header, between, below, (row_begin, row_sep, row_end), padding = NATIVE_FORMATS[fmt]
+    count = len(headers) if headers else len(rows[0])
+    if any(len(row) != count for row in rows):
+        raise Fallback()
+    width = _width_function(module)
+    columns, widths, numeric = [], [], []
+    for values in zip(*rows):
+        cells, cell_widths, is_numeric = _column(values, width)
+        columns.append((cells, cell_widths))
+        widths.append(max(cell_widths))
+        numeric.append(is_numeric)
+
+    header_cells = None
+    if headers:
+        header_widths = []
+        for header in headers:
+            if not header.isprintable():
+                raise Fallback()
+            header_widths.append(width(header))
+        widths = [max(w, hw + module.MIN_PADDING) for w, hw in zip(widths, header_widths)]
+        header_cells = [" " * (w - hw) + h if right else h + " " * (w - hw) for h, w, hw, right in zip(headers, widths, header_widths, numeric)]
+
+    pad = " " * padding
+    padded = [w + 2 * padding for w in widths]
+    lines = []
+    if above and not (headers and fmt == "github"):
+        lines.append(_line(padded, above))
+    if header_cells is not None:
+        lines.append((row_begin + pad + (pad + row_sep + pad).join(header_cells) + pad + row_end).rstrip())
+        if below_header:
+            lines.append(_line(padded, below_header))
+
+    # cells are padded column by column, then each row is joined once
+    padded_columns = []
+    for (cells, cell_widths), w, right in zip(columns, widths, numeric):
+        if right:
+            padded_columns.append([" " * (w - cw) + cell for cell, cw in zip(cells, cell_widths)])
+        else:
+            padded_columns.append([cell + " " * (w - cw) for cell, cw in zip(cells, cell_widths)])
+    begin, sep, end = row_begin + pad, pad + row_sep + pad, pad + row_end
+    separator = _line(padded, between) if between else None
+    for index, cells in enumerate(zip(*padded_columns)):
+        if separator is not None and index:
+            lines.append(separator)
+        lines.append((begin + sep.join(cells) + end).rstrip())
+    if below:
+        lines.append(_line(padded, below))
+    return "\n".join(lines)
+
+def render_table(rows, headers, fmt: str, native: bool = True):
+    if native and fmt in NATIVE_FORMATS:
+        try:
+            return render_native(rows, headers, fmt)
+        except Fallback:
+            pass
+    if headers:
+        return _module().tabulate(rows, headers, tablefmt=fmt)
+    return _module().tabulate(rows, tablefmt=fmt)
@@ -0,0 +1,158 @@
+"""Module persisting settings, statement history and open notepads in a SQLite session file."""
+import itertools
+import json
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+from connections import DEFAULT_PRAGMAS
+from profiler import HISTORY_LIMIT, StatementProfile
+
+SESSION_FILE = "session.db"
+# the old settings file; on Windows the path was files\settings.json, elsewhere a file literally named that
+LEGACY_SETTINGS = (os.path.join("files", "settings.json"), "files\\settings.json")
+DEFAULT_SETTINGS = {"last_db": "database.db", "table_format": "simple_outline", "clear_input": False, "theme": "sys", "page_size": 1000, "grid_view": False, "pragmas": dict(DEFAULT_PRAGMAS), "idle_timeout": 300, "result_cache": True, "result_cache_mb": 32, "run_transaction": False, "fast_script": False, "max_output_lines": 20000, "show_timings": False, "count_vm_steps": False, "parallel_reads": False, "native_render": True, "attachments": {}}
+_PROFILE_COLUMNS = ("started", "sql", "line", "database", "wall", "exec", "fetch", "render", "rows", "changes", "steps", "cached", "error")
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS settings (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS history (id INTEGER PRIMARY KEY, started REAL, sql TEXT, line INTEGER, database TEXT, wall REAL, exec REAL, fetch REAL, render REAL, rows INTEGER, changes INTEGER, steps INTEGER, cached INTEGER, error TEXT);
+CREATE TABLE IF NOT EXISTS notepads (id INTEGER PRIMARY KEY, path TEXT, text TEXT, updated REAL, database TEXT);
+"""
+_STOP = object()
+
+
+class SessionStore:
+    # reads happen on the caller's connection; every write goes through a queue to one writer thread, which
+    # commits whatever has piled up as one transaction. WAL keeps the reads and the writer out of each other's way
+    def __init__(self, path: str, history_limit: int = HISTORY_LIMIT):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.history_limit = history_limit
+        self.error = None
+        self.conn = self.connect()
+        self.conn.executescript(_SCHEMA)
+        # session files written before notepads could be bound to a database
+        if "database" not in {row[1] for row in self.conn.execute("PRAGMA table_info(notepads)")}:
+            self.conn.execute("ALTER TABLE notepads ADD COLUMN database TEXT")
+        self._settings = {key: json.loads(value) for key, value in self.conn.execute("SELECT key, value FROM settings")}
+        self._ids = itertools.count((self.conn.execute("SELECT max(id) FROM notepads").fetchone()[0] or 0) + 1)
+        self._queue = queue.Queue()
+        self._writer = threading.Thread(target=self._write_loop, name="session-writer", daemon=True)
+        self._writer.start()
+
+    def connect(self):
+        conn = sqlite3.connect(self.path, autocommit=True, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode = WAL").fetchall()
+        # NORMAL is durable across an application crash; only a power loss can drop the last commits
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute("PRAGMA busy_timeout = 5000")
+        return conn
+
+    def settings(self):
+        # the stored settings over the defaults; the first run takes over an old settings.json
+        if not self._settings:
+            legacy = load_legacy_settings()
+            if legacy:
+                self.set_settings(legacy)
+        return dict(DEFAULT_SETTINGS, **self._settings)
+
+    def set_settings(self, settings: dict):
+        # only the values that changed are written
+        changed = {key: value for key, value in settings.items() if key not in self._settings or self._settings[key] != value}
+        if changed:
+            self._settings.update(changed)
+            self._put("INSERT OR REPLACE INTO settings VALUES (?, ?)", [(key, json.dumps(value)) for key, value in changed.items()])
+
+    def history(self, limit: int = None):
+        rows = self.conn.execute(f"SELECT {', '.join(_PROFILE_COLUMNS)} FROM (SELECT * FROM history ORDER BY id DESC LIMIT ?) ORDER BY id", (limit or self.history_limit,))
+        profiles = []
+        for row in rows:
+            profile = StatementProfile(row[1], row[2], row[3])
+            for name, value in zip(_PROFILE_COLUMNS, row):
+                setattr(profile, name, bool(value) if name == "cached" else value)
+            profiles.append(profile)
+        return profiles
+
+    def add_profile(self, profile: StatementProfile):
+        self._put(f"INSERT INTO history ({', '.join(_PROFILE_COLUMNS)}) VALUES ({', '.join('?' * len(_PROFILE_COLUMNS))})", [tuple(getattr(profile, name) for name in _PROFILE_COLUMNS)], trim=True)
+
+    def clear_history(self):
+        self._put("DELETE FROM history", [()])
+
+    def notepads(self):
+        # (id, path, unsaved text or None, bound database or None) in the order they were opened
+        return self.conn.execute("SELECT id, path, text, database FROM notepads ORDER BY id").fetchall()
+
+    def new_notepad_id(self):
+        return next(self._ids)
+
+    def save_notepad(self, notepad_id: int, path: str, text: str = None, database: str = None):
+        self._put("INSERT OR REPLACE INTO notepads (id, path, text, updated, database) VALUES (?, ?, ?, ?, ?)", [(notepad_id, path, text, time.time(), database)])
+
+    def remove_notepad(self, notepad_id: int):
+        self._put("DELETE FROM notepads WHERE id = ?", [(notepad_id,)])
+
+    def flush(self):
+        self._queue.join()
+
+    def close(self):
+        if self._writer.is_alive():
+            self._queue.put(_STOP)
+            self._writer.join()
+        self.conn.close()
+
+    def _put(self, sql: str, params: list, trim: bool = False):
+        self._queue.put((sql, params, trim))
+
+    def _write_loop(self):
+        conn = self.connect()
+        try:
+            while True:
+                batch = [self._queue.get()]
+                while batch[-1] is not _STOP:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                writes = [item for item in batch if item is not _STOP]
+                try:
+                    if writes:
+                        self._write(conn, writes)
+                except sqlite3.Error as e:
+                    # the session is a convenience; a failed write is reported once and the app carries on
+                    if self.error is None:
+                        print(f"session: could not write {self.path}: {e}", file=sys.stderr)
+                    self.error = str(e)
+                finally:
+                    for _ in batch:
+                        self._queue.task_done()
+                if batch[-1] is _STOP:
+                    return
+        finally:
+            conn.close()
+
+    def _write(self, conn, writes):
+        conn.execute("BEGIN")
+        try:
+            for sql, params, _ in writes:
+                conn.executemany(sql, params)
+            if any(trim for _, _, trim in writes):
+                conn.execute("DELETE FROM history WHERE id <= (SELECT max(id) FROM history) - ?", (self.history_limit,))
+            conn.execute("COMMIT")
+        finally:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+
+
+def load_legacy_settings():
+    for path in LEGACY_SETTINGS:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if isinstance(data, dict):
+            return data
+    return None
@@ -0,0 +1,93 @@
+"""Module splitting SQL scripts into statements."""
+import re
+import sqlite3
+
+# one statement body up to (not including) its terminating semicolon; semicolons inside strings,
+# quoted identifiers and comments are consumed by the inner alternatives, all inside the regex engine
+_BODY = re.compile(r"""(?:[^'"`\[;/-]+|'(?:[^']|'')*'|"(?:[^"]|"")*"|`[^`]*`|\[[^\]]*\]|--[^\n]*|/\*.*?\*/|/|-)*""", re.S)
+_BLANK = re.compile(r"(?:\s+|--[^\n]*|/\*.*?(?:\*/|\Z))*", re.S)
+_TRIGGER = re.compile(r"(?:EXPLAIN\s+(?:QUERY\s+PLAN\s+)?)?CREATE\s+(?:TEMP\s+|TEMPORARY\s+)?TRIGGER\b", re.I)
+_WHITESPACE = re.compile(r"\s+")
+KEYWORDS = ("ABORT", "ACTION", "ADD", "AFTER", "ALL", "ALTER", "ALWAYS", "ANALYZE", "AND", "AS", "ASC", "ATTACH", "AUTOINCREMENT", "BEFORE", "BEGIN", "BETWEEN", "BY", "CASCADE", "CASE", "CAST", "CHECK", "COLLATE", "COLUMN", "COMMIT", "CONFLICT", "CONSTRAINT", "CREATE", "CROSS", "CURRENT", "CURRENT_DATE", "CURRENT_TIME", "CURRENT_TIMESTAMP", "DATABASE", "DEFAULT", "DEFERRABLE", "DEFERRED", "DELETE", "DESC", "DETACH", "DISTINCT", "DO", "DROP", "EACH", "ELSE", "END", "ESCAPE", "EXCEPT", "EXCLUDE", "EXCLUSIVE", "EXISTS", "EXPLAIN", "FAIL", "FILTER", "FIRST", "FOLLOWING", "FOR", "FOREIGN", "FROM", "FULL", "GENERATED", "GLOB", "GROUP", "GROUPS", "HAVING", "IF", "IGNORE", "IMMEDIATE", "IN", "INDEX", "INDEXED", "INITIALLY", "INNER", "INSERT", "INSTEAD", "INTERSECT", "INTO", "IS", "ISNULL", "JOIN", "KEY", "LAST", "LEFT", "LIKE", "LIMIT", "MATCH", "MATERIALIZED", "NATURAL", "NO", "NOT", "NOTHING", "NOTNULL", "NULL", "NULLS", "OF", "OFFSET", "ON", "OR", "ORDER", "OTHERS", "OUTER", "OVER", "PARTITION", "PLAN", "PRAGMA", "PRECEDING", "PRIMARY", "QUERY", "RAISE", "RANGE", "RECURSIVE", "REFERENCES", "REGEXP", "REINDEX", "RELEASE", "RENAME", "REPLACE", "RESTRICT", "RETURNING", "RIGHT", "ROLLBACK", "ROW", "ROWS", "SAVEPOINT", "SELECT", "SET", "TABLE", "TEMP", "TEMPORARY", "THEN", "TIES", "TO", "TRANSACTION", "TRIGGER", "UNBOUNDED", "UNION", "UNIQUE", "UPDATE", "USING", "VACUUM", "VALUES", "VIEW", "VIRTUAL", "WHEN", "WHERE", "WINDOW", "WITH", "WITHOUT")
+FUNCTIONS = ("abs", "avg", "changes", "char", "coalesce", "count", "date", "datetime", "format", "glob", "group_concat", "hex", "ifnull", "iif", "instr", "json", "json_array", "json_extract", "json_group_array", "json_group_object", "json_object", "julianday", "last_insert_rowid", "length", "like", "lower", "ltrim", "max", "min", "nullif", "printf", "quote", "random", "randomblob", "replace", "round", "rtrim", "sign", "strftime", "substr", "sum", "time", "total", "total_changes", "trim", "typeof", "unhex", "unicode", "unixepoch", "upper", "zeroblob")
+
+# highlighter states carried from one line to the next by multi-line strings, quoted names and comments
+STATE_NORMAL, STATE_COMMENT, STATE_STRING, STATE_QUOTED, STATE_BACKTICK, STATE_BRACKET = range(6)
+_OPENERS = {"/*": STATE_COMMENT, "'": STATE_STRING, '"': STATE_QUOTED, "`": STATE_BACKTICK, "[": STATE_BRACKET}
+_CLOSERS = {STATE_COMMENT: re.compile(r".*?\*/"), STATE_STRING: re.compile(r"(?:[^']|'')*'"), STATE_QUOTED: re.compile(r'(?:[^"]|"")*"'), STATE_BACKTICK: re.compile(r"[^`]*`"), STATE_BRACKET: re.compile(r"[^\]]*\]")}
+_STATE_KINDS = {STATE_COMMENT: "comment", STATE_STRING: "string", STATE_QUOTED: "identifier", STATE_BACKTICK: "identifier", STATE_BRACKET: "identifier"}
+_KEYWORD_SET = frozenset(KEYWORDS)
+# groups: 1 line comment, 2 opening quote or comment, 3 number, 4 word
+_LEX = re.compile(r"(--.*)|(/\*|'|\"|`|\[)|(\b(?:0[xX][0-9A-Fa-f]+|\d+(?:\.\d*)?(?:[eE][+-]?\d+)?)\b|(?<![\w$])\.\d+(?:[eE][+-]?\d+)?)|([A-Za-z_][\w$]*)")
+
+
+class Statement:
+    __slots__ = ("sql", "start", "end", "line", "error")
+
+    def __init__(self, sql: str, start: int, end: int, line: int):
+        self.sql = sql
+        self.start = start
+        self.end = end
+        self.line = line
+        self.error = None
+
+    @property
+    def display(self):
+        return _WHITESPACE.sub(" ", self.sql)
+
+    def __repr__(self):
+        return f"Statement({self.sql!r}, {self.start}, {self.end}, line={self.line})"
+
+
+def iter_statements(text: str):
+    pos, length = 0, len(text)
+    line, line_pos = 1, 0
+    while pos < length:
+        begin = _BLANK.match(text, pos).end()
+        if begin >= length:
+            break
+        end = _BODY.match(text, begin).end()
+        if _TRIGGER.match(text, begin, end):
+            # inside CREATE TRIGGER ... BEGIN ... END the semicolons end the body statements, not the trigger
+            while end < length and text[end] == ";" and not sqlite3.complete_statement(text[begin:end + 1]):
+                end = _BODY.match(text, end + 1).end()
+        if end < length and text[end] != ";":
+            # an unterminated string or comment runs to the end of the script
+            end = length
+
+        sql = text[begin:end].rstrip()
+        line += text.count("\n", line_pos, begin)
+        line_pos = begin
+        if sql:
+            yield Statement(sql, begin, begin + len(sql), line)
+        pos = end + 1
+
+def split_statements(text: str):
+    return list(iter_statements(text))
+
+def tokenize_line(line: str, state: int = STATE_NORMAL):
+    # returns the (start, length, kind) spans worth colouring and the state the next line starts in
+    tokens, start, pos = [], 0, 0
+    while True:
+        if state != STATE_NORMAL:
+            match = _CLOSERS[state].match(line, pos)
+            end = match.end() if match else len(line)
+            tokens.append((start, end - start, _STATE_KINDS[state]))
+            if match is None:
+                return tokens, state
+            pos, state = end, STATE_NORMAL
+        for match in _LEX.finditer(line, pos):
+            group = match.lastindex
+            if group == 4:
+                if match.group(4).upper() in _KEYWORD_SET:
+                    tokens.append((match.start(), match.end() - match.start(), "keyword"))
+            elif group == 3:
+                tokens.append((match.start(), match.end() - match.start(), "number"))
+            elif group == 2:
+                state, start, pos = _OPENERS[match.group(2)], match.start(), match.end()
+                break
+            else:
+                tokens.append((match.start(), match.end() - match.start(), "comment"))
+                return tokens, state
+        else:
+            return tokens, state
@@ -0,0 +1,37 @@
+import sqlite3
+from advisor import IndexProposal, analyze, format_report, referenced_columns
+
+
+def database():
+    conn = sqlite3.connect(":memory:")
+    conn.executescript("create table customers(id integer primary key, name); create table orders(id integer primary key, cust, status, total);")
+    return conn
+
+def test_join_columns_are_only_proposed_for_the_inner_loop():
+    conn = database()
+    proposals = analyze(conn, [("select * from orders o join customers c on o.cust = c.id where o.status = 1", 1)])
+    assert [(p.table, p.columns) for p in proposals] == [("orders", ("status",))]
+
+def test_correlated_subquery_scan_is_an_inner_loop():
+    conn = database()
+    proposals = analyze(conn, [("select * from customers c where (select count(*) from orders o where o.cust = c.id) > 2", 1)])
+    assert [(p.table, p.columns) for p in proposals] == [("orders", ("cust",))]
+
+def test_comparisons_with_constants_and_columns_get_their_roles():
+    _, refs = referenced_columns("select * from t where a = 1 and b = c and d in (1, 2) and e = lower(f)")
+    roles = {name: role for _, name, role in refs}
+    assert roles["a"] == "eq" and roles["b"] == "join" and roles["c"] == "join" and roles["d"] == "eq" and roles["e"] == "eq"
+
+def test_slower_proposals_are_not_recommended():
+    faster, slower = IndexProposal("t", ("a",)), IndexProposal("t", ("b",))
+    faster.before, faster.after = 0.02, 0.001
+    slower.before, slower.after = 0.007, 0.01
+    report = format_report([slower, faster], 1)
+    assert "1 proposals" in report
+    assert '\nCREATE INDEX IF NOT EXISTS "ix_t_a"' in report
+    assert '\n-- CREATE INDEX IF NOT EXISTS "ix_t_b"' in report
+
+def test_unfiltered_outer_table_gets_its_join_column():
+    conn = database()
+    proposals = analyze(conn, [("select count(*) from customers c join orders o on o.cust = c.id where c.name = 'n5'", 1)])
+    assert [(p.table, p.columns) for p in proposals] == [("orders", ("cust",))]
@@ -0,0 +1,28 @@
+import sqlite3
+from blobs import blob_ref, lazy_sql
+
+
+def connect():
+    conn = sqlite3.connect(":memory:")
+    conn.executescript("CREATE TABLE img(id INTEGER PRIMARY KEY, name TEXT, data BLOB, n INT);")
+    conn.execute("INSERT INTO img(name, data, n) VALUES ('a', randomblob(5000), 1), ('b', x'89504e470d0a1a0a00', 2)")
+    return conn
+
+def refs(conn, sql):
+    return [blob_ref(row[-1]) for row in conn.execute(lazy_sql(conn, sql) or sql)]
+
+def test_stored_column_gets_its_source():
+    conn = connect()
+    assert [ref.source for ref in refs(conn, "SELECT data FROM img ORDER BY n DESC")] == ["img.data#2", "img.data#1"]
+
+def test_expression_aliased_to_a_stored_column_gets_no_source():
+    conn = connect()
+    result = refs(conn, "SELECT name, randomblob(length(data)) AS data FROM img")
+    assert [(ref.size, ref.source) for ref in result] == [(5000, None), (9, None)]
+    result = refs(conn, "SELECT CASE WHEN n > 1 THEN data ELSE zeroblob(length(data)) END AS data FROM img")
+    assert [ref.source for ref in result] == [None, None]
+
+def test_statement_without_blob_affinity_columns_runs_as_it_is():
+    conn = connect()
+    assert lazy_sql(conn, "SELECT id, name, n FROM img WHERE n > 0") is None
+    assert lazy_sql(conn, "SELECT id, data FROM img") is not None
@@ -0,0 +1,19 @@
+import sqlite3
+from parallel import ReaderPool
+from pysqlite import iter_parallel_query
+from sqlsplit import split_statements
+
+
+def test_select_after_begin_sees_the_uncommitted_insert(tmp_path):
+    database = str(tmp_path / "test.db")
+    conn = sqlite3.connect(database, autocommit=True)
+    conn.execute("create table t(x)")
+    conn.execute("insert into t values(1)")
+    readers = ReaderPool(database, 2)
+    try:
+        outputs = [output for output, _ in iter_parallel_query(split_statements("begin; insert into t values(2); select count(*) from t;"), conn, readers, "plain")]
+    finally:
+        readers.close()
+        conn.execute("rollback")
+        conn.close()
+    assert outputs[-1].splitlines()[2].strip() == "2"
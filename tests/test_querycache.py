@@ -0,0 +1,27 @@
+import sqlite3
+from pysqlite import iter_sql_query
+from querycache import ResultCache
+from sqlsplit import split_statements
+
+
+def run(conn, cache, script):
+    return [output for output, _ in iter_sql_query(split_statements(script), conn, "plain", cache=cache, database="test")]
+
+def test_rollback_invalidates_results_read_in_the_transaction():
+    conn = sqlite3.connect(":memory:", autocommit=True)
+    cache = ResultCache()
+    run(conn, cache, "create table t(x); insert into t values(1);")
+    inside = run(conn, cache, "begin; insert into t values(2); select count(*) from t;")
+    assert "2" in inside[-1]
+    run(conn, cache, "rollback;")
+    after = run(conn, cache, "select count(*) from t;")
+    assert "1" in after[0] and "2" not in after[0].split("\n", 1)[1]
+    assert cache.hits == 0
+
+def test_repeated_select_outside_a_transaction_is_cached():
+    conn = sqlite3.connect(":memory:", autocommit=True)
+    cache = ResultCache()
+    run(conn, cache, "create table t(x); insert into t values(1);")
+    first = run(conn, cache, "select count(*) from t;")
+    assert run(conn, cache, "select count(*) from t;") == first
+    assert cache.hits == 1
@@ -0,0 +1,27 @@
+import sqlite3
+import pytest
+from pysqlite import has_transaction_control, run_script
+
+
+def test_unterminated_comment_is_not_reported_as_committed():
+    conn = sqlite3.connect(":memory:", autocommit=True)
+    conn.execute("create table t(x)")
+    with pytest.raises(sqlite3.OperationalError):
+        run_script("insert into t values(1); /* never closed", conn)
+    assert not conn.in_transaction
+    assert conn.execute("select count(*) from t").fetchone()[0] == 0
+
+def test_script_with_its_own_transactions_is_rejected():
+    conn = sqlite3.connect(":memory:", autocommit=True)
+    conn.execute("create table t(x)")
+    script = "insert into t values(1); commit; begin; insert into t values(2);"
+    assert has_transaction_control(script)
+    with pytest.raises(ValueError):
+        run_script(script, conn)
+    assert conn.execute("select count(*) from t").fetchone()[0] == 0
+
+def test_script_runs_as_one_transaction():
+    conn = sqlite3.connect(":memory:", autocommit=True)
+    assert run_script("create table t(x); insert into t values(1); insert into t values(2);", conn) == 3
+    assert conn.execute("select count(*) from t").fetchone()[0] == 2
+    assert not has_transaction_control("create trigger r after insert on t begin select 1; end;")
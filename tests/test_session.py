@@ -0,0 +1,27 @@
+import os
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+QtWidgets = pytest.importorskip("PySide6.QtWidgets")
+import gui
+from session import SessionStore
+
+
+def test_recovered_notepad_text_survives_a_second_crash(tmp_path, monkeypatch):
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+    path = str(tmp_path / "session.db")
+    monkeypatch.setattr(gui, "session_path", lambda: path)
+    store = SessionStore(path)
+    store.save_notepad(1, None, "select 42; -- unsaved")
+    store.close()
+
+    window = gui.Mainwindow(app)
+    window.restore_session()
+    window.session.flush()
+    # a crash right after the restore: nothing closes the window or touches the notepad
+    reopened = SessionStore(path)
+    try:
+        assert [(notepad_id, text) for notepad_id, _, text, _ in reopened.notepads()] == [(1, "select 42; -- unsaved")]
+    finally:
+        reopened.close()
+        window.session.close()
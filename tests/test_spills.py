@@ -0,0 +1,26 @@
+import os
+import time
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+pytest.importorskip("PySide6.QtWidgets")
+from gui import prune_spills
+
+
+def spill(directory, name, size, age):
+    path = directory / name
+    path.write_text("x" * size)
+    mtime = time.time() - age
+    os.utime(path, (mtime, mtime))
+    return str(path)
+
+def test_old_spills_and_the_oldest_beyond_the_size_limit_are_removed(tmp_path):
+    expired = spill(tmp_path, "a.txt", 10, 3600 * 24 * 30)
+    oldest = spill(tmp_path, "b.txt", 60, 300)
+    middle = spill(tmp_path, "c.txt", 30, 200)
+    newest = spill(tmp_path, "d.txt", 30, 100)
+    assert prune_spills(str(tmp_path), max_age=3600 * 24 * 7, max_bytes=100) == [middle, newest]
+    assert not os.path.exists(expired) and not os.path.exists(oldest)
+
+def test_missing_spill_directory_keeps_nothing(tmp_path):
+    assert prune_spills(str(tmp_path / "missing")) == []
@@ -0,0 +1,257 @@
+"""Module streaming query results to files and files into tables."""
+import csv
+import json
+import os
+import sys
+import tempfile
+from itertools import chain, islice
+
+EXPORT_FORMATS = {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl", ".parquet": "parquet"}
+EXPORT_BATCH = 10000
+IMPORT_FORMATS = {".csv": "csv", ".tsv": "csv", ".txt": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl"}
+IMPORT_BATCH = 50000
+SAMPLE_ROWS = 1000
+# pragmas used while bulk loading; restored afterwards on the import connection
+BULK_PRAGMAS = {"synchronous": "OFF", "cache_size": -262144, "temp_store": "MEMORY"}
+
+
+def file_format(path: str, formats: dict = EXPORT_FORMATS):
+    fmt = formats.get(os.path.splitext(path)[1].lower())
+    if fmt is None:
+        raise ValueError(f"Unsupported file type: {os.path.basename(path)}")
+    return fmt
+
+def unique_names(names):
+    seen, result = {}, []
+    for name in names:
+        name = name or "column"
+        count = seen.get(name, 0) + 1
+        seen[name] = count
+        result.append(name if count == 1 else f"{name}_{count}")
+    return result
+
+def quote_identifier(name: str):
+    return '"' + name.replace('"', '""') + '"'
+
+def _plain(value):
+    return value.hex() if isinstance(value, (bytes, bytearray)) else value
+
+
+def export_cursor(cursor, path: str, fmt: str = None, batch_size: int = EXPORT_BATCH, progress=None):
+    # rows are written batch by batch into a temp file next to `path`, which replaces it only on success
+    fmt = fmt or file_format(path)
+    header = unique_names(desc[0] for desc in cursor.description)
+    writer = {"csv": _write_csv, "jsonl": _write_jsonl, "parquet": _write_parquet}[fmt]
+    fd, tmp_path = tempfile.mkstemp(prefix=".export-", dir=os.path.dirname(os.path.abspath(path)))
+    os.close(fd)
+    try:
+        rows = writer(cursor, header, tmp_path, batch_size, progress)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    return rows
+
+def _batches(cursor, batch_size, progress):
+    rows = 0
+    while True:
+        batch = cursor.fetchmany(batch_size)
+        if not batch:
+            return
+        yield batch
+        rows += len(batch)
+        if progress is not None and progress(rows) is False:
+            raise InterruptedError("Export cancelled.")
+
+def _write_csv(cursor, header, path, batch_size, progress):
+    rows = 0
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        for batch in _batches(cursor, batch_size, progress):
+            writer.writerows([_plain(value) for value in row] for row in batch)
+            rows += len(batch)
+    return rows
+
+def _write_jsonl(cursor, header, path, batch_size, progress):
+    rows = 0
+    with open(path, "w", encoding="utf-8", newline="\n") as f:
+        for batch in _batches(cursor, batch_size, progress):
+            f.writelines(json.dumps(dict(zip(header, map(_plain, row))), ensure_ascii=False) + "\n" for row in batch)
+            rows += len(batch)
+    return rows
+
+def _write_parquet(cursor, header, path, batch_size, progress):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Parquet export needs the optional pyarrow package (pip install pyarrow).") from None
+
+    def column_type(values):
+        kinds = {type(value) for value in values if value is not None}
+        if kinds <= {int}:
+            return pa.int64()
+        if kinds <= {int, float}:
+            return pa.float64()
+        if kinds <= {bytes}:
+            return pa.binary()
+        return pa.string()
+
+    def coerce(value, kind):
+        # sqlite columns are dynamically typed; later batches are fitted to the schema of the first one
+        if value is None:
+            return None
+        if kind == pa.string():
+            return _plain(value) if isinstance(value, (bytes, bytearray)) else str(value)
+        if kind == pa.binary():
+            return value if isinstance(value, (bytes, bytearray)) else str(value).encode("utf-8")
+        if kind == pa.float64() and isinstance(value, (int, float)):
+            return float(value)
+        if kind == pa.int64() and (isinstance(value, int) or isinstance(value, float) and value.is_integer()):
+            return int(value)
+        raise ValueError(f"Value {value!r} does not fit the {kind} column inferred from the first batch; export to CSV or JSON Lines instead.")
+
+    rows, writer, schema = 0, None, None
+    try:
+        for batch in _batches(cursor, batch_size, progress):
+            columns = list(zip(*batch))
+            if schema is None:
+                schema = pa.schema([(name, column_type(values)) for name, values in zip(header, columns)])
+                writer = pq.ParquetWriter(path, schema)
+            arrays = [pa.array([coerce(value, field.type) for value in values], type=field.type) for field, values in zip(schema, columns)]
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+            rows += len(batch)
+        if writer is None:
+            schema = pa.schema([(name, pa.string()) for name in header])
+            writer = pq.ParquetWriter(path, schema)
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+
+def read_records(path: str, fmt: str = None, has_header: bool = True, delimiter: str = None):
+    # returns the column names and an iterator over row lists; the file is streamed, never read whole
+    fmt = fmt or file_format(path, IMPORT_FORMATS)
+    if fmt == "csv":
+        return _read_csv(path, has_header, delimiter or ("\t" if path.lower().endswith(".tsv") else ","))
+    return _read_jsonl(path)
+
+def _read_csv(path, has_header, delimiter):
+    csv.field_size_limit(min(sys.maxsize, 2**31 - 1))
+    f = open(path, "r", encoding="utf-8-sig", newline="")
+    reader = csv.reader(f, delimiter=delimiter)
+    first = next(reader, None) or []
+    columns = unique_names(first) if has_header else [f"column{i + 1}" for i in range(len(first))]
+    width = len(columns)
+
+    def rows():
+        with f:
+            # empty fields become NULL; numeric text is converted by the column affinity inside sqlite
+            for row in (reader if has_header or not first else chain([first], reader)):
+                if len(row) != width:
+                    row = (row + [""] * width)[:width]
+                yield [value if value != "" else None for value in row]
+    return columns, rows()
+
+def _read_jsonl(path):
+    f = open(path, "r", encoding="utf-8-sig")
+    records = (json.loads(line) for line in f if line.strip())
+    sample = list(islice(records, SAMPLE_ROWS))
+    columns = list(dict.fromkeys(key for record in sample for key in record))
+
+    def value(v):
+        if isinstance(v, (dict, list)):
+            return json.dumps(v, ensure_ascii=False)
+        return int(v) if isinstance(v, bool) else v
+
+    def rows():
+        with f:
+            for record in chain(sample, records):
+                yield [value(record.get(column)) for column in columns]
+    return columns, rows()
+
+def infer_types(sample: list, width: int):
+    types = []
+    for index in range(width):
+        kind = None
+        for row in sample:
+            value = row[index]
+            if value is None:
+                continue
+            if isinstance(value, str):
+                try:
+                    int(value)
+                    value_kind = "INTEGER"
+                except ValueError:
+                    try:
+                        float(value)
+                        value_kind = "REAL"
+                    except ValueError:
+                        value_kind = "TEXT"
+            elif isinstance(value, int):
+                value_kind = "INTEGER"
+            elif isinstance(value, float):
+                value_kind = "REAL"
+            else:
+                value_kind = "BLOB" if isinstance(value, (bytes, bytearray)) else "TEXT"
+            if kind is None or kind == value_kind:
+                kind = value_kind
+            elif {kind, value_kind} == {"INTEGER", "REAL"}:
+                kind = "REAL"
+            else:
+                kind = "TEXT"
+                break
+        types.append(kind or "TEXT")
+    return types
+
+def preview_import(path: str, fmt: str = None, has_header: bool = True, delimiter: str = None):
+    columns, rows = read_records(path, fmt, has_header, delimiter)
+    sample = list(islice(rows, SAMPLE_ROWS))
+    rows.close()
+    return list(zip(columns, infer_types(sample, len(columns))))
+
+def import_file(conn, path: str, table: str, fmt: str = None, has_header: bool = True, delimiter: str = None, batch_size: int = IMPORT_BATCH, defer_indexes: bool = False, progress=None):
+    columns, rows = read_records(path, fmt, has_header, delimiter)
+    if not columns:
+        rows.close()
+        raise ValueError(f"{os.path.basename(path)} has no data to import.")
+    source = rows
+    sample = list(islice(source, SAMPLE_ROWS))
+    types = infer_types(sample, len(columns))
+    rows = chain(sample, source)
+    name = quote_identifier(table)
+    insert = f"INSERT INTO {name} ({', '.join(map(quote_identifier, columns))}) VALUES ({', '.join('?' * len(columns))})"
+
+    saved = {pragma: conn.execute(f"PRAGMA {pragma}").fetchone()[0] for pragma in BULK_PRAGMAS}
+    for pragma, value in BULK_PRAGMAS.items():
+        conn.execute(f"PRAGMA {pragma} = {value}")
+    count = 0
+    try:
+        conn.execute("BEGIN")
+        conn.execute(f"CREATE TABLE IF NOT EXISTS {name} ({', '.join(f'{quote_identifier(c)} {t}' for c, t in zip(columns, types))})")
+        indexes = []
+        if defer_indexes:
+            # rebuilding an index once after the load is much cheaper than updating it row by row
+            indexes = conn.execute("SELECT name, sql FROM sqlite_schema WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL", (table,)).fetchall()
+            for index, _ in indexes:
+                conn.execute(f"DROP INDEX {quote_identifier(index)}")
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                break
+            conn.executemany(insert, batch)
+            count += len(batch)
+            if progress is not None and progress(count) is False:
+                raise InterruptedError("Import cancelled.")
+        for _, sql in indexes:
+            conn.execute(sql)
+        conn.execute("COMMIT")
+    finally:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        source.close()
+        for pragma, value in saved.items():
+            conn.execute(f"PRAGMA {pragma} = {value}")
+    return count
@@ -0,0 +1,694 @@
+"""Module with reusable widgets for the result area and dialogs."""
+import os
+import time
+import re
+from PySide6.QtWidgets import QTableView, QApplication, QAbstractItemView, QDialog, QFormLayout, QHBoxLayout, QLineEdit, QPushButton, QCheckBox, QComboBox, QPlainTextEdit, QDialogButtonBox, QFileDialog, QDockWidget, QTreeWidget, QTreeWidgetItem, QCompleter, QLabel, QVBoxLayout, QHeaderView
+from PySide6.QtGui import QKeySequence, QTextCursor, QSyntaxHighlighter, QTextCharFormat, QColor, QFont, QPalette
+from PySide6.QtCore import Qt, QAbstractTableModel, QModelIndex, Signal, QObject, QEvent, QStringListModel, QTimer
+from transfer import preview_import, quote_identifier
+from profiler import HISTORY_LIMIT
+from catalog import OBJECT_KINDS
+from sqlsplit import tokenize_line
+from theme import SYNTAX_LIGHT, SYNTAX_DARK
+from blobs import blob_ref, describe, display_value, read_at
+from maintenance import TASKS, TASK_HELP, FILE_TASKS, format_stats
+from collections import OrderedDict
+
+GRID_BATCH = 256
+LAZY_HIGHLIGHT_CHARS = 256 * 1024
+LAZY_HIGHLIGHT_BLOCKS = 2000
+HIGHLIGHT_SLICE = 0.03
+DELIMITERS = {"Comma": ",", "Semicolon": ";", "Tab": "\t", "Pipe": "|"}
+BLOB_ROLE = Qt.ItemDataRole.UserRole + 1
+HEX_ROW = 16
+HEX_PAGE = 4096
+HEX_CACHE_PAGES = 64
+
+
+class CursorTableModel(QAbstractTableModel):
+    def __init__(self, cursor, rows=None, batch_size=GRID_BATCH, parent=None):
+        super().__init__(parent)
+        self.cursor = cursor
+        self.batch_size = batch_size
+        self.header = [desc[0] for desc in cursor.description]
+        self.rows = list(rows or [])
+        self.exhausted = False
+        if rows is not None and len(self.rows) < batch_size:
+            self.close()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.header)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        value = self.rows[index.row()][index.column()]
+        if role in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.EditRole):
+            if value is None:
+                return "NULL"
+            if isinstance(value, (bytes, bytearray)):
+                return display_value(value)
+            return value if isinstance(value, (int, float)) else str(value)
+        if role == BLOB_ROLE:
+            return blob_ref(value)
+        if role == Qt.ItemDataRole.ForegroundRole and value is None:
+            return Qt.GlobalColor.gray
+        if role == Qt.ItemDataRole.TextAlignmentRole and isinstance(value, (int, float)):
+            return Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter
+        return None
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == Qt.Orientation.Horizontal:
+            return self.header[section]
+        return section + 1
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self.exhausted
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self.exhausted:
+            return
+        try:
+            rows = self.cursor.fetchmany(self.batch_size)
+        except Exception:
+            rows = []
+        if len(rows) < self.batch_size:
+            self.close()
+        if rows:
+            self.beginInsertRows(QModelIndex(), len(self.rows), len(self.rows) + len(rows) - 1)
+            self.rows.extend(rows)
+            self.endInsertRows()
+
+    def close(self):
+        self.exhausted = True
+        try:
+            self.cursor.close()
+        except Exception:
+            pass
+
+
+class ResultGrid(QTableView):
+    blob_activated = Signal(object)
+
+    def __init__(self, model, parent=None):
+        super().__init__(parent)
+        self.setModel(model)
+        self.doubleClicked.connect(self.activate)
+        self.setSelectionMode(QAbstractItemView.SelectionMode.ExtendedSelection)
+        self.setVerticalScrollMode(QAbstractItemView.ScrollMode.ScrollPerPixel)
+        self.setHorizontalScrollMode(QAbstractItemView.ScrollMode.ScrollPerPixel)
+        self.verticalHeader().setDefaultSectionSize(self.fontMetrics().height() + 6)
+
+    def keyPressEvent(self, event):
+        if event.matches(QKeySequence.StandardKey.Copy):
+            self.copy_selection()
+        else:
+            super().keyPressEvent(event)
+
+    def copy_selection(self):
+        indexes = sorted(self.selectedIndexes(), key=lambda i: (i.row(), i.column()))
+        if not indexes:
+            return
+        lines, row, cells = [], indexes[0].row(), []
+        for index in indexes:
+            if index.row() != row:
+                lines.append("\t".join(cells))
+                row, cells = index.row(), []
+            cells.append(str(index.data()))
+        lines.append("\t".join(cells))
+        QApplication.clipboard().setText("\n".join(lines))
+
+    def activate(self, index):
+        ref = index.data(BLOB_ROLE)
+        if ref is not None:
+            self.blob_activated.emit(ref)
+
+
+class BlobModel(QAbstractTableModel):
+    # a hex dump read on demand through incremental I/O, HEX_PAGE bytes at a time
+    COLUMNS = ("Offset", "Hex", "ASCII")
+
+    def __init__(self, conn, ref, parent=None):
+        super().__init__(parent)
+        self.conn = conn
+        self.ref = ref
+        self.pages = OrderedDict()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else (self.ref.size + HEX_ROW - 1) // HEX_ROW
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.COLUMNS)
+
+    def page(self, number):
+        data = self.pages.get(number)
+        if data is None:
+            try:
+                data = read_at(self.conn, self.ref, number * HEX_PAGE, HEX_PAGE)
+            except Exception:
+                # the row changed or was deleted after the viewer opened
+                data = b""
+            self.pages[number] = data
+            if len(self.pages) > HEX_CACHE_PAGES:
+                self.pages.popitem(last=False)
+        else:
+            self.pages.move_to_end(number)
+        return data
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or role != Qt.ItemDataRole.DisplayRole:
+            return None
+        offset = index.row() * HEX_ROW
+        if index.column() == 0:
+            return f"{offset:08x}"
+        start = offset % HEX_PAGE
+        chunk = self.page(offset // HEX_PAGE)[start:start + HEX_ROW]
+        if index.column() == 1:
+            return f"{chunk[:8].hex(' ')}  {chunk[8:].hex(' ')}".rstrip()
+        return "".join(chr(b) if 32 <= b < 127 else "." for b in chunk)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole or orientation != Qt.Orientation.Horizontal:
+            return None
+        return self.COLUMNS[section]
+
+
+class BlobInspector(QDialog):
+    save_requested = Signal(object)
+
+    def __init__(self, conn, ref, release=None, parent=None):
+        super().__init__(parent)
+        self.ref = ref
+        self.release = release
+        self.setWindowTitle(f"BLOB {ref.source}")
+        self.resize(720, 480)
+        self.model = BlobModel(conn, ref, self)
+        view = QTableView()
+        view.setModel(self.model)
+        view.setFont(QFont("Consolas", 10))
+        view.verticalHeader().hide()
+        # fixed row heights keep a view over millions of rows cheap
+        view.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        view.verticalHeader().setDefaultSectionSize(view.fontMetrics().height() + 4)
+        view.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+        view.horizontalHeader().setStretchLastSection(True)
+        buttons = QDialogButtonBox(QDialogButtonBox.StandardButton.Close)
+        buttons.rejected.connect(self.reject)
+        save = buttons.addButton("Save to File...", QDialogButtonBox.ButtonRole.ActionRole)
+        save.clicked.connect(lambda: self.save_requested.emit(self.ref))
+        layout = QVBoxLayout(self)
+        layout.addWidget(QLabel(describe(ref)))
+        layout.addWidget(view)
+        layout.addWidget(buttons)
+        self.finished.connect(self.close_blob)
+
+    def close_blob(self):
+        if self.release is not None:
+            release, self.release = self.release, None
+            release()
+
+
+class ProfileModel(QAbstractTableModel):
+    COLUMNS = ("Started", "Statement", "Wall ms", "Exec ms", "Fetch ms", "Render ms", "Rows", "Changes", "VM Steps", "Status")
+
+    def __init__(self, limit=HISTORY_LIMIT, parent=None):
+        super().__init__(parent)
+        self.limit = limit
+        self.profiles = []
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.profiles)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.COLUMNS)
+
+    def value(self, profile, column):
+        return (profile.started, " ".join(profile.sql.split()), profile.wall * 1000, profile.exec * 1000, profile.fetch * 1000, profile.render * 1000, profile.rows, profile.changes, profile.steps, profile.status)[column]
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        profile = self.profiles[index.row()]
+        value = self.value(profile, index.column())
+        if role == Qt.ItemDataRole.UserRole:
+            # raw values for sorting; missing counts sort first
+            return -1 if value is None else value
+        if role == Qt.ItemDataRole.DisplayRole:
+            if value is None:
+                return ""
+            if index.column() == 0:
+                return time.strftime("%H:%M:%S", time.localtime(value))
+            if isinstance(value, float):
+                return f"{value:.2f}"
+            return value
+        if role == Qt.ItemDataRole.ToolTipRole and index.column() == 1:
+            return profile.error or profile.sql
+        if role == Qt.ItemDataRole.ForegroundRole and profile.error is not None:
+            return Qt.GlobalColor.red
+        if role == Qt.ItemDataRole.TextAlignmentRole and index.column() >= 2 and index.column() < 9:
+            return Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter
+        return None
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        return self.COLUMNS[section] if orientation == Qt.Orientation.Horizontal else section + 1
+
+    def add(self, profile):
+        if len(self.profiles) >= self.limit:
+            drop = len(self.profiles) - self.limit + 1
+            self.beginRemoveRows(QModelIndex(), 0, drop - 1)
+            del self.profiles[:drop]
+            self.endRemoveRows()
+        self.beginInsertRows(QModelIndex(), len(self.profiles), len(self.profiles))
+        self.profiles.append(profile)
+        self.endInsertRows()
+
+    def clear(self):
+        self.beginResetModel()
+        self.profiles = []
+        self.endResetModel()
+
+    def prepend(self, profiles):
+        # older profiles, e.g. restored from the session, go in front of the ones added since
+        profiles = profiles[max(len(profiles) + len(self.profiles) - self.limit, 0):]
+        if profiles:
+            self.beginInsertRows(QModelIndex(), 0, len(profiles) - 1)
+            self.profiles[:0] = profiles
+            self.endInsertRows()
+
+
+class ImportDialog(QDialog):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Import Data")
+        self.resize(520, 420)
+        self.path_edit = QLineEdit()
+        browse = QPushButton("Browse...")
+        browse.clicked.connect(self.browse)
+        path_row = QHBoxLayout()
+        path_row.addWidget(self.path_edit)
+        path_row.addWidget(browse)
+        self.table_edit = QLineEdit()
+        self.header = QCheckBox("First row holds the column names")
+        self.header.setChecked(True)
+        self.delimiter = QComboBox()
+        self.delimiter.addItems(DELIMITERS)
+        self.defer_indexes = QCheckBox("Drop indexes of an existing table and rebuild them after the load")
+        self.preview = QPlainTextEdit(readOnly=True)
+        self.preview.setPlaceholderText("Columns and inferred types appear here.")
+        buttons = QDialogButtonBox(QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+        self.ok_button = buttons.button(QDialogButtonBox.StandardButton.Ok)
+        self.ok_button.setEnabled(False)
+
+        layout = QFormLayout(self)
+        layout.addRow("File:", path_row)
+        layout.addRow("Table:", self.table_edit)
+        layout.addRow("Delimiter:", self.delimiter)
+        layout.addRow("", self.header)
+        layout.addRow("", self.defer_indexes)
+        layout.addRow("Columns:", self.preview)
+        layout.addRow(buttons)
+
+        self.path_edit.editingFinished.connect(self.refresh_preview)
+        self.header.toggled.connect(self.refresh_preview)
+        self.delimiter.currentIndexChanged.connect(self.refresh_preview)
+        self.table_edit.textChanged.connect(self.update_ok)
+
+    def browse(self):
+        path, _ = QFileDialog.getOpenFileName(self, "Import Data", "", "Data Files (*.csv *.tsv *.txt *.jsonl *.ndjson);;All Files (*)")
+        if not path:
+            return
+        self.path_edit.setText(path)
+        if path.lower().endswith(".tsv"):
+            self.delimiter.setCurrentText("Tab")
+        self.refresh_preview()
+
+    def refresh_preview(self):
+        path = self.path()
+        self.columns = []
+        if path:
+            if not self.table_edit.text().strip():
+                self.table_edit.setText(os.path.splitext(os.path.basename(path))[0])
+            try:
+                self.columns = preview_import(path, has_header=self.header.isChecked(), delimiter=DELIMITERS[self.delimiter.currentText()])
+                self.preview.setPlainText("\n".join(f"{name} {kind}" for name, kind in self.columns) or "The file has no data.")
+            except Exception as e:
+                self.preview.setPlainText(str(e))
+        self.update_ok()
+
+    def update_ok(self):
+        self.ok_button.setEnabled(bool(getattr(self, "columns", None)) and bool(self.table()))
+
+    def path(self):
+        return self.path_edit.text().strip()
+
+    def table(self):
+        return self.table_edit.text().strip()
+
+    def options(self):
+        return {"has_header": self.header.isChecked(), "delimiter": DELIMITERS[self.delimiter.currentText()], "defer_indexes": self.defer_indexes.isChecked()}
+
+
+class MaintenanceDialog(QDialog):
+    def __init__(self, stats=None, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Database Maintenance")
+        self.resize(520, 220)
+        self.stats_label = QLabel(format_stats(stats) if stats is not None else "")
+        self.stats_label.setWordWrap(True)
+        self.task = QComboBox()
+        for name, label in TASKS.items():
+            self.task.addItem(label, name)
+        self.help = QLabel()
+        self.help.setWordWrap(True)
+        self.path_edit = QLineEdit()
+        self.browse_button = QPushButton("Browse...")
+        self.browse_button.clicked.connect(self.browse)
+        path_row = QHBoxLayout()
+        path_row.addWidget(self.path_edit)
+        path_row.addWidget(self.browse_button)
+        buttons = QDialogButtonBox(QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+        self.ok_button = buttons.button(QDialogButtonBox.StandardButton.Ok)
+
+        layout = QFormLayout(self)
+        layout.addRow("Database:", self.stats_label)
+        layout.addRow("Task:", self.task)
+        layout.addRow("", self.help)
+        layout.addRow("Write to:", path_row)
+        layout.addRow(buttons)
+
+        self.task.currentIndexChanged.connect(self.refresh)
+        self.path_edit.textChanged.connect(self.refresh)
+        self.refresh()
+
+    def browse(self):
+        path, _ = QFileDialog.getSaveFileName(self, "Database Maintenance", "", "SQLite Database (*.db *.sqlite *.sqlite3);;All Files (*)")
+        if path:
+            self.path_edit.setText(path)
+
+    def refresh(self):
+        task = self.task_name()
+        writes_file = task in FILE_TASKS
+        self.help.setText(TASK_HELP[task])
+        self.path_edit.setEnabled(writes_file)
+        self.browse_button.setEnabled(writes_file)
+        self.ok_button.setEnabled(not writes_file or bool(self.path()))
+
+    def task_name(self):
+        return self.task.currentData()
+
+    def path(self):
+        return self.path_edit.text().strip() if self.task_name() in FILE_TASKS else None
+
+
+class SchemaDock(QDockWidget):
+    name_activated = Signal(str)
+    # item roles: what a node is and the object name it stands for
+    KIND_ROLE = Qt.ItemDataRole.UserRole
+    NAME_ROLE = Qt.ItemDataRole.UserRole + 1
+
+    def __init__(self, parent=None):
+        super().__init__("Schema", parent)
+        self.setObjectName("schema_dock")
+        self.catalog = None
+        self.version = None
+        self.tree = QTreeWidget()
+        self.tree.setHeaderHidden(True)
+        self.tree.itemExpanded.connect(self.expand)
+        self.tree.itemDoubleClicked.connect(self.activate)
+        self.setWidget(self.tree)
+        self.visibilityChanged.connect(lambda visible: visible and self.refresh())
+
+    def set_catalog(self, catalog):
+        self.catalog = catalog
+        self.version = None
+        if self.isVisible():
+            self.refresh()
+
+    def refresh(self):
+        if self.catalog is None:
+            self.show_message("No schema for an in-memory or unset database.")
+            return
+        try:
+            self.catalog.refresh()
+        except Exception as e:
+            self.catalog.close()
+            self.show_message(str(e))
+            return
+        # the completer refreshes the same catalog, so compare against the version shown
+        if self.catalog.version != self.version:
+            self.rebuild()
+            self.version = self.catalog.version
+
+    def show_message(self, text):
+        self.version = None
+        self.tree.clear()
+        self.tree.addTopLevelItem(QTreeWidgetItem([text]))
+
+    def rebuild(self):
+        expanded = {self.tree.topLevelItem(i).data(0, self.KIND_ROLE) for i in range(self.tree.topLevelItemCount()) if self.tree.topLevelItem(i).isExpanded()}
+        self.tree.clear()
+        for kind in OBJECT_KINDS:
+            names = self.catalog.objects[kind]
+            group = QTreeWidgetItem([f"{'Indexes' if kind == 'index' else kind.capitalize() + 's'} ({len(names)})"])
+            group.setData(0, self.KIND_ROLE, kind)
+            group.setChildIndicatorPolicy(QTreeWidgetItem.ChildIndicatorPolicy.ShowIndicator if names else QTreeWidgetItem.ChildIndicatorPolicy.DontShowIndicator)
+            self.tree.addTopLevelItem(group)
+            if kind in expanded:
+                group.setExpanded(True)
+        if self.catalog.attachments:
+            group = QTreeWidgetItem([f"Databases ({len(self.catalog.schemas)})"])
+            group.setData(0, self.KIND_ROLE, "database")
+            self.tree.addTopLevelItem(group)
+            if "database" in expanded:
+                group.setExpanded(True)
+
+    def expand(self, item):
+        # children are created on first expansion only
+        if item.childCount() or self.catalog is None:
+            return
+        kind, name = item.data(0, self.KIND_ROLE), item.data(0, self.NAME_ROLE)
+        try:
+            if kind == "database":
+                children = []
+                for alias, path in [("main", self.catalog.database)] + list(self.catalog.attachments.items()):
+                    child = QTreeWidgetItem([f"{alias}  {path}"])
+                    child.setData(0, self.KIND_ROLE, "schema")
+                    child.setData(0, self.NAME_ROLE, alias)
+                    child.setToolTip(0, path)
+                    children.append(child)
+                item.addChildren(children)
+            elif name is None:
+                children = []
+                for object_name, table in self.catalog.objects[kind]:
+                    child = QTreeWidgetItem([object_name if kind in ("table", "view") else f"{object_name} ({table})"])
+                    child.setData(0, self.KIND_ROLE, kind)
+                    child.setData(0, self.NAME_ROLE, object_name)
+                    if kind in ("table", "view"):
+                        child.setChildIndicatorPolicy(QTreeWidgetItem.ChildIndicatorPolicy.ShowIndicator)
+                    children.append(child)
+                item.addChildren(children)
+            elif kind in ("table", "view"):
+                self.expand_table(item, kind, name)
+        except Exception as e:
+            item.addChild(QTreeWidgetItem([str(e)]))
+
+    def expand_table(self, item, kind, name):
+        if kind == "table":
+            rows = self.catalog.row_estimate(name)
+            if rows is not None:
+                item.setText(0, f"{name}  (~{rows:,} rows)")
+        children = []
+        for column, column_type, notnull, pk in self.catalog.columns(name):
+            flags = " ".join(flag for flag, on in (("PK", pk), ("NOT NULL", notnull)) if on)
+            child = QTreeWidgetItem([f"{column}  {column_type or 'ANY'}  {flags}".rstrip()])
+            child.setData(0, self.KIND_ROLE, "column")
+            child.setData(0, self.NAME_ROLE, column)
+            children.append(child)
+        for label, names in (("index", self.catalog.indexes(name)), ("trigger", self.catalog.triggers(name))):
+            for object_name in names:
+                child = QTreeWidgetItem([f"{label}: {object_name}"])
+                child.setData(0, self.KIND_ROLE, label)
+                child.setData(0, self.NAME_ROLE, object_name)
+                children.append(child)
+        item.addChildren(children)
+        item.setChildIndicatorPolicy(QTreeWidgetItem.ChildIndicatorPolicy.DontShowIndicatorWhenChildless)
+
+    def activate(self, item, column):
+        name = item.data(0, self.NAME_ROLE)
+        if name is not None:
+            # objects of attached databases are inserted qualified by their alias
+            self.name_activated.emit(self.catalog.sql_name(name) if item.data(0, self.KIND_ROLE) in OBJECT_KINDS else name if name.isidentifier() else quote_identifier(name))
+
+
+class SqlCompleter(QObject):
+    # popup completion for a QPlainTextEdit; `provider(prefix, qualifier)` returns the candidates,
+    # already filtered by prefix, so the popup shows them unfiltered
+    _WORD = re.compile(r"(?:([\w$]+|\"[^\"]*\")\.)?([\w$]*)$")
+
+    def __init__(self, editor, provider, parent=None):
+        super().__init__(parent or editor)
+        self.editor = editor
+        self.provider = provider
+        self.model = QStringListModel(self)
+        self.completer = QCompleter(self.model, self)
+        self.completer.setWidget(editor)
+        self.completer.setCompletionMode(QCompleter.CompletionMode.UnfilteredPopupCompletion)
+        self.completer.setCaseSensitivity(Qt.CaseSensitivity.CaseInsensitive)
+        self.completer.activated.connect(self.insert)
+        # QCompleter forwards keys from its popup straight to the editor's event(), past any event filter,
+        # so the editor's key handler itself is wrapped
+        self._key_press = editor.keyPressEvent
+        editor.keyPressEvent = self.key_press
+
+    def key_press(self, event):
+        popup = self.completer.popup()
+        if popup.isVisible() and event.key() in (Qt.Key.Key_Return, Qt.Key.Key_Enter, Qt.Key.Key_Tab, Qt.Key.Key_Escape, Qt.Key.Key_Backtab, Qt.Key.Key_Up, Qt.Key.Key_Down, Qt.Key.Key_PageUp, Qt.Key.Key_PageDown):
+            event.ignore()
+            return  # the popup handles these
+        if event.key() == Qt.Key.Key_Space and event.modifiers() & Qt.KeyboardModifier.ControlModifier:
+            self.update_popup(forced=True)
+            return
+        self._key_press(event)
+        text = event.text()
+        if text and (text.isalnum() or text in "_$."):
+            self.update_popup()
+        elif event.key() == Qt.Key.Key_Backspace and popup.isVisible():
+            self.update_popup()
+        elif popup.isVisible() and event.key() not in (Qt.Key.Key_Shift, Qt.Key.Key_Control):
+            popup.hide()
+
+    def context(self):
+        cursor = self.editor.textCursor()
+        block = cursor.block().text()[:cursor.positionInBlock()]
+        match = self._WORD.search(block)
+        qualifier = match.group(1)
+        if qualifier and qualifier.startswith('"'):
+            qualifier = qualifier[1:-1]
+        return qualifier, match.group(2)
+
+    def update_popup(self, forced=False):
+        qualifier, prefix = self.context()
+        if not prefix and not qualifier and not forced:
+            self.completer.popup().hide()
+            return
+        words = self.provider(prefix, qualifier)
+        if not words or words == [prefix]:
+            self.completer.popup().hide()
+            return
+        self.model.setStringList(words)
+        self.completer.setCompletionPrefix("")
+        rect = self.editor.cursorRect()
+        rect.setWidth(self.completer.popup().sizeHintForColumn(0) + self.completer.popup().verticalScrollBar().sizeHint().width())
+        self.completer.complete(rect)
+        self.completer.popup().setCurrentIndex(self.model.index(0))
+
+    def insert(self, word):
+        _, prefix = self.context()
+        cursor = self.editor.textCursor()
+        cursor.movePosition(QTextCursor.MoveOperation.Left, QTextCursor.MoveMode.KeepAnchor, len(prefix))
+        cursor.insertText(word if word.isidentifier() else quote_identifier(word))
+        self.editor.setTextCursor(cursor)
+
+
+class SqlHighlighter(QSyntaxHighlighter):
+    # each block stores the tokenizer state it ends in, so an edit re-highlights the changed line and
+    # only runs on into the following lines while their starting state differs
+    def __init__(self, editor):
+        super().__init__(editor.document())
+        self.editor = editor
+        self.dark = None
+        self.formats = {}
+        self.deferring = False
+        self.next_block = None
+        self.timer = QTimer(self)
+        self.timer.setInterval(0)
+        self.timer.timeout.connect(self.highlight_chunk)
+        self.update_formats()
+        editor.installEventFilter(self)
+
+    def update_formats(self):
+        dark = self.editor.palette().color(QPalette.ColorRole.Base).lightness() < 128
+        if dark == self.dark:
+            return False
+        self.dark = dark
+        for kind, color in (SYNTAX_DARK if dark else SYNTAX_LIGHT).items():
+            fmt = QTextCharFormat()
+            fmt.setForeground(QColor(color))
+            if kind == "keyword":
+                fmt.setFontWeight(QFont.Weight.Bold)
+            elif kind == "comment":
+                fmt.setFontItalic(True)
+            self.formats[kind] = fmt
+        return True
+
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Type.PaletteChange and self.update_formats():
+            if self.document().blockCount() > LAZY_HIGHLIGHT_BLOCKS:
+                self.start_pass()
+            else:
+                self.rehighlight()
+        return False
+
+    def set_text(self, text: str):
+        # a large text is inserted unhighlighted and then highlighted from the top in timer slices
+        if len(text) < LAZY_HIGHLIGHT_CHARS:
+            self.editor.setPlainText(text)
+            return
+        self.suspend()
+        try:
+            self.editor.setPlainText(text)
+        finally:
+            self.resume()
+
+    def suspend(self):
+        self.timer.stop()
+        self.deferring = True
+
+    def resume(self):
+        self.deferring = False
+        self.start_pass()
+
+    def start_pass(self):
+        self.next_block = 0
+        self.timer.start()
+
+    def highlight_chunk(self):
+        # works for HIGHLIGHT_SLICE seconds per timer tick; the position is kept as a block number,
+        # since edits in between may invalidate a QTextBlock
+        block = self.document().findBlockByNumber(self.next_block)
+        deadline = time.perf_counter() + HIGHLIGHT_SLICE
+        while block.isValid():
+            self.rehighlightBlock(block)
+            block = block.next()
+            if time.perf_counter() > deadline:
+                self.next_block = block.blockNumber() if block.isValid() else self.document().blockCount()
+                return
+        self.timer.stop()
+        self.next_block = None
+
+    def highlightBlock(self, text):
+        if self.deferring:
+            self.setCurrentBlockState(0)
+            return
+        tokens, state = tokenize_line(text, max(self.previousBlockState(), 0))
+        if tokens and not text.isascii() and any(ord(char) > 0xFFFF for char in text):
+            # Qt positions count UTF-16 units, so characters outside the BMP take two
+            units = [0]
+            for char in text:
+                units.append(units[-1] + (2 if ord(char) > 0xFFFF else 1))
+            tokens = [(units[start], units[start + length] - units[start], kind) for start, length, kind in tokens]
+        formats = self.formats
+        for start, length, kind in tokens:
+            self.setFormat(start, length, formats[kind])
+        self.setCurrentBlockState(state)